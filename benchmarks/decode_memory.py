@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+
+"""
+Memory benchmark for the XigtXML and XigtJSON decoders.
+
+The IGT in the ODIN example corpus is replicated (with new IGT ids)
+until the corpus has the requested number of IGTs, written to a
+temporary file, and decoded. In `full` mode, allocations are traced
+and the memory retained by the loaded corpus is reported together with
+the number of distinct string objects among the ids, types, and
+attribute names and values of tiers and items, which shows how well
+recurring strings are shared. In `transient` mode (XigtXML only), the
+process's maximum resident set size while streaming is reported, which
+allows corpora far larger than memory, e.g.:
+
+    python benchmarks/decode_memory.py --igts 1000000 --mode transient
+"""
+
+from __future__ import print_function
+import os
+import re
+import gc
+import json
+import argparse
+import tempfile
+import time
+import tracemalloc
+import resource
+
+from xigt.codecs import xigtxml, xigtjson
+
+ODIN = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'examples', 'odin', 'kor.xml'
+)
+
+
+def write_scaled_xml(fh, n):
+    with open(ODIN) as src_fh:
+        src = src_fh.read()
+    m = re.search(r'<igt .*?</igt>', src, re.S)
+    igt = m.group(0)
+    igt_id = re.search(r'<igt id="([^"]+)"', igt).group(1)
+    before, after = igt.split('id="{}"'.format(igt_id), 1)
+    fh.write(src[:m.start()])
+    for i in range(n):
+        fh.write('{}id="igt{}"{}'.format(before, i, after))
+    fh.write(src[m.end():])
+
+
+def write_scaled_json(fh, n, xml_path):
+    # encode one IGT at a time so the corpus is never fully loaded
+    xc = xigtxml.load(xml_path, mode='transient')
+    obj, nsmap = xigtjson._make_obj(xc)
+    head = json.dumps(obj)[:-1]
+    fh.write(head + (', ' if obj else '') + '"igts": [')
+    for i, igt in enumerate(xc):
+        if i:
+            fh.write(', ')
+        fh.write(json.dumps(xigtjson.encode_igt(igt, nsmap)))
+    fh.write(']}')
+
+
+def string_stats(igts):
+    refs = 0
+    distinct = set()
+    for igt in igts:
+        for tier in igt:
+            for obj in [tier] + tier.items:
+                strings = [obj.id, obj.type]
+                strings.extend(obj.attributes)
+                strings.extend(obj.attributes.values())
+                for s in strings:
+                    if s is not None:
+                        refs += 1
+                        distinct.add(id(s))
+    return refs, len(distinct)
+
+
+def run(args):
+    tmpdir = tempfile.mkdtemp()
+    xml_path = os.path.join(tmpdir, 'scaled.xml')
+    with open(xml_path, 'w') as fh:
+        write_scaled_xml(fh, args.igts)
+    path = xml_path
+    codec = xigtxml
+    if args.format == 'json':
+        path = os.path.join(tmpdir, 'scaled.json')
+        with open(path, 'w') as fh:
+            write_scaled_json(fh, args.igts, xml_path)
+        codec = xigtjson
+    print('{} IGTs, {:.1f} MB {} file'.format(
+        args.igts, os.path.getsize(path) / 1e6, args.format))
+
+    gc.collect()
+    if args.mode == 'transient':
+        t = time.time()
+        for igt in codec.load(path, mode='transient'):
+            pass
+        t = time.time() - t
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print('  decode time      {:10.2f}s ({:.0f} IGTs/s)'
+              .format(t, args.igts / t))
+        print('  max RSS          {:10.1f} MB'.format(maxrss / 1e3))
+    else:
+        tracemalloc.start()
+        t = time.time()
+        xc = codec.load(path)
+        t = time.time() - t
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        refs, distinct = string_stats(xc)
+        print('  decode time      {:10.2f}s (traced)'.format(t))
+        print('  retained         {:10.1f} MB ({:.0f} bytes/IGT)'
+              .format(current / 1e6, current / args.igts))
+        print('  peak             {:10.1f} MB'.format(peak / 1e6))
+        print('  strings          {:10d} references, {} distinct objects'
+              .format(refs, distinct))
+
+    for fn in os.listdir(tmpdir):
+        os.remove(os.path.join(tmpdir, fn))
+    os.rmdir(tmpdir)
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the memory use of the corpus decoders.'
+    )
+    parser.add_argument('--igts', type=int, default=10000,
+        help='the number of IGTs to decode (default: 10000)')
+    parser.add_argument('--format', choices=('xml', 'json'), default='xml',
+        help='the format to decode (default: xml)')
+    parser.add_argument('--mode', choices=('full', 'transient'),
+        default='full',
+        help='the corpus loading mode (default: full)')
+    args = parser.parse_args(arglist)
+    if args.format == 'json' and args.mode == 'transient':
+        parser.error('the json codec only supports the full mode')
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+"""
+Throughput benchmark for the LaTeX exporter.
+
+The Abkhaz example corpus is replicated until it has the requested
+number of IGTs, then string escaping and full IGT export are timed.
+
+    python benchmarks/latex_export.py --igts 20000
+"""
+
+from __future__ import print_function
+import os
+import argparse
+import timeit
+
+from xigt.codecs import xigtxml
+from xigt import XigtCorpus
+from xigt.exporters import latex
+
+ABKHAZ = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'examples', 'abkhaz', 'abkhaz.xml'
+)
+
+SUBSTITUTIONS = {
+    'item_substitutions': [
+        ['glosses', [['([A-Z]{2,})', '\\\\textsc{\\1}']]],
+    ],
+    'tier_substitutions': [
+        ['.*', [['\\\\\\\\$', '\\\\\\\\ ']]],
+    ],
+}
+
+
+def scaled_corpus(n):
+    igts = []
+    while len(igts) < n:
+        with open(ABKHAZ) as fh:
+            for igt in xigtxml.load(fh, mode='transient'):
+                igt.id = '{}-{}'.format(igt.id, len(igts))
+                igts.append(igt)
+                if len(igts) == n:
+                    break
+    return XigtCorpus(igts=igts)
+
+
+def sequential_escape(s):
+    # the former implementation, for comparison
+    for c, r in latex.LATEX_CHARMAP:
+        s = s.replace(c, r)
+    return s
+
+
+def run(args):
+    xc = scaled_corpus(args.igts)
+    strings = [
+        item.value() or ''
+        for igt in xc for tier in igt for item in tier
+    ]
+    print('{} IGTs, {} item strings'.format(len(xc), len(strings)))
+
+    def bench(name, func):
+        t = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print('  {:<24} {:8.3f}s {:12.0f} {}/s'
+              .format(name, t, args.igts / t if 'export' in name
+                      else len(strings) / t,
+                      'igts' if 'export' in name else 'strings'))
+
+    bench('escape (sequential)',
+          lambda: [sequential_escape(s) for s in strings])
+    bench('escape (single pass)',
+          lambda: [latex.escape(s) for s in strings])
+    bench('export',
+          lambda: list(latex.export_corpus(xc, latex.prepare_config({}))))
+    bench('export (substitutions)',
+          lambda: list(latex.export_corpus(
+              xc, latex.prepare_config(dict(SUBSTITUTIONS)))))
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the LaTeX exporter.'
+    )
+    parser.add_argument('--igts', type=int, default=10000,
+        help='the number of IGTs to export (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=3,
+        help='the number of timing repetitions (default: 3)')
+    args = parser.parse_args(arglist)
+    run(args)
+
+if __name__ == '__main__':
+    main()
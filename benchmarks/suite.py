@@ -0,0 +1,430 @@
+#!/usr/bin/env python
+
+"""
+Benchmark suite for the codecs, the model, references, XigtPath, and
+the command-line interface.
+
+A synthetic corpus (see `xigt.generate`) is generated and written as
+XigtXML and XigtJSON to a temporary directory, and each scenario is
+timed (the best of `--repeat` runs) and, unless `--no-memory` is given,
+run once more with allocation tracing to find its peak memory use.
+Throughput is given in IGTs per second.
+
+Results can be saved with `--save` and later compared against with
+`--baseline`; scenarios that became slower than the baseline by more
+than `--tolerance` are marked, and the exit status is then 1, so the
+suite can guard against regressions:
+
+    python benchmarks/suite.py --save baseline.json
+    # ... make changes ...
+    python benchmarks/suite.py --baseline baseline.json
+
+Use `--only` to run the scenarios whose names contain any of the given
+strings (e.g., `--only xml.load cli.`), and `--list` to list them.
+Timings depend on the machine, so compare only results from the same
+machine and corpus shape.
+
+`benchmarks/baseline.json` has reference results of the default
+options; it records the Python version and platform it was run on.
+To compare changes on another machine, first save a baseline of your
+own from the unchanged tree, e.g.:
+
+    git stash
+    python benchmarks/suite.py --save /tmp/baseline.json
+    git stash pop
+    python benchmarks/suite.py --baseline /tmp/baseline.json
+
+With the default 1000 IGTs, a full run takes about 20 minutes, most
+of it in `cli.partition`, which reads the corpus once per partition;
+`--igts 100` or `--only` give quicker checks.
+"""
+
+from __future__ import print_function
+import os
+import io
+import gc
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+from xigt import XigtCorpus, ref, xigtpath as xp
+from xigt.generate import generate, SHAPES
+from xigt.codecs import xigtxml, xigtjson
+from xigt.scripts import (
+    xigt_diff,
+    xigt_export,
+    xigt_index,
+    xigt_partition,
+    xigt_patch,
+    xigt_query,
+    xigt_sort,
+    xigt_validate,
+)
+
+SCENARIOS = []
+
+
+def scenario(name):
+    """
+    Register a scenario. The decorated function takes the |Context|
+    and returns the function to time.
+    """
+    def register(setup):
+        SCENARIOS.append((name, setup))
+        return setup
+    return register
+
+
+class Context(object):
+    """The corpus files and objects shared by the scenarios."""
+
+    def __init__(self, tmpdir, shape):
+        self.tmpdir = tmpdir
+        self.shape = shape
+        self.xml_path = os.path.join(tmpdir, 'corpus.xml')
+        self.json_path = os.path.join(tmpdir, 'corpus.json')
+        xigtxml.dump(self.xml_path, generate(**shape))
+        self.xc = xigtxml.load(self.xml_path)
+        xigtjson.dump(self.json_path, self.xc)
+        self.json = xigtjson.dumps(self.xc)
+        self._counter = 0
+
+    def path(self, name):
+        """Return a new path in the temporary directory."""
+        self._counter += 1
+        return os.path.join(self.tmpdir, '{}-{}'.format(self._counter, name))
+
+
+# Codecs ###############################################################
+
+def _load(mode, validate=True):
+    def setup(ctx):
+        def run():
+            for _ in xigtxml.load(ctx.xml_path, mode=mode,
+                                  validate=validate):
+                pass
+        return run
+    return setup
+
+scenario('xml.load.full')(_load('full'))
+scenario('xml.load.incremental')(_load('incremental'))
+scenario('xml.load.transient')(_load('transient'))
+scenario('xml.load.unvalidated')(_load('full', validate=False))
+
+
+@scenario('xml.dump.full')
+def xml_dump(ctx):
+    out = ctx.path('dump.xml')
+    return lambda: xigtxml.dump(out, ctx.xc)
+
+
+@scenario('xml.dump.transient')
+def xml_dump_transient(ctx):
+    # decodes as well, as the IGTs of a transient corpus are not kept
+    out = ctx.path('dump.xml')
+    return lambda: xigtxml.dump(
+        out, xigtxml.load(ctx.xml_path, mode='transient')
+    )
+
+
+@scenario('json.load')
+def json_load(ctx):
+    return lambda: xigtjson.load(ctx.json_path)
+
+
+@scenario('json.dumps')
+def json_dumps(ctx):
+    return lambda: xigtjson.dumps(ctx.xc)
+
+
+@scenario('json.roundtrip')
+def json_roundtrip(ctx):
+    return lambda: xigtjson.loads(xigtjson.dumps(ctx.xc))
+
+
+# Model and references #################################################
+
+@scenario('model.refresh_indices')
+def refresh_indices(ctx):
+    def run():
+        for igt in ctx.xc:
+            igt.refresh_indices()
+    return run
+
+
+@scenario('ref.resolve')
+def resolve(ctx):
+    exprs = [
+        (igt, expr)
+        for igt in ctx.xc
+        for tier in igt
+        for item in tier
+        for expr in (item.alignment, item.segmentation)
+        if expr is not None
+    ]
+
+    def run():
+        for igt, expr in exprs:
+            ref.resolve(igt, expr)
+    return run
+
+
+@scenario('item.value')
+def item_value(ctx):
+    items = [item for igt in ctx.xc for tier in igt for item in tier]
+
+    def run():
+        for item in items:
+            item.value()
+    return run
+
+
+# XigtPath #############################################################
+
+def _xigtpath(path):
+    def setup(ctx):
+        def run():
+            for igt in ctx.xc:
+                xp.findall(igt, path)
+        return run
+    return setup
+
+scenario('xigtpath.children')(
+    _xigtpath('tier[@type="glosses"]/item/value()'))
+scenario('xigtpath.descendants')(
+    _xigtpath('.//item[@alignment]'))
+scenario('xigtpath.referent')(
+    _xigtpath('tier[@type="glosses"]/item/referent()'))
+scenario('xigtpath.metadata')(
+    _xigtpath('metadata//dc:subject/text()'))
+
+
+@scenario('xigtpath.corpus')
+def xigtpath_corpus(ctx):
+    # uses the corpus-wide index of tier types
+    return lambda: xp.findall(ctx.xc, '//tier[@type="morphemes"]')
+
+
+# Command-line interface ###############################################
+
+def _command(main, *args):
+    # run a command's main() with arguments made from the context;
+    # arguments that are functions are called with it (for new paths)
+    def setup(ctx):
+        def run():
+            arglist = [arg(ctx) if callable(arg) else arg for arg in args]
+            arglist = [arg.format(xml=ctx.xml_path) for arg in arglist]
+            with redirect_stdout(io.StringIO()):
+                try:
+                    main(arglist)
+                except SystemExit:
+                    pass
+        return run
+    return setup
+
+
+def _new_path(name):
+    return lambda ctx: ctx.path(name)
+
+
+scenario('cli.validate')(_command(xigt_validate.main, '-q', '{xml}'))
+scenario('cli.query')(_command(
+    xigt_query.main, '--count', 'igt/tier[@type="glosses"]/item', '{xml}'))
+scenario('cli.sort')(_command(
+    xigt_sort.main, '--tier-deps', 'segmentation,alignment', '{xml}'))
+scenario('cli.partition')(_command(
+    xigt_partition.main, '--key-path', '@doc-id',
+    _new_path('partitions'), '{xml}'))
+scenario('cli.export.columns')(_command(
+    xigt_export.main, '-f', 'columns', '-i', '{xml}',
+    '-o', _new_path('export.csv')))
+scenario('cli.export.latex')(_command(
+    xigt_export.main, '-f', 'latex', '-i', '{xml}',
+    '-o', _new_path('export.tex')))
+scenario('cli.index')(_command(
+    xigt_index.main, _new_path('index.db'), '{xml}'))
+
+
+@scenario('cli.diff')
+def cli_diff(ctx):
+    new_path = _changed_copy(ctx)
+    return _command(xigt_diff.main, '-o', _new_path('patch'),
+                    '{xml}', new_path)(ctx)
+
+
+@scenario('cli.patch')
+def cli_patch(ctx):
+    patch_path = ctx.path('patch')
+    xigt_diff.main(['-o', patch_path, ctx.xml_path, _changed_copy(ctx)])
+    return _command(xigt_patch.main, '-o', _new_path('patched.xml'),
+                    '{xml}', patch_path)(ctx)
+
+
+def _changed_copy(ctx):
+    # write a copy of the corpus with 1% of the IGTs changed
+    path = ctx.path('changed.xml')
+    src = xigtxml.load(ctx.xml_path, mode='transient')
+
+    def igts():
+        for i, igt in enumerate(src):
+            if i % 100 == 0:
+                igt.attributes['changed'] = 'yes'
+            yield igt
+
+    xigtxml.dump(path, XigtCorpus(id=src.id, nsmap=src.nsmap,
+                                  igts=igts(), mode='transient'))
+    return path
+
+
+# Running ##############################################################
+
+def measure(run, repeat, memory):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run(args):
+    names = [name for name, _ in SCENARIOS
+             if not args.only or any(s in name for s in args.only)]
+    if args.list:
+        print('\n'.join(names))
+        return 0
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline['shape'] != shape(args):
+            print('warning: the baseline used a different corpus shape: {}'
+                  .format(baseline['shape']), file=sys.stderr)
+    # keep the commands' own logging configuration quiet
+    logging.basicConfig(level=logging.CRITICAL)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        ctx = Context(tmpdir, shape(args))
+        print('{} IGTs, {:.1f} MB XigtXML, {:.1f} MB XigtJSON'.format(
+            args.igts,
+            os.path.getsize(ctx.xml_path) / 1e6,
+            os.path.getsize(ctx.json_path) / 1e6))
+        results = {}
+        regressions = []
+        print('  {:<26} {:>9} {:>10} {:>9}{}'.format(
+            'scenario', 'seconds', 'IGTs/s', 'peak MB',
+            '  vs baseline' if baseline else ''))
+        for name, setup in SCENARIOS:
+            if name not in names:
+                continue
+            seconds, peak = measure(setup(ctx), args.repeat, args.memory)
+            result = {'seconds': seconds, 'igts_per_second':
+                      args.igts / seconds if seconds else None,
+                      'peak_bytes': peak}
+            results[name] = result
+            line = '  {:<26} {:9.3f} {:10.0f} {:>9}'.format(
+                name, seconds, result['igts_per_second'] or 0,
+                '-' if peak is None else '{:.1f}'.format(peak / 1e6))
+            if baseline:
+                line += '  ' + _compare(
+                    name, result, baseline['results'].get(name),
+                    args.tolerance, regressions)
+            print(line)
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmpdir)
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump({
+                'shape': shape(args),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results,
+            }, fh, indent=2, sort_keys=True)
+    if regressions:
+        print('{} scenario(s) slower than the baseline: {}'.format(
+            len(regressions), ', '.join(regressions)))
+        return 1
+    return 0
+
+
+def _compare(name, result, base, tolerance, regressions):
+    if base is None:
+        return '(new)'
+    ratio = result['seconds'] / base['seconds']
+    mark = ''
+    if ratio > 1 + tolerance:
+        mark = ' SLOWER'
+        regressions.append(name)
+    elif ratio < 1 - tolerance:
+        mark = ' faster'
+    return '{:5.2f}x time{}'.format(ratio, mark)
+
+
+def shape(args):
+    # the corpus options, as saved with the results
+    return dict(igts=args.igts, shape=args.shape, words=list(args.words),
+                morphemes=list(args.morphemes), tiers=args.tiers,
+                items=args.items, depth=args.depth,
+                namespaces=args.namespaces, seed=args.seed)
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        description='Run the Xigt benchmark suite.'
+    )
+    parser.add_argument('--igts', type=int, default=1000,
+        help='the number of IGTs (default: 1000)')
+    parser.add_argument('--shape', choices=SHAPES, default='odin',
+        help='the kind of corpus to generate (default: odin)')
+    parser.add_argument('--words', type=int, nargs=2, default=[2, 8],
+        metavar=('MIN', 'MAX'),
+        help='the number of words per phrase (default: 2 8)')
+    parser.add_argument('--morphemes', type=int, nargs=2, default=[1, 3],
+        metavar=('MIN', 'MAX'),
+        help='the number of morphemes per word (default: 1 3)')
+    parser.add_argument('--tiers', type=int, default=0,
+        help='the number of extra annotation tiers per IGT (default: 0)')
+    parser.add_argument('--items', type=int,
+        help='the exact number of words per phrase (instead of --words)')
+    parser.add_argument('--depth', type=int, default=2,
+        help='the length of reference chains of the extra tiers '
+             '(default: 2)')
+    parser.add_argument('--namespaces', type=int, default=0,
+        help='the number of extra namespaces (default: 0)')
+    parser.add_argument('--seed', type=int, default=0,
+        help='the random seed (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3,
+        help='the number of timing repetitions (default: 3)')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+        help='do not measure peak memory (which needs an extra run)')
+    parser.add_argument('--only', metavar='NAME', nargs='+',
+        help='run only scenarios whose names contain a NAME')
+    parser.add_argument('--list', action='store_true',
+        help='list the scenarios and exit')
+    parser.add_argument('--save', metavar='PATH',
+        help='save the results as JSON to PATH')
+    parser.add_argument('--baseline', metavar='PATH',
+        help='compare with the results saved at PATH')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+        help='the slowdown ratio counted as a regression (default: 0.1)')
+    args = parser.parse_args(arglist)
+    sys.exit(run(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from xigt import aio
+from xigt.codecs import xigtxml, xigtjson
+from xigt.errors import XigtError
+from xigt.generate import generate
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def xc():
+    xc = generate(10, shape='toolbox', mode='full')
+    xc.id = 'c1'
+    return xc
+
+
+def dumps(xc, format):
+    if format == 'xml':
+        return xigtxml.dumps(xc).encode('utf-8')
+    return xigtjson.dumps(xc, indent=2).encode('utf-8')
+
+
+class Stream(object):
+    """A stream with a read() coroutine, like asyncio.StreamReader."""
+
+    def __init__(self, data):
+        self.data = data
+        self.reads = 0
+
+    async def read(self, n):
+        self.reads += 1
+        data, self.data = self.data[:n], self.data[n:]
+        return data
+
+
+async def chunks(data, size):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(aiterable):
+    return [x async for x in aiterable]
+
+
+@pytest.mark.parametrize('format', ['xml', 'json'])
+class TestIterIgts():
+    def test_stream(self, xc, format):
+        data = dumps(xc, format)
+        igts = run(collect(aio.iter_igts(Stream(data), format=format)))
+        assert igts == list(xc)
+        assert igts[0].corpus.id == 'c1'
+        assert igts[0].corpus.nsmap == xc.nsmap
+        assert len(igts[0].corpus) == 0
+
+    @pytest.mark.parametrize('size', [1, 7, 100])
+    def test_chunks(self, xc, format, size):
+        data = dumps(xc, format)
+        stream = aio.iter_igts(chunks(data, size), format=format,
+                               validate=False)
+        assert run(collect(stream)) == list(xc)
+
+    def test_text_chunks(self, xc, format):
+        data = dumps(xc, format).decode('utf-8')
+        assert run(collect(aio.iter_igts(chunks(data, 50),
+                                         format=format))) == list(xc)
+
+    def test_pull(self, xc, format):
+        data = dumps(xc, format)
+        stream = Stream(data)
+
+        async def first():
+            async for igt in aio.iter_igts(stream, format=format,
+                                           chunk_size=100):
+                return igt
+
+        assert run(first()) == xc[0]
+        assert 0 < len(stream.data) < len(data)
+
+    def test_incomplete(self, xc, format):
+        data = dumps(xc, format)
+        with pytest.raises(XigtError):
+            run(collect(aio.iter_igts(Stream(data[:-20]), format=format)))
+
+    def test_load(self, xc, format):
+        data = dumps(xc, format)
+        loaded = run(aio.load(chunks(data, 64), format=format))
+        assert loaded.id == 'c1'
+        assert list(loaded) == list(xc)
+        assert loaded[0].corpus is loaded
+
+
+class TestDecoder():
+    def test_feed(self, xc):
+        data = dumps(xc, 'json')
+        decoder = aio.Decoder(format='json')
+
+        async def receive():
+            async for chunk in chunks(data, 32):
+                await decoder.feed(chunk)
+            await decoder.close()
+
+        async def main():
+            igts, _ = await asyncio.gather(collect(decoder), receive())
+            return igts
+
+        assert run(main()) == list(xc)
+        assert decoder.corpus.id == 'c1'
+
+    def test_backpressure(self, xc):
+        data = dumps(xc, 'xml')
+        decoder = aio.Decoder(max_pending=2)
+        fed = []
+
+        async def receive():
+            for i in range(0, len(data), 64):
+                await decoder.feed(data[i:i + 64])
+                fed.append(i)
+            await decoder.close()
+
+        async def main():
+            task = asyncio.ensure_future(receive())
+            for _ in range(5):
+                await asyncio.sleep(0)
+            # the feeder waits for the pending IGTs to be taken
+            assert not task.done()
+            assert len(decoder._pending) > 2
+            stalled = len(fed)
+            igts = [await decoder.__anext__()]
+            igts.extend(await collect(decoder))
+            await task
+            assert len(fed) > stalled
+            return igts
+
+        assert run(main()) == list(xc)
+
+    def test_error(self, xc):
+        data = dumps(xc, 'xml')
+        decoder = aio.Decoder()
+
+        async def main():
+            await decoder.feed(data[:len(data) // 2])
+            with pytest.raises(XigtError):
+                await decoder.close()
+            with pytest.raises(XigtError):
+                await decoder.feed(data)
+            igts = []
+            with pytest.raises(XigtError):
+                async for igt in decoder:
+                    igts.append(igt)
+            return igts
+
+        igts = run(main())
+        assert 0 < len(igts) < len(xc)
+        assert igts == xc[:len(igts)]
+
+    def test_invalid(self):
+        with pytest.raises(XigtError):
+            aio.Decoder(format='yaml')
+        with pytest.raises(XigtError):
+            aio.Decoder(max_pending=0)
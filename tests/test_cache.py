@@ -0,0 +1,130 @@
+import pytest
+
+from xigt import xigtpath as xp
+from xigt.cache import CachedCorpus
+from xigt.codecs import xigtxml
+from xigt.errors import XigtError
+from xigt.generate import generate
+
+
+@pytest.fixture
+def path(tmpdir):
+    path = str(tmpdir.join('c.xml'))
+    xigtxml.dump(path, generate(20, shape='toolbox', mode='full'))
+    return path
+
+
+@pytest.fixture
+def full(path):
+    return xigtxml.load(path)
+
+
+class TestCachedCorpus():
+    def test_load_mode(self, path, full):
+        with xigtxml.load(path, mode='cached') as xc:
+            assert isinstance(xc, CachedCorpus)
+            assert len(xc) == 20
+            assert xc.ids() == [igt.id for igt in full]
+            assert list(xc) == list(full)
+        with xigtxml.load(path, mode='cached', max_igts=None,
+                          max_bytes=10**9) as xc:
+            assert (xc.max_igts, xc.max_bytes) == (None, 10**9)
+        with pytest.raises(TypeError):
+            xigtxml.load(path, max_igts=5)
+
+    def test_repr_and_bool(self, path, tmpdir):
+        with CachedCorpus(path) as xc:
+            assert 'with 20 Igts' in repr(xc)
+            assert xc
+            assert xc.cache_info().igts == 0
+        empty = str(tmpdir.join('empty.xml'))
+        xigtxml.dump(empty, generate(0, mode='full'))
+        with CachedCorpus(empty) as xc:
+            assert not xc
+
+    def test_corpus_level(self, path, full):
+        with CachedCorpus(path) as xc:
+            assert xc.id == full.id
+            assert xc.attributes == full.attributes
+            assert xc.nsmap == full.nsmap
+            assert list(xc.metadata) == list(full.metadata)
+            assert xc[0].corpus is xc
+            assert xc[0].nsmap == full[0].nsmap
+
+    def test_access(self, path, full):
+        with CachedCorpus(path) as xc:
+            assert xc[3] == full[3]
+            assert xc[-1] == full[-1]
+            assert xc['igt7'] == full['igt7']
+            assert xc[2:5] == full[2:5]
+            assert xc.get('igt100') is None
+            with pytest.raises(IndexError):
+                xc[20]
+            with pytest.raises(KeyError):
+                xc['igt100']
+
+    def test_lru(self, path, full):
+        with CachedCorpus(path, max_igts=3) as xc:
+            a = xc[0]
+            xc[1]
+            xc[2]
+            assert xc[0] is a  # a hit makes igt 0 the most recent
+            xc[3]  # evicts igt 1
+            assert xc.cache_info() == (1, 4, 3, 0)
+            assert xc[0] is a
+            b = xc[1]
+            assert xc.cache_info().misses == 5
+            assert b == full[1]
+            for igt in xc:
+                pass
+            assert xc.cache_info().igts == 3
+            assert xc[0] is not a
+            assert xc[0] == a
+            xc.clear_cache()
+            assert xc.cache_info().igts == 0
+
+    def test_max_bytes(self, path):
+        with CachedCorpus(path, max_igts=None) as xc:
+            assert xc.cache_info().bytes == 0
+            list(xc)
+            assert xc.cache_info().igts == 20
+        with CachedCorpus(path, max_igts=None, max_bytes=1) as xc:
+            list(xc)
+            # the most recently used IGT is kept
+            assert xc.cache_info().igts == 1
+            assert xc.cache_info().bytes == xc[-1].memory_usage()['total']
+        with CachedCorpus(path, max_igts=None, max_bytes=10**9) as xc:
+            list(xc)
+            assert xc.cache_info().igts == 20
+
+    def test_xigtpath(self, path, full):
+        with CachedCorpus(path, max_igts=2) as xc:
+            for query in ('igt/@id', '//tier[@type="glosses"]/@id',
+                          'igt/tier[@id="m"]/item/value()',
+                          '/igt[@id="igt3"]/tier/@type',
+                          'metadata//dc:subject/text()'):
+                assert xp.findall(xc, query) == xp.findall(full, query)
+            assert xp.find(xc[4]['w'], '/igt[@id="igt2"]') == full[1]
+            assert xp.find(xc, '/.') is xc
+            assert xc.cache_info().igts == 2
+
+    def test_dump(self, path, full, tmpdir):
+        with CachedCorpus(path, max_igts=2) as xc:
+            assert xigtxml.dumps(xc) == xigtxml.dumps(full)
+            copy = str(tmpdir.join('copy.xml'))
+            xigtxml.dump(copy, xc)
+            assert xc.cache_info().igts == 2
+        assert xigtxml.load(copy) == full
+
+    def test_open_file(self, path, full):
+        with open(path, 'rb') as fh:
+            xc = CachedCorpus(fh, validate=False)
+            assert xc[5] == full[5]
+            xc.close()
+            assert not fh.closed
+
+    def test_invalid(self, path):
+        with pytest.raises(XigtError):
+            CachedCorpus(path, max_igts=0)
+        with pytest.raises(XigtError):
+            CachedCorpus(path, max_bytes=0)
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from xigt import XigtCorpus, Igt, Tier, Item
+from xigt.errors import XigtError
+from xigt.exporters import columns
+
+xc = XigtCorpus(igts=[
+    Igt(id='i1', tiers=[
+        Tier(id='p', type='phrases', items=[
+            Item(id='p1', text='inu=ga san-biki hoe-ru')
+        ]),
+        Tier(id='w', type='words', segmentation='p', items=[
+            Item(id='w1', segmentation='p1[0:6]'),
+            Item(id='w2', segmentation='p1[7:15]'),
+            Item(id='w3', segmentation='p1[16:22]')
+        ]),
+        Tier(id='m', type='morphemes', segmentation='w', items=[
+            Item(id='m1', segmentation='w1[0:3]'),
+            Item(id='m2', segmentation='w1[4:6]'),
+            Item(id='m3', segmentation='w2[0:3]+w2[4:8]')
+        ]),
+        Tier(id='g', type='glosses', alignment='m', items=[
+            Item(id='g1', alignment='m1', text='dog'),
+            Item(id='g2', alignment='m2', text='NOM'),
+            Item(id='g3', alignment='m3', text='three-CLF')
+        ])
+    ]),
+    Igt(id='i2', tiers=[
+        Tier(id='p', type='phrases', items=[Item(id='p1', text='x')])
+    ])
+])
+
+
+class TestColumns():
+    def test_iter_rows(self):
+        rows = list(columns.iter_rows(xc))
+        assert len(rows) == 11
+        assert rows[0] == ('i1', 'p', 'phrases', 'p1',
+                           'inu=ga san-biki hoe-ru', '')
+        assert rows[5] == ('i1', 'm', 'morphemes', 'm2', 'ga', '')
+        assert rows[9] == ('i1', 'g', 'glosses', 'g3', 'three-CLF', 'm3')
+        assert rows[10] == ('i2', 'p', 'phrases', 'p1', 'x', '')
+        rows = list(columns.iter_rows(
+            xc, fields=('item_id', 'value', 'segmentation'),
+            tier_types=['morphemes']
+        ))
+        assert rows == [('m1', 'inu', 'w1'), ('m2', 'ga', 'w1'),
+                        ('m3', 'sanbiki', 'w2 w2')]
+
+    def test_columns(self):
+        cols = columns.columns(xc, fields=('tier_id', 'text', 'value'))
+        assert sorted(cols) == ['text', 'tier_id', 'value']
+        assert cols['tier_id'] == ['p', 'w', 'w', 'w', 'm', 'm', 'm',
+                                   'g', 'g', 'g', 'p']
+        assert cols['text'][1:4] == [None, None, None]
+        assert cols['value'][1:7] == ['inu=ga', 'san-biki', 'hoe-ru',
+                                      'inu', 'ga', 'sanbiki']
+        assert columns.columns([], fields=('value',)) == {'value': []}
+
+    def test_igt_values(self):
+        igt = xc['i1']
+        value = columns.igt_values(igt)
+        for tier in igt:
+            for item in tier:
+                assert value(item) == item.value()
+
+    def test_export_table(self):
+        config = columns.prepare_config(
+            {'fields': ['item_id', 'value']}, 'out.tsv'
+        )
+        fh = io.StringIO()
+        columns.export_table(xc, fh, config)
+        lines = fh.getvalue().splitlines()
+        assert lines[0] == 'item_id\tvalue'
+        assert lines[1] == 'p1\tinu=ga san-biki hoe-ru'
+        assert len(lines) == 12
+        with pytest.raises(XigtError):
+            columns.prepare_config({'fields': ['item_id', 'bogus']})
@@ -0,0 +1,289 @@
+import gzip
+import random
+
+import pytest
+
+from xigt import compression
+from xigt.cache import CachedCorpus
+from xigt.codecs import xigtxml, xigtjson, xigtbin
+from xigt.compression import BGZFReader, BGZFWriter
+from xigt.errors import XigtError
+from xigt.generate import generate
+from xigt.index import XigtIndex
+from xigt.scripts import xigt_diff, xigt_patch, xigt_sort, xigt_stats
+
+STREAMS = ['gzip', 'bz2', 'xz']
+
+
+@pytest.fixture
+def data():
+    rng = random.Random(1)
+    return b''.join(
+        b'<igt id="i%d">%s</igt>\n' % (i, random_bytes(rng, i % 40))
+        for i in range(10000)
+    )
+
+
+def random_bytes(rng, n):
+    return rng.getrandbits(8 * n).to_bytes(n, 'little')
+
+
+@pytest.fixture
+def xc():
+    return generate(20, shape='odin', mode='full')
+
+
+class TestOpen():
+    @pytest.mark.parametrize('name', STREAMS + ['bgzf'])
+    def test_round_trip(self, tmp_path, data, name):
+        path = str(tmp_path / 'data')
+        with compression.open(path, 'wb', compression=name) as f:
+            f.write(data)
+        assert compression.detect(path) == name
+        with compression.open(path) as f:  # detected
+            assert f.read() == data
+        with open(path, 'rb') as f:
+            assert compression.detect(f) == name
+            assert f.tell() == 0
+
+    @pytest.mark.parametrize('ext,name', [
+        ('.gz', 'gzip'), ('.bgz', 'bgzf'), ('.bz2', 'bz2'),
+        ('.xz', 'xz'), ('.XML', None),
+    ])
+    def test_extension(self, tmp_path, ext, name):
+        path = str(tmp_path / ('corpus' + ext))
+        assert compression.compression_for(path) == name
+        with compression.open(path, 'w', encoding='utf-8') as f:
+            f.write('<xigt-corpus>é</xigt-corpus>')
+        assert compression.detect(path) == name
+        with compression.open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == '<xigt-corpus>é</xigt-corpus>'
+
+    def test_random_access(self, tmp_path, data):
+        for name in STREAMS:
+            path = str(tmp_path / name)
+            with compression.open(path, 'wb', compression=name) as f:
+                f.write(data)
+            with pytest.raises(XigtError):
+                compression.open(path, 'rb', random_access=True)
+        path = str(tmp_path / 'plain')
+        with compression.open(path, 'wb') as f:
+            f.write(data)
+        with compression.open(path, 'rb', random_access=True) as f:
+            assert f.read() == data
+
+    def test_invalid(self, tmp_path):
+        path = str(tmp_path / 'x')
+        with pytest.raises(XigtError):
+            compression.open(path, 'wb', compression='lz4')
+        with pytest.raises(XigtError):
+            compression.open(path, 'r+b')
+        with pytest.raises(XigtError):
+            compression.open(path, 'ab', compression='bgzf')
+
+    def test_zstd(self, tmp_path, data):
+        path = str(tmp_path / 'data.zst')
+        try:
+            compression._zstd()
+        except XigtError:
+            with pytest.raises(XigtError):
+                compression.open(path, 'wb')
+            return
+        with compression.open(path, 'wb') as f:
+            f.write(data)
+        assert compression.detect(path) == 'zstd'
+        with compression.open(path) as f:
+            assert f.read() == data
+
+
+class TestBGZF():
+    def test_gzip_compatible(self, tmp_path, data):
+        path = str(tmp_path / 'data.bgz')
+        with BGZFWriter(path) as f:
+            f.write(data[:100])
+            f.write(data[100:])
+        with gzip.open(path) as f:
+            assert f.read() == data
+        with open(path, 'rb') as f:
+            assert f.read()[-28:] == compression._BGZF_EOF
+
+    def test_blocks(self, tmp_path, data):
+        path = str(tmp_path / 'data.bgz')
+        with BGZFWriter(path) as f:
+            f.write(data)
+        with BGZFReader(path) as f:
+            coffsets, offsets, size = f._get_table()
+        assert size == len(data)
+        assert offsets == list(range(0, len(data),
+                                     compression.BGZF_BLOCK_SIZE))
+
+    def test_incompressible(self, tmp_path):
+        data = random_bytes(random.Random(2), 200000)
+        path = str(tmp_path / 'data.bgz')
+        with BGZFWriter(path, compresslevel=0) as f:
+            f.write(data)
+        with BGZFReader(path) as f:
+            assert f.read() == data
+
+    def test_seek(self, tmp_path, data):
+        path = str(tmp_path / 'data.bgz')
+        with BGZFWriter(path) as f:
+            f.write(data)
+        rng = random.Random(3)
+        with BGZFReader(path) as f:
+            assert f.read(10) == data[:10]
+            assert f.tell() == 10
+            for _ in range(200):
+                pos = rng.randrange(len(data))
+                size = rng.randrange(150000)
+                assert f.seek(pos) == pos
+                assert f.read(size) == data[pos:pos + size]
+                assert f.tell() == min(pos + size, len(data))
+            f.seek(-5, 2)
+            assert f.read() == data[-5:]
+            assert f.read() == b''
+            f.seek(0)
+            f.seek(100, 1)
+            assert f.read(5) == data[100:105]
+
+    def test_invalid(self, tmp_path, data):
+        path = str(tmp_path / 'data.gz')
+        with gzip.open(path, 'wb') as f:
+            f.write(data)
+        with BGZFReader(path) as f:
+            with pytest.raises(XigtError):
+                f.read()
+        path = str(tmp_path / 'data.bgz')
+        with BGZFWriter(path) as f:
+            f.write(data)
+        with open(path, 'rb') as f:
+            truncated = f.read()[:1000]
+        with open(path, 'wb') as f:
+            f.write(truncated)
+        with BGZFReader(path) as f:
+            with pytest.raises(XigtError):
+                f.read()
+
+
+class TestCodecs():
+    @pytest.mark.parametrize('ext', ['.gz', '.bgz', '.bz2', '.xz'])
+    def test_xigtxml(self, tmp_path, xc, ext):
+        path = str(tmp_path / ('c.xml' + ext))
+        xigtxml.dump(path, xc)
+        assert compression.detect(path) == compression.EXTENSIONS[ext]
+        assert xigtxml.load(path) == xc
+        transient = xigtxml.load(path, mode='transient')
+        assert len(transient) == 20
+        assert list(transient) == list(transient) == list(xc)
+        copy = str(tmp_path / ('copy.xml' + ext))
+        xigtxml.dump(copy, xigtxml.load(path, mode='transient'))
+        assert xigtxml.load(copy) == xc
+
+    def test_xigtjson(self, tmp_path, xc):
+        path = str(tmp_path / 'c.json.bz2')
+        plain = str(tmp_path / 'c.json')
+        xigtjson.dump(path, xc)
+        xigtjson.dump(plain, xc)
+        assert compression.detect(path) == 'bz2'
+        assert xigtjson.load(path) == xigtjson.load(plain)
+
+    @pytest.mark.parametrize('ext', ['.gz', '.bgz'])
+    def test_xigtbin(self, tmp_path, xc, ext):
+        path = str(tmp_path / ('c.xbin' + ext))
+        xigtbin.dump(path, xc)
+        assert xigtbin.load(path) == xc
+        assert xigtbin.count_igts(path) == 20
+        assert len(xigtbin.load(path, mode='transient')) == 20
+        if ext == '.bgz':
+            with xigtbin.Reader(path) as r:
+                assert r[7] == xc[7]
+        else:
+            with pytest.raises(XigtError):
+                xigtbin.Reader(path)
+
+    def test_random_access(self, tmp_path, xc):
+        path = str(tmp_path / 'c.xml.bgz')
+        xigtxml.dump(path, xc)
+        assert xigtxml.scan_igts(path).ids == [igt.id for igt in xc]
+        with CachedCorpus(path, max_igts=2) as cached:
+            assert cached[13] == xc[13]
+            assert list(cached) == list(xc)
+        with XigtIndex(str(tmp_path / 'c.idx')) as idx:
+            idx.add(path)
+            assert [igt for _, igt in idx.load_igts(path, [3, 9])] == \
+                [xc[3], xc[9]]
+        gz = str(tmp_path / 'c.xml.gz')
+        xigtxml.dump(gz, xc)
+        with pytest.raises(XigtError):
+            xigtxml.scan_offsets(gz)
+        with pytest.raises(XigtError):
+            xigtxml.load(gz, mode='cached')
+
+
+class TestCommands():
+    def test_commands(self, tmp_path, xc, capsys):
+        old = str(tmp_path / 'old.xml.xz')
+        new = str(tmp_path / 'new.xml.gz')
+        xigtxml.dump(old, xc)
+        changed = generate(20, shape='odin', mode='full')
+        del changed[5]
+        xigtxml.dump(new, changed)
+        patch = str(tmp_path / 'p.xpatch.gz')
+        out = str(tmp_path / 'out.xml.bz2')
+        xigt_diff.main(['-o', patch, old, new])
+        xigt_patch.main(['-o', out, old, patch])
+        assert compression.detect(patch) == 'gzip'
+        assert compression.detect(out) == 'bz2'
+        assert xigtxml.load(out) == changed
+        xigt_stats.main([old])
+        assert 'igts' in capsys.readouterr().out
+        xigt_sort.main(['--in-place', '--igt-key=@id', new])
+        assert compression.detect(new) == 'gzip'
+        assert len(xigtxml.load(new)) == 19
+
+    def test_sort_output(self, tmp_path, xc):
+        # in-place sorting keeps the compression the file has, not the
+        # one its name suggests
+        path = str(tmp_path / 'c.xml')
+        with compression.open(path, 'wb', compression='bz2') as fh:
+            xigtxml.dump(fh, xc)
+        xigt_sort.main(['--in-place', '--igt-key=@id', path])
+        assert compression.detect(path) == 'bz2'
+        plain = str(tmp_path / 'plain.xml.gz')
+        xigtxml.dump(open(plain, 'wb'), xc)
+        xigt_sort.main(['--in-place', '--igt-key=@id', plain])
+        assert compression.detect(plain) is None
+        out = str(tmp_path / 'sorted.xml.xz')
+        xigt_sort.main(['--igt-key=@id', '-o', out, path])
+        assert compression.detect(out) == 'xz'
+        assert xigtxml.load(out) == xigtxml.load(path) == xigtxml.load(plain)
+        with pytest.raises(SystemExit):
+            xigt_sort.main(['--in-place', '-o', out, path])
+
+    def test_exporters(self, tmp_path, xc):
+        from xigt.exporters import columns, latex
+        path = str(tmp_path / 'c.csv.gz')
+        columns.xigt_export(xc, path)
+        assert compression.detect(path) == 'gzip'
+        with compression.open(path, 'r', newline='') as fh:
+            assert fh.readline().startswith('igt_id,')
+        path = str(tmp_path / 'c.tex.bz2')
+        latex.xigt_export(xc, path)
+        with compression.open(path, 'r') as fh:
+            assert '\\begin{document}' in fh.read()
+
+    @pytest.mark.parametrize('name', ['toolbox', 'odin'])
+    def test_importers(self, tmp_path, name):
+        if name == 'toolbox':
+            pytest.importorskip('toolbox')
+            from xigt.importers.toolbox import xigt_import
+        else:
+            pytest.importorskip('odintxt')
+            from xigt.importers.odin import xigt_import
+        infile = str(tmp_path / 'in.txt.gz')
+        with compression.open(infile, 'w') as fh:
+            fh.write('')
+        outfile = str(tmp_path / 'out.xml.gz')
+        xigt_import(infile, outfile, {})
+        assert compression.detect(outfile) == 'gzip'
+        assert len(xigtxml.load(outfile)) == 0
@@ -0,0 +1,149 @@
+from io import StringIO
+
+import pytest
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta
+from xigt.codecs import xigtxml
+from xigt.errors import XigtError
+from xigt import diff
+from xigt.scripts import xigt_diff, xigt_patch
+
+
+def make_igt(id, text='inu=ga san-biki hoe-ru', doc='a'):
+    return Igt(id=id, type='odin', attributes={'doc': doc}, tiers=[
+        Tier(id='p', type='phrases', items=[Item(id='p1', text=text)]),
+        Tier(id='w', type='words', segmentation='p', items=[
+            Item(id='w1', segmentation='p1[0:6]')
+        ])
+    ])
+
+
+def make_corpus(igts, lang='spa'):
+    return XigtCorpus(
+        id='xc1',
+        attributes={'lang': lang},
+        nsmap={'dc': 'http://purl.org/dc/elements/1.1/'},
+        metadata=[Metadata(metas=[Meta(id='md1', text='meta text')])],
+        igts=igts
+    )
+
+
+def ids(igts):
+    return [igt.id for igt in igts]
+
+
+@pytest.fixture
+def old():
+    return make_corpus([make_igt('i1'), make_igt('i2'), make_igt('i3'),
+                        make_igt('i4')])
+
+
+@pytest.fixture
+def new():
+    return make_corpus([make_igt('i0'),
+                        make_igt('i1'),
+                        make_igt('i2', text='inu=ga'),
+                        make_igt('i4'),
+                        make_igt('i5'),
+                        make_igt('i6')],
+                       lang='jpn')
+
+
+class TestDiff():
+    def test_unchanged(self, old):
+        patch = diff.diff(old, make_corpus(list(map(make_igt, ids(old)))))
+        assert len(patch) == 0
+        assert patch.header.attributes == {'lang': 'spa'}
+
+    def test_diff(self, old, new):
+        patch = diff.diff(old, new)
+        assert [(after, igt.id) for after, igt in patch.added] == [
+            (None, 'i0'), ('i4', 'i5'), ('i5', 'i6')
+        ]
+        assert list(patch.changed) == ['i2']
+        assert patch.changed['i2'][0] == old['i2'].fingerprint
+        assert patch.changed['i2'][1] is new['i2']
+        assert patch.removed == {'i3': old['i3'].fingerprint}
+        assert patch.header.attributes == {'lang': 'jpn'}
+        assert patch.header.metadata[0][0].text == 'meta text'
+        assert new.metadata[0]._parent is new  # not moved to the header
+
+    def test_moved(self, old):
+        new = make_corpus([make_igt('i4'), make_igt('i1'), make_igt('i2'),
+                           make_igt('i3')])
+        patch = diff.diff(old, new)
+        assert [(after, igt.id) for after, igt in patch.added] == [
+            ('i4', 'i1'), ('i1', 'i2'), ('i2', 'i3')
+        ]
+        assert list(patch.removed) == ['i1', 'i2', 'i3']
+        assert ids(diff.apply(old, patch)) == ['i4', 'i1', 'i2', 'i3']
+
+    def test_ids_required(self, old):
+        with pytest.raises(XigtError):
+            diff.diff(old, XigtCorpus(igts=[Igt()]))
+        with pytest.raises(XigtError):
+            diff.diff(old, XigtCorpus(mode='transient',
+                                      igts=iter([Igt(id='i1'),
+                                                 Igt(id='i1')])))
+
+    def test_apply(self, old, new):
+        patch = diff.diff(old, new)
+        xc = diff.apply(old, patch)
+        assert xc.mode == 'transient'
+        assert xc.attributes == {'lang': 'jpn'}
+        assert xc.nsmap == new.nsmap
+        igts = list(xc)
+        assert ids(igts) == ids(new)
+        assert all(a == b for a, b in zip(igts, new))
+        assert igts[1] is old['i1']
+
+    def test_apply_mismatch(self, old, new):
+        patch = diff.diff(old, new)
+        old['i2'].attributes['doc'] = 'b'
+        with pytest.raises(XigtError):
+            list(diff.apply(old, patch))
+        patch = diff.diff(old, new)
+        with pytest.raises(XigtError):
+            list(diff.apply(XigtCorpus(igts=[make_igt('i1')]), patch))
+
+    def test_serialization(self, old, new):
+        data = diff.dumps(diff.diff(old, new))
+        patch = diff.loads(data)
+        assert [(after, igt.id) for after, igt in patch.added] == [
+            (None, 'i0'), ('i4', 'i5'), ('i5', 'i6')
+        ]
+        assert patch.changed['i2'][1] == new['i2']
+        assert patch.removed == {'i3': old['i3'].fingerprint}
+        assert patch.header.id == 'xc1'
+        assert patch.header.attributes == {'lang': 'jpn'}
+        assert patch.header.nsmap == new.nsmap
+        assert list(diff.apply(old, patch)) == list(new)
+        with pytest.raises(XigtError):
+            diff.loads(b'not a patch')
+        with pytest.raises(XigtError):
+            diff.loads(data[:-5])
+
+    def test_streaming(self, old, new):
+        old_xml = xigtxml.dumps(old)
+        new_xml = xigtxml.dumps(new)
+        patch = diff.diff(
+            xigtxml.load(StringIO(old_xml), mode='transient'),
+            xigtxml.load(StringIO(new_xml), mode='transient')
+        )
+        out = StringIO()
+        xigtxml.dump(out, diff.apply(
+            xigtxml.load(StringIO(old_xml), mode='transient'), patch
+        ), encoding='unicode')
+        assert out.getvalue() == new_xml
+
+    def test_commands(self, tmp_path, old, new):
+        old_path = str(tmp_path / 'old.xml')
+        new_path = str(tmp_path / 'new.xml')
+        patch_path = str(tmp_path / 'old-new.xpatch')
+        out_path = str(tmp_path / 'out.xml')
+        xigtxml.dump(old_path, old)
+        xigtxml.dump(new_path, new)
+        xigt_diff.main(['-o', patch_path, old_path, new_path])
+        xigt_patch.main(['-o', out_path, old_path, patch_path])
+        with open(out_path) as out, open(new_path) as expected:
+            assert out.read() == expected.read()
@@ -0,0 +1,163 @@
+import pytest
+
+from xigt import ref, xigtpath as xp
+from xigt.consts import TRANSIENT
+from xigt.errors import XigtError
+from xigt.codecs import xigtxml, xigtjson, xigtbin
+from xigt.generate import generate, generate_igt, language
+from xigt.scripts import xigt_generate
+
+
+def fingerprints(xc):
+    return [igt.fingerprint for igt in xc]
+
+
+class TestGenerate():
+    def test_deterministic(self):
+        for shape in ('odin', 'toolbox'):
+            a = fingerprints(generate(20, shape=shape, seed=3))
+            b = fingerprints(generate(20, shape=shape, seed=3))
+            assert a == b
+            assert a != fingerprints(generate(20, shape=shape, seed=4))
+            # a smaller corpus is a prefix of a larger one
+            assert fingerprints(generate(5, shape=shape, seed=3)) == a[:5]
+            assert generate_igt(7, shape=shape, seed=3).fingerprint == a[7]
+
+    def test_streaming(self):
+        xc = generate(10)
+        assert xc.mode == TRANSIENT
+        assert [igt.id for igt in xc] == ['igt{}'.format(i) for i in
+                                          range(1, 11)]
+        # the IGTs are made again for each iteration
+        assert len(xc) == 10
+        assert fingerprints(xc) == fingerprints(xc)
+
+    def test_odin(self):
+        xc = generate(12, shape='odin', mode='full')
+        igt = xc[0]
+        assert igt.id == 'igt1'
+        assert [t.id for t in igt] == ['r', 'c', 'n', 'p', 'w', 'm', 'g', 't']
+        assert igt.get_attribute('doc-id') == '0'
+        assert xc[11].get_attribute('doc-id') == '1'
+        assert igt['p']['p1'].value() == igt['n']['n1'].value()
+        words = xp.findall(igt, 'tier[@type="words"]/item/value()')
+        assert ' '.join(words) == igt['p']['p1'].value()
+        morphs = xp.findall(igt, 'tier[@type="morphemes"]/item/value()')
+        glosses = xp.findall(igt, 'tier[@type="glosses"]/item/value()')
+        assert len(morphs) == len(glosses) >= len(words)
+        assert '-'.join(glosses) == igt['n']['n2'].value().replace(' ', '-')
+        codes = [language(n)[0] for n in range(10)]
+        assert xp.find(igt, 'metadata//dc:subject/@olac:code') in codes
+        # the IGTs of a document share a language
+        assert len(set(
+            xp.find(igt, 'metadata//dc:subject/@olac:code') for igt in xc[:10]
+        )) == 1
+
+    def test_toolbox(self):
+        xc = generate(5, shape='toolbox', mode='full')
+        igt = xc[0]
+        assert [t.id for t in igt] == ['p', 'w', 'm', 'g', 'pos', 't']
+        assert igt.get_attribute('corpus-id') == 'ref000001'
+        for item in igt['w']:
+            assert item.text == ref.resolve(igt, item.segmentation)
+        for item in igt['m']:
+            assert item.text.lstrip('-') == ref.resolve(igt,
+                                                        item.segmentation)
+        assert len(igt['m']) == len(igt['g']) == len(igt['pos'])
+        assert igt['t']['t1'].alignment == 'p1'
+        assert xp.find(xc, 'metadata//dc:subject/@olac:code').startswith('q')
+
+    def test_structure_options(self):
+        xc = generate(10, shape='toolbox', words=(3, 3), morphemes=(2, 2),
+                      mode='full')
+        for igt in xc:
+            assert len(igt['w']) == 3
+            assert len(igt['m']) == 6
+        xc = generate(30, languages=1, mode='full')
+        assert set(xp.find(igt, 'metadata//dc:subject/@olac:code')
+                   for igt in xc) == {'qaa'}
+
+    def test_extra_structure(self):
+        for shape in ('odin', 'toolbox'):
+            plain = generate(4, shape=shape, mode='full')
+            xc = generate(4, shape=shape, tiers=5, depth=2, namespaces=2,
+                          mode='full')
+            assert xc.nsmap['ns1'] == 'http://example.org/ns1'
+            for igt, base in zip(xc, plain):
+                assert igt[:len(base)] == base[:]
+                extra = igt[len(base):]
+                assert [t.id for t in extra] == ['x1', 'x2', 'x3', 'x4', 'x5']
+                assert [t.type for t in extra] == [
+                    'annotations', 'tags', 'annotations-2', 'tags-2',
+                    'annotations-3'
+                ]
+                assert [t.alignment for t in extra] == [
+                    'm', 'x1', 'm', 'x3', 'm'
+                ]
+                assert all(len(t) == len(igt['m']) for t in extra)
+                assert ref.resolve(igt, igt['x2'][0].alignment) == \
+                    igt['x1'][0].text
+                assert igt.get_attribute('{http://example.org/ns0}attr')
+                assert extra[0].get_attribute('{http://example.org/ns1}attr')
+            assert xigtxml.loads(xigtxml.dumps(xc)) == xc
+        xc = generate(3, tiers=3, depth=3, items=4, mode='full')
+        assert [t.type for t in xc[0][-3:]] == ['annotations', 'tags',
+                                                'notes']
+        assert all(len(igt['w']) == 4 for igt in xc)
+
+    def test_invalid(self):
+        with pytest.raises(XigtError):
+            generate(1, shape='elan')
+        for options in ({'tiers': -1}, {'depth': 0}, {'namespaces': -1},
+                        {'items': 0}):
+            with pytest.raises(XigtError):
+                generate_igt(0, **options)
+        with pytest.raises(XigtError):
+            language(520)
+
+    def test_round_trip(self):
+        for shape in ('odin', 'toolbox'):
+            xc = generate(10, shape=shape, mode='full')
+            assert xigtxml.loads(xigtxml.dumps(xc)) == xc
+            # the JSON codec keeps the prefixes of metadata attributes,
+            # which are expanded again when read as XML
+            assert xigtxml.loads(xigtxml.dumps(
+                xigtjson.loads(xigtjson.dumps(xc)))) == xc
+            assert xigtbin.loads(xigtbin.dumps(xc)) == xc
+
+
+class TestGenerateCommand():
+    @pytest.mark.parametrize('fmt', ['xml', 'json', 'bin'])
+    def test_formats(self, tmpdir, fmt):
+        out = str(tmpdir.join('out.' + fmt))
+        xigt_generate.main(['-n', '15', '--shape', 'toolbox', '--seed', '2',
+                            '--words', '4-6', '-f', fmt, '-o', out])
+        codec = {'xml': xigtxml, 'json': xigtjson, 'bin': xigtbin}[fmt]
+        xc = codec.load(out)
+        expected = generate(15, shape='toolbox', seed=2, words=(4, 6),
+                            mode='full')
+        if fmt == 'json':
+            xc = xigtxml.loads(xigtxml.dumps(xc))  # see test_round_trip
+        assert xc == expected
+
+    def test_streamed_output_matches_full_dump(self, tmpdir):
+        xml_out = str(tmpdir.join('out.xml'))
+        json_out = str(tmpdir.join('out.json'))
+        xigt_generate.main(['-n', '8', '-o', xml_out])
+        xigt_generate.main(['-n', '8', '-f', 'json', '-o', json_out])
+        xc = generate(8, mode='full')
+        assert open(xml_out).read() == xigtxml.dumps(xc)
+        assert open(json_out).read() == xigtjson.dumps(xc)
+
+    def test_structure_options(self, tmpdir):
+        out = str(tmpdir.join('out.xml'))
+        xigt_generate.main(['-n', '5', '--tiers', '3', '--items', '4',
+                            '--depth', '3', '--namespaces', '1', '-o', out])
+        assert xigtxml.load(out) == generate(5, tiers=3, items=4, depth=3,
+                                             namespaces=1, mode='full')
+
+    def test_invalid_range(self):
+        with pytest.raises(SystemExit):
+            xigt_generate.main(['--words', '5-2'])
+        with pytest.raises(SystemExit):
+            xigt_generate.main(['--depth', '0'])
@@ -0,0 +1,141 @@
+import os
+
+import pytest
+
+from xigt import xigtpath as xp
+from xigt.codecs import xigtxml
+from xigt.index import XigtIndex, XigtIndexError
+from xigt.scripts import xigt_query
+
+corpus = '''<?xml version="1.0" encoding="utf-8"?>
+<xigt-corpus xmlns:dc="http://purl.org/dc/elements/1.1/">
+  <igt id="i1" doc-id="1">
+    <metadata>
+      <meta id="m1" type="language" iso-639-3="spa"/>
+    </metadata>
+    <tier id="p" type="phrases">
+      <item id="p1">El perro corre.</item>
+    </tier>
+    <tier id="w" type="words" segmentation="p">
+      <item id="w1" segmentation="p1[0:2]"/>
+      <item id="w2" segmentation="p1[3:8]"/>
+    </tier>
+  </igt>
+  <igt id="i2" doc-id="2" dc:subject="cat">
+    <tier id="p" type="phrases">
+      <item id="p1">La gata duerme.</item>
+    </tier>
+  </igt>
+  <igt id="i3" doc-id="1"/>
+</xigt-corpus>
+'''
+
+@pytest.fixture
+def corpus_file(tmp_path):
+    path = tmp_path / 'corpus.xml'
+    path.write_text(corpus, encoding='utf-8')
+    return str(path)
+
+@pytest.fixture
+def index(tmp_path, corpus_file):
+    idx = XigtIndex(str(tmp_path / 'corpus.idx'))
+    idx.add(corpus_file)
+    yield idx
+    idx.close()
+
+
+def ids(objs):
+    return [obj.id for obj in objs]
+
+
+class TestXigtIndex():
+    def test_files(self, index, corpus_file):
+        assert index.files() == [os.path.abspath(corpus_file)]
+        assert index.is_current(corpus_file)
+        assert index.update(corpus_file) is False
+        index.remove(corpus_file)
+        assert index.files() == []
+        assert not index.is_current(corpus_file)
+        assert not index.can_plan(corpus_file, 'igt[@doc-id="1"]')
+        assert index.update(corpus_file) is True
+
+    def test_load_igts(self, index, corpus_file):
+        assert [(i, igt.id) for i, igt in index.load_igts(corpus_file)] == [
+            (0, 'i1'), (1, 'i2'), (2, 'i3')
+        ]
+        igts = [igt for _, igt in index.load_igts(corpus_file, [1])]
+        assert ids(igts) == ['i2']
+        assert igts[0]['p']['p1'].value() == 'La gata duerme.'
+        assert igts[0].get_attribute('dc:subject') == 'cat'
+
+    def test_findall(self, index, corpus_file):
+        xc = xigtxml.load(corpus_file)
+        for path in ('igt',
+                     'igt[@doc-id="1"]',
+                     '/igt[@doc-id="1"]/tier',
+                     '//igt[@dc:subject="cat"]//item',
+                     'igt[tier/@type="words"]/tier/@id',
+                     'igt[tier/@id="w"][@doc-id="2"]',
+                     'igt[metadata/meta/@iso-639-3="spa"]/@id',
+                     'igt/tier[@type="phrases"]/item/value()',
+                     'igt[@doc-id!="1"]',
+                     'tier'):
+            expected = xp.findall(xc, path)
+            results = index.findall(corpus_file, path)
+            if expected and not isinstance(expected[0], str):
+                expected, results = ids(expected), ids(results)
+            assert results == expected, path
+        assert index.find(corpus_file, 'igt[@doc-id="2"]').id == 'i2'
+        assert index.find(corpus_file, 'igt[@doc-id="3"]') is None
+        assert index.can_plan(corpus_file, 'igt[@doc-id="1"]/tier')
+        assert not index.can_plan(corpus_file, 'tier')
+
+    def test_stale(self, index, corpus_file):
+        with open(corpus_file, 'a') as f:
+            f.write('\n')
+        os.utime(corpus_file, (0, 0))
+        assert not index.is_current(corpus_file)
+        assert not index.can_plan(corpus_file, 'igt[@doc-id="1"]')
+        # queries fall back to decoding the file
+        assert ids(index.findall(corpus_file, 'igt[@doc-id="1"]')) == [
+            'i1', 'i3'
+        ]
+        with pytest.raises(XigtIndexError):
+            list(index.load_igts(corpus_file))
+        assert index.update(corpus_file) is True
+        assert ids(index.findall(corpus_file, 'igt[@doc-id="1"]')) == [
+            'i1', 'i3'
+        ]
+
+    def test_key_values(self, index, corpus_file):
+        assert index.key_values(corpus_file, '@doc-id') == ['1', '2', '1']
+        assert index.key_values(corpus_file, '@id') == ['i1', 'i2', 'i3']
+        assert index.key_values(corpus_file, '@dc:subject') == [
+            None, 'cat', None
+        ]
+        assert index.key_values(corpus_file, 'tier/@type') == [
+            'phrases', 'phrases', None
+        ]
+
+    def test_query_decodes_once(self, index, corpus_file, monkeypatch,
+                                capsys):
+        loaded = []
+        _load = xigtxml.load
+
+        def load(f, **kwargs):
+            if isinstance(f, str):
+                loaded.append(f)
+            return _load(f, **kwargs)
+
+        monkeypatch.setattr(xigt_query.xigtxml, 'load', load)
+        index.close()
+        xigt_query.main([
+            '--index', index.path, '--count', 'igt[@doc-id="1"]',
+            '--count', '//tier', '--count', '//item', corpus_file
+        ])
+        # the two queries the index cannot plan share one decoding
+        assert loaded == [corpus_file]
+        out = capsys.readouterr().out
+        assert '2\tigt[@doc-id="1"]' in out
+        assert '3\t//tier' in out
+        assert '4\t//item' in out
@@ -0,0 +1,102 @@
+import re
+
+import pytest
+
+from xigt.exporters import latex
+from xigt.exporters.util import Substitutions, sub
+
+
+def old_escape(s):
+    # the escaping before it was done in one pass
+    for c, r in latex.LATEX_CHARMAP:
+        s = s.replace(c, r)
+    return s
+
+
+def old_sub(s, tier_type, subs):
+    # the substitutions before they were compiled
+    for tier_regex, patterns in subs:
+        if not re.match(tier_regex, tier_type):
+            continue
+        for regex, sub_pattern in patterns:
+            if isinstance(sub_pattern, str):
+                s = re.sub(regex, sub_pattern, s)
+            elif len(sub_pattern) == 2:
+                f = eval('lambda {}: {}'.format(*sub_pattern))
+                s = re.sub(regex, f, s)
+    return s
+
+
+class TestEscape():
+    @pytest.mark.parametrize('c,r', latex.LATEX_CHARMAP)
+    def test_special_characters(self, c, r):
+        assert latex.escape(c) == r
+        assert latex.escape('a{}b'.format(c)) == 'a{}b'.format(r)
+        assert latex.escape(c * 2) == r * 2
+
+    def test_no_special_characters(self):
+        assert latex.escape('') == ''
+        assert latex.escape('inu=ga san-biki') == 'inu=ga san-biki'
+
+    def test_overlapping(self):
+        # replacements contain other special characters, which are not
+        # escaped again
+        assert latex.escape('\\{') == '\\textbackslash\\{'
+        assert latex.escape('{\\}') == '\\{\\textbackslash\\}'
+        assert latex.escape('\\\\') == '\\textbackslash\\textbackslash'
+        assert latex.escape('~^') == '\\textasciitilde\\textasciicircum'
+        assert latex.escape('\\textbackslash') == '\\textbackslashtextbackslash'
+
+    def test_same_as_sequential(self):
+        specials = ''.join(c for c, _ in latex.LATEX_CHARMAP)
+        strings = [
+            specials,
+            specials[::-1],
+            ' '.join(specials),
+            'a_1 & b_2 {x} 50% $5 #3 ~y^2 \\n',
+            '\\&\\%\\$\\#\\_\\{\\}',
+        ]
+        for s in strings:
+            assert latex.escape(s) == old_escape(s)
+
+
+class TestSubstitutions():
+    subs = [
+        ('words|morphemes', [
+            ('-', '=-'),
+            ('=', '[=]'),  # matches the output of the rule before
+            (r'(\d)', ('m', 'm.group(1) * 2')),
+        ]),
+        ('words', [
+            ('\\[', '('),
+        ]),
+        ('glosses', [
+            ('NOM', r'\\textsc{nom}'),
+        ]),
+    ]
+
+    def test_in_order(self):
+        subs = Substitutions(self.subs)
+        assert subs('a-b1', 'words') == 'a(=]-b11'
+        assert subs('a-b1', 'morphemes') == 'a[=]-b11'
+        assert subs('NOM-1', 'glosses') == '\\textsc{nom}-1'
+        assert subs('a-b1', 'phrases') == 'a-b1'
+
+    def test_rules_by_tier_type(self):
+        subs = Substitutions(self.subs)
+        assert len(subs.rules('words')) == 4
+        assert len(subs.rules('morphemes')) == 3
+        assert subs.rules('phrases') == []
+        assert subs.rules('words') is subs.rules('words')
+        assert Substitutions(subs).rules('words') is subs.rules('words')
+        assert not Substitutions(None)
+        assert Substitutions(self.subs)
+
+    def test_same_as_uncompiled(self):
+        strings = ['', 'a-b1', 'NOM-1=2', '[x]-[y]', '1-2-3']
+        subs = Substitutions(self.subs)
+        for tier_type in ('words', 'morphemes', 'glosses', 'phrases'):
+            for s in strings:
+                expected = old_sub(s, tier_type, self.subs)
+                assert subs(s, tier_type) == expected
+                assert sub(s, tier_type, self.subs) == expected
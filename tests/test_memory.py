@@ -0,0 +1,105 @@
+import gc
+from io import StringIO
+
+import pytest
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta
+from xigt.codecs import xigtxml
+from xigt.generate import generate
+from xigt.memory import COMPONENTS, memory_usage
+from xigt.scripts import xigt_stats
+
+
+@pytest.fixture
+def xc():
+    return generate(5, mode='full')
+
+
+class TestMemoryUsage():
+    def test_components(self, xc):
+        usage = xc.memory_usage()
+        assert list(usage) == list(COMPONENTS) + ['total']
+        assert usage['total'] == sum(usage[name] for name in COMPONENTS)
+        for name in ('objects', 'attributes', 'text', 'metadata', 'indices'):
+            assert usage[name] > 0
+
+    def test_breakdown(self):
+        item = Item(id='a1', text='text')
+        text = Item(id='a1', text='text' * 100)
+        assert (memory_usage(text)['text'] - memory_usage(item)['text']
+                == 396)
+        attrs = Item(id='a1', text='text', attributes={'x': 'y' * 100})
+        assert (memory_usage(attrs)['attributes']
+                >= memory_usage(item)['attributes'] + 100)
+        igt = Igt(id='i1', tiers=[Tier(id='a', items=[Item(id='a1')])])
+        with_md = Igt(id='i1', tiers=[Tier(id='a', items=[Item(id='a1')])],
+                      metadata=[Metadata(metas=[Meta(text='x' * 100)])])
+        assert (memory_usage(with_md)['metadata']
+                > memory_usage(igt)['metadata'] + 100)
+        assert memory_usage(igt)['objects'] == memory_usage(with_md)['objects']
+
+    def test_reference_caches(self, xc):
+        igt = generate(1, mode='full')[0]
+        before = igt.memory_usage()
+        igt.referents('w1')  # builds the caches
+        igt.reference_graph('segmentation')
+        after = igt.memory_usage()
+        assert after['reference_caches'] > before['reference_caches']
+        assert after['objects'] == before['objects']
+
+    def test_shared_values_counted_once(self, xc):
+        igts = sum(igt.memory_usage()['total'] for igt in xc)
+        total = xc.memory_usage()['total']
+        assert total <= igts
+        assert total > max(igt.memory_usage()['total'] for igt in xc)
+
+    def test_instance_dicts_not_created(self, xc):
+        item = xc[0]['w'][0]
+        referents = len(gc.get_referents(item))
+        xc.memory_usage()
+        assert len(gc.get_referents(item)) == referents
+        assert memory_usage(item) == memory_usage(item)
+
+    def test_unloaded_igts(self, xc):
+        s = xigtxml.dumps(xc)
+        transient = xigtxml.load(StringIO(s), mode='transient')
+        loaded = transient.memory_usage()
+        assert len(list(transient)) == 5  # not consumed
+        incremental = xigtxml.load(StringIO(s), mode='incremental')
+        assert incremental.memory_usage() == loaded
+        next(iter(incremental))
+        assert incremental.memory_usage()['total'] > loaded['total']
+
+    def test_metadata_properties_not_used(self, recwarn):
+        memory_usage(Metadata(metas=[Meta(text='x')]))
+        assert len(recwarn) == 0
+
+    def test_empty(self):
+        usage = XigtCorpus().memory_usage()
+        assert usage['text'] == usage['reference_caches'] == 0
+        assert usage['total'] > 0
+
+
+class TestStatsCommand():
+    def test_stats(self, tmpdir, xc, capsys):
+        path = str(tmpdir.join('c.xml'))
+        xigtxml.dump(path, xc)
+        xigt_stats.main([path])
+        out = capsys.readouterr().out
+        assert 'igts' in out and 'memory' not in out
+        stats = xigt_stats.corpus_stats(path)
+        assert stats['igts'] == 5
+        assert stats['tiers'] == sum(len(igt) for igt in xc)
+        assert stats['items'] == sum(len(t) for igt in xc for t in igt)
+
+    def test_memory(self, tmpdir, xc, capsys):
+        path = str(tmpdir.join('c.xml'))
+        xigtxml.dump(path, xc)
+        xigt_stats.main(['--memory', path])
+        out = capsys.readouterr().out
+        for name in COMPONENTS:
+            assert name in out
+        stats = xigt_stats.corpus_stats(path, memory=True)
+        total, maximum = stats['memory']['total']
+        assert 0 < maximum < total
+        assert total == sum(stats['memory'][name][0] for name in COMPONENTS)
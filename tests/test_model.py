@@ -1,6 +1,10 @@
+import copy
+import pickle
+
 import pytest
 
 from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt.model import IgtSource
 from xigt.errors import XigtError, XigtStructureError
 
 class TestMetadata():
@@ -493,6 +497,62 @@ class TestItem():
 
         assert self.i_ac.get_attribute('alignment') == 'i2'
 
+    def test_nsmap(self):
+        x, y = 'http://example.org/x', 'http://example.org/y'
+        i = Item(id='i1', attributes={'{%s}a' % x: 'xa', '{%s}a' % y: 'ya'})
+        assert i.nsmap == {}
+        t = Tier(id='t', items=[i])
+        igt = Igt(id='igt1', tiers=[t])
+        xc1 = XigtCorpus(igts=[igt], nsmap={'p': x})
+        assert i.nsmap == {'p': x}
+        assert i.get_attribute('p:a') == 'xa'
+        # replacing an ancestor's nsmap
+        xc1.nsmap = {'p': y}
+        assert i.get_attribute('p:a') == 'ya'
+        # modifying it in place
+        xc1.nsmap['q'] = x
+        assert i.get_attribute('q:a') == 'xa'
+        # setting an nsmap in between
+        t.nsmap = {'p': x}
+        assert i.get_attribute('p:a') == 'xa'
+        t.nsmap = None
+        assert i.get_attribute('p:a') == 'ya'
+        # re-parenting an ancestor
+        xc1.remove(igt)
+        xc2 = XigtCorpus(igts=[igt], nsmap={'p': x})
+        assert i.get_attribute('p:a') == 'xa'
+        igt2 = Igt(id='igt1', nsmap={'p': y})
+        xc2[0] = igt2
+        igt2.append(t)
+        assert i.get_attribute('p:a') == 'ya'
+
+    def test_nsmap_cache_scope(self):
+        x, y = 'http://example.org/x', 'http://example.org/y'
+        i = Item(id='i1')
+        t = Tier(id='t', items=[i])
+        assert i.nsmap == {}  # cached with the tier as parent
+        meta = Meta(id='m1')
+        igt = Igt(id='igt1', tiers=[t], metadata=[Metadata(metas=[meta])])
+        xc = XigtCorpus(igts=[igt], nsmap={'p': x})
+        assert i.nsmap == meta.nsmap == {'p': x}
+        # adding other objects leaves the cached maps alone
+        cache = i._nsmap_cache
+        xc.append(Igt(id='igt2', tiers=[Tier(id='t', items=[Item()])]))
+        xc[1][0].nsmap = {'p': y}
+        assert i._nsmap_cache is cache
+        # replacing a map clears those that inherit it, metadata included
+        igt.nsmap = {'p': y}
+        assert i._nsmap_cache is None
+        assert i.nsmap == meta.nsmap == {'p': y}
+        # descendants with their own maps are not affected
+        t.nsmap = {'p': x}
+        assert i.nsmap == {'p': x}
+        cache = i._nsmap_cache
+        igt.nsmap = None
+        assert i._nsmap_cache is cache
+        t.nsmap = None
+        assert i.nsmap == meta.nsmap == {'p': x}
+
 
 class TestTier():
     t1 = Tier()
@@ -597,6 +657,30 @@ class TestTier():
         assert len(t) == 0
         with pytest.raises(KeyError): t['a2']
 
+    def test_slices(self):
+        t = Tier(items=[Item(id='a1'), Item(id='a2'), Item(id='a3')])
+        new = [Item(id='b1'), Item(id='b2')]
+        t[1:2] = new
+        assert [i.id for i in t] == ['a1', 'b1', 'b2', 'a3']
+        assert t['b2'] is new[1] and new[1].tier is t
+        with pytest.raises(KeyError): t['a2']
+        with pytest.raises(XigtError): t[0:1] = [Item(id='a3')]
+        with pytest.raises(ValueError): t[::2] = [Item(id='c1')]
+        with pytest.raises(XigtStructureError): t[0:1] = [Tier()]
+        assert [i.id for i in t] == ['a1', 'b1', 'b2', 'a3']
+        assert t['a1'] is t[0]
+        del t[:2]
+        assert [i.id for i in t] == ['b2', 'a3']
+        with pytest.raises(KeyError): t['b1']
+        assert t.pop(0).id == 'b2'
+        with pytest.raises(KeyError): t['b2']
+        t += [Item(id='c1')]
+        assert t['c1'].tier is t
+        with pytest.raises(XigtStructureError): t *= 2
+        t *= 0
+        assert len(t) == 0
+        with pytest.raises(KeyError): t['a3']
+
     def test_get(self):
         assert self.t1.get(0) is None
         assert self.t1.get('t') is None
@@ -789,6 +873,47 @@ class TestIgt():
         assert self.i2.get_any('a1').id == 'a1'
         assert self.i2.get_any('b2').id == 'b2'
 
+    def test_reference_graph(self):
+        igt = Igt(tiers=[
+            Tier(id='a', items=[Item(id='a1')]),
+            Tier(id='b', alignment='a', items=[Item(id='b1', alignment='a1')])
+        ])
+        assert igt.reference_graph('alignment') == (
+            {'b1': ['a1']}, {'a1': ['b1']}
+        )
+        assert igt.reference_graph('alignment', tiers=True) == (
+            {'b': ['a']}, {'a': ['b']}
+        )
+        assert igt.reference_graph('segmentation') == ({}, {})
+        # graphs are cached until something in the Igt changes
+        graph = igt.reference_graph('alignment')
+        assert igt.reference_graph('alignment') is graph
+        igt['b'].append(Item(id='b2', alignment='a1'))
+        assert igt.reference_graph('alignment')[1] == {'a1': ['b1', 'b2']}
+        igt['b']['b1'].alignment = 'a2'
+        assert igt.reference_graph('alignment')[1] == {
+            'a1': ['b2'], 'a2': ['b1']
+        }
+        igt['b']['b2'].attributes.pop('alignment')
+        assert igt.reference_graph('alignment')[0] == {'b1': ['a2']}
+        igt.append(Tier(id='c', alignment='a'))
+        assert igt.reference_graph('alignment', tiers=True)[1] == {
+            'a': ['b', 'c']
+        }
+        igt['c'].attributes['alignment'] = 'b'
+        assert igt.reference_graph('alignment', tiers=True)[1] == {
+            'a': ['b'], 'b': ['c']
+        }
+        igt.remove(igt['c'])
+        assert igt.reference_graph('alignment', tiers=True)[1] == {
+            'a': ['b']
+        }
+        # as are the referent and referrer indices
+        assert igt.referrers('a2') == {'alignment': ['b1']}
+        igt['b']['b2'].alignment = 'a2'
+        assert igt.referrers('a2') == {'alignment': ['b1', 'b2']}
+        assert igt.referents('b2')['alignment'] == ['a2']
+
     def test_append(self):
         igt = Igt()
         with pytest.raises(XigtStructureError): igt.append(Item())
@@ -857,6 +982,200 @@ class TestIgt():
         assert igt.get_attribute('three', inherit=True) == 3
         assert igt.get_attribute('three', default=4) == 4
 
+    def test_unchecked(self):
+        attrs = {'attr': 'val'}
+        igt = Igt.unchecked(
+            id='i1', type='basic', attributes=attrs,
+            metadata=[Metadata(type='meta', metas=[Meta(text='meta')])],
+            tiers=[
+                Tier.unchecked(id='p', items=[
+                    Item.unchecked(id='p1', text='ab')
+                ]),
+                Tier.unchecked(id='w', attributes={'segmentation': 'p'},
+                               items=[Item.unchecked(
+                                   id='w1', attributes={
+                                       'segmentation': 'p1[0:1]'})])
+            ]
+        )
+        assert igt.attributes == attrs
+        assert igt.metadata[0]._parent is igt
+        assert igt['w'].igt is igt
+        assert igt['w'].segmentation == 'p'
+        assert igt['w']['w1'].tier is igt['w']
+        assert igt['w']['w1'].value() == 'a'
+        assert igt.get_item('p1') is igt['p']['p1']
+        assert igt.nsmap == {}
+        # referent and referrer indices are built on first use
+        assert igt.referents('w1') == {
+            'alignment': [], 'content': [], 'segmentation': ['p1']
+        }
+        assert igt.referrers('p1') == {'segmentation': ['w1']}
+        assert igt == Igt(
+            id='i1', type='basic', attributes={'attr': 'val'},
+            metadata=[Metadata(type='meta', metas=[Meta(text='meta')])],
+            tiers=[Tier(id='p', items=[Item(id='p1', text='ab')]),
+                   Tier(id='w', segmentation='p', items=[
+                       Item(id='w1', segmentation='p1[0:1]')])]
+        )
+        xc = XigtCorpus(igts=[igt])
+        assert igt.corpus is xc
+
+    def test_fingerprint(self):
+        def make():
+            return Igt(id='i1', attributes={'a': '1', 'b': '2'}, tiers=[
+                Tier(id='p', items=[Item(id='p1', text='ab')]),
+                Tier(id='w', segmentation='p', items=[
+                    Item(id='w1', segmentation='p1[0:1]')
+                ])
+            ], metadata=[Metadata(metas=[Meta(children=[MetaChild('x')])])])
+        igt1, igt2 = make(), make()
+        fp = igt1.fingerprint
+        assert isinstance(fp, bytes)
+        assert igt1.fingerprint is fp  # cached
+        assert igt2.fingerprint == fp
+        assert igt1 == igt2
+        igt2.attributes = {'b': '2', 'a': '1'}  # attribute order is ignored
+        assert igt2.fingerprint == fp
+        assert Igt(id='i1').fingerprint != fp
+        assert Tier(id='i1').fingerprint != Igt(id='i1').fingerprint
+        # changes anywhere in the Igt invalidate it
+        changes = [
+            lambda igt: setattr(igt, 'type', 'x'),
+            lambda igt: igt.attributes.update(c='3'),
+            lambda igt: igt.attributes.pop('a'),
+            lambda igt: setattr(igt['p'], 'id', 'q'),
+            lambda igt: setattr(igt['p']['p1'], 'text', 'abc'),
+            lambda igt: igt['w']['w1'].attributes.__setitem__('x', 'y'),
+            lambda igt: igt['p'].append(Item(id='p2')),
+            lambda igt: igt.reverse(),
+            lambda igt: igt.remove(igt['w']),
+            lambda igt: setattr(igt.metadata[0][0], 'text', 'x'),
+            lambda igt: setattr(igt.metadata[0][0][0], 'name', 'y'),
+            lambda igt: igt.metadata[0][0][0].append(MetaChild('z')),
+            # every way of changing attributes
+            lambda igt: setattr(igt, 'namespace', 'http://example.org/x'),
+            lambda igt: setattr(igt['w'], 'attributes', {}),
+            lambda igt: setattr(igt['w'], 'segmentation', 'q'),
+            lambda igt: igt.attributes.__delitem__('a'),
+            lambda igt: igt.attributes.__ior__({'c': '3'}),
+            lambda igt: igt.attributes.clear(),
+            lambda igt: igt.attributes.popitem(),
+            lambda igt: igt.attributes.setdefault('c', '3'),
+            lambda igt: igt['p']['p1'].attributes.setdefault('c'),
+            # every way of changing containers
+            lambda igt: igt.insert(0, Tier(id='x')),
+            lambda igt: igt.extend([Tier(id='x')]),
+            lambda igt: igt.__iadd__([Tier(id='x')]),
+            lambda igt: igt.__setitem__(0, Tier(id='x')),
+            lambda igt: igt.__setitem__(slice(0, 1), [Tier(id='x')]),
+            lambda igt: igt.__delitem__('p'),
+            lambda igt: igt.__delitem__(0),
+            lambda igt: igt['p'].__delitem__(slice(None)),
+            lambda igt: igt.pop(),
+            lambda igt: igt['p'].pop(0),
+            lambda igt: igt.clear(),
+            lambda igt: igt.__imul__(0),
+            lambda igt: igt.sort(key=lambda t: t.id, reverse=True),
+            lambda igt: setattr(igt, 'tiers', []),
+            lambda igt: setattr(igt['p'], 'items', []),
+            lambda igt: setattr(igt, 'metadata', []),
+            lambda igt: igt.metadata.pop(),
+            lambda igt: setattr(igt.metadata[0], 'type', 'x'),
+            lambda igt: igt.metadata[0][0].attributes.update(x='y'),
+            lambda igt: igt.metadata[0][0].clear(),
+        ]
+        for i, change in enumerate(changes):
+            igt = make()
+            assert igt.fingerprint == fp
+            change(igt)
+            assert igt.fingerprint != fp, i
+            assert not igt == igt1, i
+        # operations that change nothing keep it
+        igt = make()
+        igt.fingerprint
+        igt.attributes.setdefault('a', '3')
+        igt.attributes.pop('c', None)
+        igt.__imul__(1)
+        assert igt._fingerprint == fp
+        # equality uses cached fingerprints when both are available
+        igt1.fingerprint, igt2.fingerprint
+        igt2['p']['p1'].__dict__['_text'] = 'xy'  # bypasses invalidation
+        assert igt1 == igt2
+
+    def test_invalidation_stops_at_stale(self):
+        igt = Igt(id='i1', tiers=[
+            Tier(id='p', items=[Item(id='p1', text='ab')]),
+            Tier(id='w', segmentation='p', items=[
+                Item(id='w1', segmentation='p1[0:1]'),
+                Item(id='w2', segmentation='p1[1:2]')
+            ])
+        ])
+        w1, w2 = igt['w']
+        xc = XigtCorpus(igts=[igt])
+        changed = []
+        xc._igt_changed = changed.append
+        w1.segmentation = 'p1[0:2]'
+        assert changed == [igt]
+        # nothing was derived from the cleared Igt since
+        w2.segmentation = 'p1[0:2]'
+        w2.id = 'w3'
+        assert changed == [igt]
+        assert igt.get_item('w2') is None
+        assert igt.get_item('w3') is w2
+        # rebuilding the indices watches the Igt again
+        w1.segmentation = 'p1[1:2]'
+        assert changed == [igt, igt]
+        assert igt.reference_graph('segmentation')[1] == {'p1': ['w1', 'w3']}
+        w2.segmentation = None
+        assert changed == [igt, igt, igt]
+        assert igt.reference_graph('segmentation')[1] == {'p1': ['w1']}
+        # as does computing a fingerprint
+        fp = igt.fingerprint
+        igt['p']['p1'].text = 'abc'
+        assert changed == [igt, igt, igt, igt]
+        assert igt.fingerprint != fp
+
+    def test_copy(self):
+        igt = Igt(id='i1', tiers=[
+            Tier(id='p', items=[Item(id='p1', text='ab')]),
+            Tier(id='w', segmentation='p', items=[
+                Item(id='w1', segmentation='p1[0:1]')
+            ])
+        ], metadata=[Metadata(metas=[Meta(children=[MetaChild('x')])])])
+        xc = XigtCorpus(igts=[igt], nsmap={'x': 'http://example.org/x'})
+        for cp in (igt.copy(), copy.deepcopy(igt)):
+            assert cp == igt
+            assert cp.corpus is None
+            assert cp.nsmap == {'x': 'http://example.org/x'}
+            assert cp['w'].igt is cp
+            assert cp['w']['w1'].value() == 'a'
+            assert cp.get_item('w1') is cp['w']['w1']
+            assert cp.metadata[0][0][0]._parent is cp.metadata[0][0]
+            cp['p']['p1'].text = 'xy'
+            cp.attributes['a'] = 'b'
+            assert igt['p']['p1'].text == 'ab'
+            assert igt.attributes == {}
+        t = igt['w'].copy()
+        assert t == igt['w'] and t.igt is None
+        i = igt['p']['p1'].copy()
+        assert i == igt['p']['p1'] and i.tier is None
+
+    def test_pickle(self):
+        xc = XigtCorpus(id='xc', igts=[
+            Igt(id='i1', tiers=[Tier(id='p', items=[Item(id='p1')])]),
+            Igt(id='i2')
+        ])
+        igt = pickle.loads(pickle.dumps(xc['i1']))
+        assert igt == xc['i1']
+        assert igt.corpus is None
+        assert igt['p'].igt is igt
+        assert igt['p']['p1'].tier is igt['p']
+        assert igt.get_item('p1') is igt['p']['p1']
+        # the corpus is not pickled with the Igt
+        assert b'i2' not in pickle.dumps(xc['i1'])
+        tier = pickle.loads(pickle.dumps(xc['i1']['p']))
+        assert tier == xc['i1']['p'] and tier.igt is None
+
 
 class TestXigtCorpus():
 
@@ -1017,3 +1336,228 @@ class TestXigtCorpus():
         assert xc.get_attribute('two') == 2
         assert xc.get_attribute('three') is None
         assert xc.get_attribute('three', inherit=True) == None
+
+    def test_corpus_index(self):
+        def make_igt(igt_id, *tier_types):
+            return Igt(id=igt_id, tiers=[
+                Tier(id=tt[0], type=tt, items=[
+                    Item(id='{}-{}1'.format(igt_id, tt[0]))
+                ])
+                for tt in tier_types
+            ])
+        i1 = make_igt('i1', 'words', 'glosses')
+        i2 = make_igt('i2', 'words')
+        xc = XigtCorpus(igts=[i1, i2])
+        assert xc.get_qualified('i1', 'w') is i1['w']
+        assert xc.get_qualified('i1', 'i1-g1') is i1['g']['i1-g1']
+        assert xc.get_qualified('i2', 'g') is None
+        assert xc.get_qualified('i3', 'w', default=1) == 1
+        assert xc.igts_containing('i2-w1') == [i2]
+        assert [igt.id for igt in xc.igts_containing('w')] == ['i1', 'i2']
+        assert xc.igts_containing('x') == []
+        assert xc.tiers_of_type('words') == [i1['w'], i2['w']]
+        assert xc.tiers_of_type('glosses') == [i1['g']]
+        # maintained on append, remove, and replacement
+        i3 = make_igt('i3', 'glosses')
+        xc.append(i3)
+        assert xc.tiers_of_type('glosses') == [i1['g'], i3['g']]
+        xc.remove(i1)
+        assert xc.tiers_of_type('glosses') == [i3['g']]
+        assert xc.igts_containing('i1-w1') == []
+        assert xc.get_qualified('i1', 'w') is None
+        i4 = make_igt('i4', 'words')
+        xc[0] = i4
+        assert xc.tiers_of_type('words') == [i4['w']]
+        assert xc.igts_containing('i2-w1') == []
+        xc.insert(0, make_igt('i5', 'words'))
+        assert [t.igt.id for t in xc.tiers_of_type('words')] == ['i5', 'i4']
+        xc.sort(key=lambda igt: igt.id)
+        assert [t.igt.id for t in xc.tiers_of_type('words')] == ['i4', 'i5']
+        # and on slice assignment and deletion, +=, and pop()
+        xc[2:] = [make_igt('i6', 'words')]
+        assert [t.igt.id for t in xc.tiers_of_type('words')] == ['i4', 'i6']
+        xc += [make_igt('i7', 'words')]
+        del xc[:2]
+        assert [t.igt.id for t in xc.tiers_of_type('words')] == ['i6', 'i7']
+        xc.pop()
+        assert [t.igt.id for t in xc.tiers_of_type('words')] == ['i6']
+        xc[:] = [i3, i4]
+        assert xc.tiers_of_type('words') == [i4['w']]
+        # and on changes within an igt
+        xc['i4'].append(Tier(id='g', type='glosses'))
+        assert xc.tiers_of_type('glosses') == [i3['g'], i4['g']]
+        assert xc.get_qualified('i4', 'g') is i4['g']
+        i4['w'].type = 'glosses'
+        assert xc.tiers_of_type('words') == []
+        assert xc.tiers_of_type('glosses') == [i3['g'], i4['w'], i4['g']]
+        i4['g'].append(Item(id='g1'))
+        assert xc.igts_containing('g1') == [i4]
+        i4.id = 'i8'
+        assert xc.get_qualified('i4', 'g') is None
+        assert xc.get_qualified('i8', 'g') is i4['g']
+        del i4['g']
+        assert xc.tiers_of_type('glosses') == [i3['g'], i4['w']]
+        xc.refresh_index()
+        assert xc.tiers_of_type('glosses') == [i3['g'], i4['w']]
+        i4['w'].type = 'words'
+        assert xc.tiers_of_type('words') == [i4['w']]
+        xc.clear()
+        assert xc.tiers_of_type('words') == []
+
+    def test_corpus_index_per_igt(self):
+        igts = [
+            Igt(id='i{}'.format(i), tiers=[
+                Tier(id='w', type='words', items=[Item(id='w1')]),
+                Tier(id='g', type='glosses', items=[Item(id='g1')])
+            ])
+            for i in range(1, 4)
+        ]
+        xc = XigtCorpus(igts=igts)
+        i1, i2, i3 = igts
+        assert xc.tiers_of_type('words') == [i1['w'], i2['w'], i3['w']]
+        index = xc._corpus_index
+        # a change within an Igt updates its entries in their places
+        i2['g'].type = 'words'
+        i2['w'].type = 'glosses'
+        assert xc.tiers_of_type('words') == [i1['w'], i2['g'], i3['w']]
+        assert xc.tiers_of_type('glosses') == [i1['g'], i2['w'], i3['g']]
+        i2['w'].append(Item(id='x1'))
+        i1['g'].append(Item(id='x1'))
+        assert xc.igts_containing('x1') == [i1, i2]
+        assert xc.igts_containing('w1') == [i1, i2, i3]
+        i2.remove(i2['w'])
+        assert xc.igts_containing('x1') == [i1]
+        assert xc.igts_containing('w1') == [i1, i3]
+        assert xc.get_qualified('i2', 'w') is None
+        xc.remove(i1)
+        i1['g'].type = 'words'  # no longer in the corpus
+        assert xc.tiers_of_type('words') == [i2['g'], i3['w']]
+        assert xc.igts_containing('x1') == []
+        assert xc._corpus_index is index
+
+    def test_pickle(self):
+        xc = pickle.loads(pickle.dumps(self.c2))
+        assert xc == self.c2
+        assert all(igt.corpus is xc for igt in xc)
+        assert xc.metadata[0]._parent is xc
+        md = pickle.loads(pickle.dumps(self.c2.metadata[0]))
+        assert md == self.c2.metadata[0]
+
+
+class TestUnloadedCorpus():
+
+    @staticmethod
+    def make_igts(ids, opened=None):
+        if opened is not None:
+            opened.append(1)
+        for igt_id in ids:
+            yield Igt(id=igt_id)
+
+    def test_transient_iterator(self):
+        xc = XigtCorpus(igts=self.make_igts(['i1', 'i2']), mode='transient')
+        with pytest.raises(TypeError):
+            len(xc)
+        assert [igt.id for igt in xc] == ['i1', 'i2']
+        with pytest.raises(XigtError):
+            list(xc)
+        with pytest.raises(XigtError):
+            xc.igts
+
+    def test_transient_collection(self):
+        igts = [Igt(id='i1'), Igt(id='i2')]
+        xc = XigtCorpus(igts=igts, mode='transient')
+        assert len(xc) == 2
+        assert xc.igts == igts
+        assert [igt.id for igt in xc] == ['i1', 'i2']
+        assert list.__len__(xc) == 0  # nothing is kept
+        assert xc.mode == 'transient'
+        xc = XigtCorpus(mode='transient')
+        assert len(xc) == 0
+        assert list(xc) == []
+
+    def test_transient_source(self):
+        opened = []
+        source = IgtSource(
+            lambda: self.make_igts(['i1', 'i2', 'i3'], opened),
+            count=lambda: 3
+        )
+        xc = XigtCorpus(igts=source, mode='transient')
+        assert len(xc) == 3
+        assert opened == []  # counted without reading the IGTs
+        assert [igt.id for igt in xc] == ['i1', 'i2', 'i3']
+        assert [igt.id for igt in xc] == ['i1', 'i2', 'i3']
+        assert len(opened) == 2
+        assert xc == XigtCorpus(igts=[Igt(id='i1'), Igt(id='i2'),
+                                      Igt(id='i3')])
+        # without a count function, the IGTs are read to count them
+        xc = XigtCorpus(igts=lambda: self.make_igts(['i1', 'i2']),
+                        mode='transient')
+        assert len(xc) == 2
+        with pytest.raises(TypeError):
+            len(IgtSource(lambda: iter([])))
+
+    def test_repr_and_bool(self):
+        # full
+        xc = XigtCorpus(igts=[Igt(id='i1')])
+        assert 'with 1 Igts' in repr(xc)
+        assert xc
+        assert not XigtCorpus()
+        # transient from an iterator; the IGT read by bool() is kept
+        xc = XigtCorpus(igts=self.make_igts(['i1', 'i2']), mode='transient')
+        assert 'with unloaded Igts' in repr(xc)
+        assert xc
+        assert xc
+        assert [igt.id for igt in xc] == ['i1', 'i2']
+        assert 'with 2 Igts' in repr(xc)
+        assert len(xc) == 2
+        xc = XigtCorpus(igts=self.make_igts([]), mode='transient')
+        assert not xc
+        assert len(xc) == 0
+        # transient from a source
+        opened = []
+        source = IgtSource(lambda: self.make_igts(['i1', 'i2'], opened),
+                           count=lambda: 2)
+        xc = XigtCorpus(igts=source, mode='transient')
+        assert 'with unloaded Igts' in repr(xc)
+        assert xc
+        assert len(opened) == 1
+        assert not XigtCorpus(igts=lambda: iter([]), mode='transient')
+        # incremental
+        xc = XigtCorpus(igts=self.make_igts(['i1', 'i2', 'i3']),
+                        mode='incremental')
+        assert 'with 0 loaded Igts' in repr(xc)
+        assert xc
+        assert list.__len__(xc) == 1
+        assert 'with 1 loaded Igts' in repr(xc)
+        assert [igt.id for igt in xc] == ['i1', 'i2', 'i3']
+        assert 'with 3 Igts' in repr(xc)
+        xc = XigtCorpus(igts=self.make_igts([]), mode='incremental')
+        assert not xc
+        assert xc.mode == 'full'
+
+    def test_incremental(self):
+        xc = XigtCorpus(igts=self.make_igts(['i1', 'i2', 'i3']),
+                        mode='incremental')
+        it = iter(xc)
+        assert next(it).id == 'i1'
+        assert list.__len__(xc) == 1
+        # a second iteration starts from the first IGT
+        assert [igt.id for igt in xc] == ['i1', 'i2', 'i3']
+        assert next(it).id == 'i2'
+        assert xc.mode == 'full'
+        assert len(xc) == 3
+        assert xc['i2'].corpus is xc
+
+    def test_incremental_length(self):
+        xc = XigtCorpus(igts=self.make_igts(['i1', 'i2']), mode='incremental')
+        assert len(xc) == 2  # by loading the IGTs
+        assert list.__len__(xc) == 2
+        opened = []
+        source = IgtSource(lambda: self.make_igts(['i1', 'i2'], opened),
+                           count=lambda: 2)
+        xc = XigtCorpus(igts=source, mode='incremental')
+        assert len(xc) == 2
+        assert list.__len__(xc) == 0
+        assert [igt.id for igt in xc] == ['i1', 'i2']
+        assert [igt.id for igt in xc] == ['i1', 'i2']
+        assert len(opened) == 1
@@ -0,0 +1,250 @@
+import json
+import time
+import argparse
+from io import StringIO, BytesIO
+
+import pytest
+
+from xigt import profiling, ref, xigtpath as xp
+from xigt.codecs import xigtxml, xigtjson, xigtbin
+from xigt.generate import generate
+from xigt.main import run_profiled
+from xigt.scripts import xigt_query
+
+
+@pytest.fixture
+def recording():
+    profiling.enable()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+@pytest.fixture
+def xml():
+    return xigtxml.dumps(generate(5, mode='full'))
+
+
+class TestProfiling():
+    def test_disabled(self, xml):
+        profiling.reset()
+        xigtxml.loads(xml)
+        profiling.count('things')
+        with profiling.phase('p'):
+            pass
+        assert profiling.report()['phases'] == {}
+        assert profiling.report()['counts'] == {}
+
+    def test_phases(self, recording):
+        with profiling.phase('outer'):
+            time.sleep(0.01)
+            with profiling.phase('inner'):
+                time.sleep(0.01)
+            with profiling.phase('inner'):
+                pass
+        phases = profiling.report()['phases']
+        assert phases['outer']['calls'] == 1
+        assert phases['inner']['calls'] == 2
+        assert phases['outer']['seconds'] >= phases['inner']['seconds']
+        assert (phases['outer']['self_seconds'] == pytest.approx(
+            phases['outer']['seconds'] - phases['inner']['seconds']))
+
+    def test_timed(self, recording):
+        assert list(profiling.timed('gen', iter([1, 2, 3]))) == [1, 2, 3]
+        assert profiling.report()['phases']['gen']['calls'] == 1
+
+    def test_timed_whole_iteration(self, recording):
+        def slow():
+            for i in range(3):
+                with profiling.phase('step'):
+                    time.sleep(0.01)
+                yield i
+        with profiling.phase('outer'):
+            for _ in profiling.timed('gen', slow()):
+                time.sleep(0.01)  # the caller's time is not counted
+        phases = profiling.report()['phases']
+        gen, step, outer = phases['gen'], phases['step'], phases['outer']
+        assert gen['calls'] == 1
+        assert step['calls'] == 3
+        assert gen['seconds'] >= step['seconds']
+        assert gen['seconds'] < outer['seconds'] - 0.02
+        assert (gen['self_seconds'] == pytest.approx(
+            gen['seconds'] - step['seconds']))
+        assert (outer['self_seconds'] == pytest.approx(
+            outer['seconds'] - gen['seconds']))
+        # a closed iteration ends the phase
+        it = profiling.timed('partial', iter([1, 2, 3]))
+        assert next(it) == 1
+        it.close()
+        assert profiling.report()['phases']['partial']['calls'] == 1
+
+    def test_xigtxml(self, xml, recording):
+        xc = xigtxml.loads(xml)
+        report = profiling.report()
+        assert report['counts']['igts_decoded'] == 5
+        assert report['counts']['bytes_read'] == len(xml)
+        assert report['counts']['items_constructed'] == sum(
+            len(tier) for igt in xc for tier in igt)
+        assert report['phases']['xigtxml.decode']['calls'] == 5
+        assert report['phases']['refresh_indices']['calls'] == 5
+        xigtxml.dumps(xc)  # dumps() does not write a file
+        xigtxml.dump(StringIO(), xc, encoding='unicode')
+        assert profiling.report()['phases']['xigtxml.write']['calls'] == 1
+
+    def test_xigtjson(self, xml, recording):
+        s = xigtjson.dumps(xigtxml.loads(xml))
+        profiling.reset()
+        xigtjson.load(StringIO(s))
+        report = profiling.report()
+        assert report['counts']['igts_decoded'] == 5
+        assert report['counts']['bytes_read'] == len(s)
+        assert 'xigtjson.parse' in report['phases']
+        assert 'xigtjson.decode' in report['phases']
+
+    def test_xigtbin(self, xml, recording):
+        data = xigtbin.dumps(xigtxml.loads(xml))
+        profiling.reset()
+        xc = xigtbin.load(BytesIO(data), mode='transient')
+        assert len(list(xc)) == 5
+        report = profiling.report()
+        assert report['counts']['igts_decoded'] == 5
+        # the footer with the offset table is not read
+        assert 0 < report['counts']['bytes_read'] < len(data)
+        assert report['phases']['xigtbin.parse']['calls'] == 1
+
+    def test_ref_and_xigtpath(self, xml, recording):
+        igt = xigtxml.loads(xml)[0]
+        profiling.reset()
+        ref.resolve(igt, 'n1')
+        assert profiling.report()['counts']['refs_resolved'] == 1
+        profiling.reset()
+        values = xp.findall(igt, 'tier[@type="words"]/item/value()')
+        report = profiling.report()
+        # three steps, and the predicate's step for each tier
+        assert report['counts']['xigtpath_steps'] == 3 + len(igt)
+        # each word's segmentation, and the phrase's content
+        assert report['counts']['refs_resolved'] == 2 * len(values)
+        # one for the path, and the predicate's subpath for each tier
+        assert report['phases']['xigtpath']['calls'] == 1 + len(igt)
+
+    def test_format_report(self, recording):
+        profiling.count('igts_decoded', 3)
+        with profiling.phase('decode'):
+            pass
+        text = profiling.format_report(profiling.report())
+        assert 'decode' in text
+        assert 'igts_decoded' in text
+        assert 'total:' in text
+
+
+class TestProfileOption():
+    def test_run_profiled(self, tmpdir, xml, capsys):
+        path = str(tmpdir.join('c.xml'))
+        with open(path, 'w') as fh:
+            fh.write(xml)
+        json_path = str(tmpdir.join('profile.json'))
+        stats_path = str(tmpdir.join('profile.stats'))
+        args = argparse.Namespace(
+            command='query', args=['--count', 'igt', path], profile=True,
+            profile_json=json_path, cprofile=stats_path
+        )
+        run_profiled(xigt_query, args)
+        assert not profiling.enabled
+        err = capsys.readouterr().err
+        assert 'xigt query' in err
+        assert 'igts_decoded' in err
+        with open(json_path) as fh:
+            report = json.load(fh)
+        assert report['phases']['xigt query']['calls'] == 1
+        assert report['counts']['igts_decoded'] == 5
+        assert tmpdir.join('profile.stats').check()
+
+
+class Events(profiling.Observer):
+    def __init__(self):
+        self.events = []
+
+    def phase_started(self, name):
+        self.events.append(('start', name))
+
+    def phase_ended(self, name, seconds, self_seconds):
+        assert seconds >= self_seconds >= 0
+        self.events.append(('end', name))
+
+    def counted(self, name, n):
+        self.events.append(('count', name, n))
+
+
+@pytest.fixture
+def events():
+    observer = Events()
+    profiling.add_observer(observer)
+    yield observer
+    profiling.remove_observer(observer)
+
+
+class TestObservers():
+    def test_add_remove(self):
+        assert not profiling.enabled
+        observer = Events()
+        profiling.add_observer(observer)
+        profiling.add_observer(observer)  # only once
+        assert profiling.enabled
+        profiling.count('x')
+        assert observer.events == [('count', 'x', 1)]
+        profiling.remove_observer(observer)
+        assert not profiling.enabled
+        profiling.count('x')
+        assert len(observer.events) == 1
+
+    def test_with_recorder(self, events, recording):
+        profiling.count('x', 2)
+        profiling.disable()
+        assert profiling.enabled  # events is still attached
+        profiling.count('x')
+        assert profiling.report()['counts'] == {'x': 2}
+        assert events.events == [('count', 'x', 2), ('count', 'x', 1)]
+
+    def test_resolve(self, xml, events):
+        igt = xigtxml.loads(xml)[0]
+        del events.events[:]
+        assert ref.resolve(igt, 'n1') == igt['n']['n1'].text
+        assert events.events == [
+            ('count', 'refs_resolved', 1),
+            ('start', 'ref.resolve'),
+            ('end', 'ref.resolve'),
+        ]
+
+    def test_query(self, xml, events):
+        from xigt import query
+        igt = xigtxml.loads(xml)[0]
+        del events.events[:]
+        ancestors = list(query.ancestors(igt['g'][0]))
+        assert len(ancestors) == 3
+        names = [e[1] for e in events.events if e[0] == 'end']
+        assert names.count('query.ancestors') == 1
+        del events.events[:]
+        query.tier_descendants(igt['p'])
+        assert ('end', 'query.tier_descendants') in events.events
+
+    def test_threads(self, recording):
+        import threading
+        done = threading.Event()
+        entered = threading.Event()
+
+        def other():
+            with profiling.phase('other'):
+                entered.set()
+                done.wait(5)
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        entered.wait(5)
+        with profiling.phase('main'):
+            pass
+        done.set()
+        thread.join()
+        phases = profiling.report()['phases']
+        # the phases of different threads do not nest
+        assert phases['other']['self_seconds'] == pytest.approx(
+            phases['other']['seconds'])
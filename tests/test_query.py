@@ -1,4 +1,5 @@
-from xigt.query import (ancestors, descendants)
+from xigt.query import (ancestors, descendants, tier_descendants)
+from xigt import Tier, Item
 
 from .example_corpora import (
     xc1, xc2, xc3, xc4, xc5
@@ -106,3 +107,45 @@ class TestQueries():
         desc = list(descendants(xc5[0]['w'], follow='all'))
         assert len(desc) == 1
         self.check(desc[0], 'w', 'segmentation', 'w', ['w1', 'w2'])
+
+    def test_tier_descendants(self):
+        assert tier_descendants(xc1[0]['p']) == {'p1': []}
+
+        for tier in xc3[0]:
+            for follow in ('first', 'all'):
+                desc = tier_descendants(tier, follow=follow)
+                assert list(desc) == [item.id for item in tier]
+                for item in tier:
+                    expected = list(descendants(item, follow=follow))
+                    assert len(desc[item.id]) == len(expected)
+                    for result, exp in zip(desc[item.id], expected):
+                        self.check(result, exp[0].id, exp[1], exp[2].id,
+                                   [i.id for i in exp[3]])
+
+        desc = tier_descendants(xc3[0]['w'])
+        assert len(desc['w1']) == 2
+        self.check(desc['w1'][0], 'w', 'segmentation', 'm', ['m1', 'm2'])
+        self.check(desc['w1'][1], 'm', 'alignment', 'g', ['g1', 'g2'])
+        self.check(desc['w3'][1], 'm', 'alignment', 'g', ['g5', 'g6'])
+
+        desc = tier_descendants(xc5[0]['w'])
+        self.check(desc['w1'][0], 'w', 'segmentation', 'w', ['w1', 'w2'])
+
+    def test_changes(self):
+        # cached reference graphs follow changes to the Igt
+        igt = xc3[0].copy()
+        assert len(list(descendants(igt['p']))) == 3
+        assert len(list(ancestors(igt['g']['g1']))) == 3
+        igt.append(Tier(id='n', alignment='g',
+                        items=[Item(id='n1', alignment='g1')]))
+        desc = list(descendants(igt['p']))
+        assert len(desc) == 4
+        self.check(desc[3], 'g', 'alignment', 'n', ['n1'])
+        igt['n']['n1'].alignment = 'g2'
+        desc = tier_descendants(igt['g'])
+        assert [i.id for i in desc['g2'][0][3]] == ['n1']
+        assert desc['g1'][0][3] == []
+        igt['g'].type = 'n'
+        igt['g'].attributes.pop('alignment')
+        assert len(list(ancestors(igt['g']['g1']))) == 0
+        assert len(list(descendants(igt['p']))) == 2
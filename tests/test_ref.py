@@ -145,6 +145,9 @@ class TestInterpretiveFunctions():
         assert ref.resolve(self.xc3[0], 'w1') == 'inu=ga'
         assert ref.resolve(self.xc3[0], 'm1') == 'inu'
         assert ref.resolve(self.xc3[0], 'g1') == 'dog'
+        upper = lambda item: item.value().upper()
+        assert ref.resolve(self.xc3[0], 'm1', value=upper) == 'INU'
+        assert ref.resolve(self.xc1[0], 'p1[0:6]', value=upper) == 'INU=GA'
 
     def test_referents(self):
         assert ref.referents(self.xc1[0], 't', refattrs=('alignment',)) == {'alignment': []}
@@ -176,6 +179,49 @@ class TestInterpretiveFunctions():
         assert ref.referrers(self.xc3[0], 'x') == {'alignment': [], 'segmentation': [], 'content': []}
         assert ref.referrers(self.xc3[0], 'x', refattrs=('alignment', 'children')) == {'alignment': [], 'children': ['x']}
         assert ref.referrers(self.xc3[0], 'x1', refattrs=('alignment', 'children')) == {'alignment': [], 'children': ['x4']}
+        with pytest.raises(XigtLookupError): ref.referrers(self.xc3[0], 'y1', refattrs=('alignment',))
+        # tier ids only get tier referrers, item ids only item referrers
+        igt = Igt(tiers=[
+            Tier(id='a', items=[Item(id='b', text='xyz')]),
+            Tier(id='b', alignment='a', items=[
+                Item(id='b1', alignment='b[0:1]+b[2:3]')
+            ])
+        ])
+        assert ref.referrers(igt, 'a', refattrs=('alignment',)) == {'alignment': ['b']}
+        assert ref.referrers(igt, 'b', refattrs=('alignment',)) == {'alignment': []}
+        assert igt.referrers('b', refattrs=('alignment',)) == {'alignment': []}
+        # results are copies of the index
+        ref.referrers(igt, 'a', refattrs=('alignment',))['alignment'].append('c')
+        assert ref.referrers(igt, 'a', refattrs=('alignment',)) == {'alignment': ['b']}
+        # the index follows changes to the Igt
+        igt.append(Tier(id='c', alignment='b', items=[
+            Item(id='c1', alignment='b1')
+        ]))
+        assert ref.referrers(igt, 'b', refattrs=('alignment',)) == {'alignment': ['c']}
+        assert ref.referrers(igt, 'b1', refattrs=('alignment',)) == {'alignment': ['c1']}
+        igt['b'].append(Item(id='b2', alignment='b'))
+        igt['c']['c1'].alignment = 'b2'
+        assert ref.referrers(igt, 'b1', refattrs=('alignment',)) == {'alignment': []}
+        assert ref.referrers(igt, 'b2', refattrs=('alignment',)) == {'alignment': ['c1']}
+        del igt['c']
+        assert ref.referrers(igt, 'b', refattrs=('alignment',)) == {'alignment': []}
+        assert ref.referrers(igt, 'b2', refattrs=('alignment',)) == {'alignment': []}
+        with pytest.raises(XigtLookupError): ref.referrers(igt, 'c1', refattrs=('alignment',))
+
+    def test_reference_graph(self):
+        items = [i for t in self.xc3[0] for i in t]
+        referents, referrers = ref.reference_graph(items, 'segmentation')
+        assert referents['w1'] == ['p1']
+        assert referents['m3'] == ['w2']
+        assert 'g1' not in referents
+        assert referrers['p1'] == ['w1', 'w2', 'w3']
+        assert referrers['w2'] == ['m3', 'm4']
+        referents, referrers = ref.reference_graph(items, 'children')
+        assert referents == {'x4': ['x1', 'x2'], 'x5': ['x4', 'x3']}
+        assert referrers['x4'] == ['x5']
+        # repeated selections only give one referrer
+        items = [Item(id='b1', alignment='a1[0:1]+a1[2:3]')]
+        assert ref.reference_graph(items, 'alignment')[1] == {'a1': ['b1']}
 
     def test_dereference(self):
         with pytest.raises(XigtLookupError): ref.dereference(self.xc1, 'alignment')
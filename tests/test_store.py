@@ -0,0 +1,223 @@
+import gc
+import sqlite3
+
+import pytest
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta
+from xigt.errors import XigtError
+from xigt.store import XigtStore, create, BATCH_SIZE
+
+
+def make_corpus():
+    return XigtCorpus(
+        id='xc1',
+        attributes={'lang': 'spa'},
+        nsmap={'dc': 'http://purl.org/dc/elements/1.1/'},
+        metadata=[Metadata(metas=[Meta(id='md1', text='meta text')])],
+        igts=[
+            Igt(id='i1', type='odin', attributes={'doc': 'a'}, tiers=[
+                Tier(id='p', type='phrases', items=[
+                    Item(id='p1', text='inu=ga san-biki hoe-ru')
+                ]),
+                Tier(id='w', type='words', segmentation='p', items=[
+                    Item(id='w1', segmentation='p1[0:6]'),
+                    Item(id='w2', segmentation='p1[7:15]')
+                ])
+            ]),
+            Igt(id='i2', type='odin', attributes={'doc': 'b'}),
+            Igt(id='i3', attributes={'doc': 'a'})
+        ]
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / 'xc.db')
+    create(path, make_corpus()).close()
+    return path
+
+
+def saved_data(path):
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute('SELECT igt_id, data FROM igts'))
+    conn.close()
+    return rows
+
+
+class TestXigtStore():
+    def test_create(self, tmp_path, path):
+        with pytest.raises(XigtError):
+            create(path, make_corpus())
+        with XigtStore(str(tmp_path / 'new.db')) as store:
+            assert len(store) == 0
+            assert store.id is None
+            assert list(store) == []
+
+    def test_corpus(self, path):
+        with XigtStore(path) as store:
+            assert store.id == 'xc1'
+            assert store.attributes == {'lang': 'spa'}
+            assert store.nsmap == {'dc': 'http://purl.org/dc/elements/1.1/'}
+            assert store.metadata[0][0].text == 'meta text'
+            assert len(store) == 3
+            assert store.ids() == ['i1', 'i2', 'i3']
+
+    def test_igts(self, path):
+        with XigtStore(path) as store:
+            assert store._loaded == {}
+            i2 = store['i2']
+            assert list(store._loaded) == [2]
+            assert store[1] is i2
+            assert store[-1].id == 'i3'
+            assert [igt.id for igt in store] == ['i1', 'i2', 'i3']
+            assert store['i1'] == make_corpus()['i1']
+            assert store['i1'].corpus is store
+            assert store['i1'].get_attribute('lang', inherit=True) == 'spa'
+            assert store['i1']['w']['w2'].value() == 'san-biki'
+            assert store.get('i4') is None
+            assert store.get(3) is None
+            with pytest.raises(KeyError):
+                store['i4']
+            with pytest.raises(IndexError):
+                store[3]
+
+    def test_select(self, path):
+        with XigtStore(path) as store:
+            ids = lambda igts: [igt.id for igt in igts]
+            assert ids(store.select(type='odin')) == ['i1', 'i2']
+            assert ids(store.select(attributes={'doc': 'a'})) == ['i1', 'i3']
+            assert ids(store.select(type='odin',
+                                    attributes={'doc': 'a'})) == ['i1']
+            assert ids(store.select(attributes={'doc': 'c'})) == []
+
+    def test_save(self, path):
+        before = saved_data(path)
+        with XigtStore(path) as store:
+            store['i1'].attributes['doc'] = 'c'
+            store['i1']['p']['p1'].text = 'inu=ga'
+            store['i2']  # loaded but unchanged
+            assert store.save() == 1
+            assert store.save() == 0
+            assert [igt.id for igt in store.select(
+                attributes={'doc': 'c'})] == ['i1']
+        after = saved_data(path)
+        assert after['i1'] != before['i1']
+        assert after['i2'] == before['i2']
+        assert after['i3'] == before['i3']
+        with XigtStore(path) as store:
+            assert store['i1'].attributes['doc'] == 'c'
+            assert store['i1']['w']['w1'].value() == 'inu=ga'
+
+    def test_save_again(self, path):
+        with XigtStore(path) as store:
+            igt = store['i1']
+            igt['p']['p1'].text = 'a'
+            igt['p']['p1'].text = 'b'
+            assert store.save() == 1
+            igt['p']['p1'].text = 'c'
+            assert store.save() == 1
+            igt.attributes['doc'] = 'd'
+            assert store.save() == 1
+        with XigtStore(path) as store:
+            assert store['i1']['p']['p1'].text == 'c'
+            assert store['i1'].attributes['doc'] == 'd'
+
+    def test_save_corpus(self, path):
+        with XigtStore(path) as store:
+            store.attributes['lang'] = 'jpn'
+            store.metadata[0][0].text = 'changed'
+            store.save()
+        with XigtStore(path) as store:
+            assert store.attributes == {'lang': 'jpn'}
+            assert store.metadata[0][0].text == 'changed'
+
+    def test_close_without_save(self, path):
+        with XigtStore(path) as store:
+            store['i1'].type = 'changed'
+            store.append(Igt(id='i4'))
+        with XigtStore(path) as store:
+            assert store['i1'].type == 'odin'
+            assert len(store) == 3
+
+    def test_append_and_remove(self, path):
+        with XigtStore(path) as store:
+            store.append(Igt(id='i4', type='odin'))
+            assert store[3].id == 'i4'
+            with pytest.raises(XigtError):
+                store.append(Igt(id='i1'))
+            del store['i2']
+            store.remove(store['i3'])
+            with pytest.raises(XigtError):
+                store.remove(Igt(id='i5'))
+            store.save()
+        with XigtStore(path) as store:
+            assert store.ids() == ['i1', 'i4']
+            assert [igt.id for igt in store.select(type='odin')] == [
+                'i1', 'i4'
+            ]
+
+    def test_unload(self, path):
+        with XigtStore(path) as store:
+            i1 = store['i1']
+            i1.type = 'changed'
+            store.unload()
+            assert store.save() == 0
+            assert store['i1'] is not i1
+            assert store['i1'].type == 'odin'
+
+    def test_bounded(self, tmp_path):
+        n = 2 * BATCH_SIZE + 3
+        path = str(tmp_path / 'big.db')
+        create(path, XigtCorpus(
+            igts=[Igt(id='i{}'.format(i)) for i in range(n)]
+        )).close()
+        with XigtStore(path, max_igts=2) as store:
+            i0 = store['i0']
+            i1 = store['i1']
+            i1.type = 'changed'
+            del i1
+            assert [igt.id for igt in store] == store.ids()
+            gc.collect()
+            # the recent, changed, and referenced IGTs are kept
+            assert len(store._recent) == 2
+            assert list(store._changed) == [2]
+            assert len(store._loaded) <= 4
+            assert store['i0'] is i0
+            assert store['i1'].type == 'changed'
+            # changes during an iteration are saved and iterated over
+            for igt in store:
+                igt.attributes['seen'] = 'yes'
+                if igt.id == 'i5':
+                    assert store.save() == 6
+            assert store.save() == n - 6
+            gc.collect()
+            assert len(store._loaded) <= 4
+        with XigtStore(path) as store:
+            assert store['i1'].type == 'changed'
+            assert len(list(store.select(attributes={'seen': 'yes'}))) == n
+
+    def test_readonly(self, path):
+        with XigtStore(path, readonly=True) as store:
+            assert store.ids() == ['i1', 'i2', 'i3']
+            with pytest.raises(XigtError):
+                store.save()
+            with pytest.raises(XigtError):
+                store.append(Igt(id='i4'))
+
+    def test_readonly_path(self, tmp_path):
+        path = str(tmp_path / 'a?b#c%20d.db')
+        create(path, make_corpus()).close()
+        with XigtStore(path, readonly=True) as store:
+            assert store.ids() == ['i1', 'i2', 'i3']
+
+    def test_concurrent_readers(self, path):
+        writer = XigtStore(path)
+        reader = XigtStore(path, readonly=True)
+        writer['i1'].type = 'changed'
+        writer.append(Igt(id='i4'))
+        assert reader.ids() == ['i1', 'i2', 'i3']
+        writer.save()
+        assert reader.ids() == ['i1', 'i2', 'i3', 'i4']
+        assert reader['i1'].type == 'changed'
+        reader.close()
+        writer.close()
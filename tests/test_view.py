@@ -0,0 +1,164 @@
+import pickle
+
+import pytest
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta
+from xigt.codecs import xigtbin
+from xigt.errors import XigtError
+from xigt.view import CorpusView, IgtView, TierView, ItemView
+
+xc = XigtCorpus(
+    id='xc1',
+    attributes={'lang': 'spa'},
+    nsmap={'dc': 'http://purl.org/dc/elements/1.1/'},
+    metadata=[Metadata(metas=[Meta(id='md1', text='meta text')])],
+    igts=[
+        Igt(id='i1', type='odin', tiers=[
+            Tier(id='p', type='phrases', items=[
+                Item(id='p1', text='inu=ga san-biki hoe-ru')
+            ]),
+            Tier(id='w', type='words', segmentation='p', items=[
+                Item(id='w1', segmentation='p1[0:6]'),
+                Item(id='w2', segmentation='p1[7:15]'),
+                Item(id='w3', segmentation='p1[16:22]')
+            ]),
+            Tier(id='m', type='morphemes', segmentation='w', items=[
+                Item(id='m1', segmentation='w1[0:3]'),
+                Item(id='m2', segmentation='w1[4:6]')
+            ])
+        ]),
+        Igt(id='i2', attributes={'{http://purl.org/dc/elements/1.1/}subject': 'cat'}),
+        Igt(id='i3', nsmap={'x': 'http://example.org/x'}, tiers=[
+            Tier(id='p', items=[Item(id='p1'), Item(id='p2', text='')])
+        ])
+    ]
+)
+
+
+@pytest.fixture
+def view(tmp_path):
+    path = str(tmp_path / 'xc.xigtb')
+    xigtbin.dump(path, xc)
+    v = CorpusView(path)
+    yield v
+    v.close()
+
+
+class TestCorpusView():
+    def test_init(self, tmp_path):
+        path = tmp_path / 'empty.xigtb'
+        path.write_bytes(b'')
+        with pytest.raises(XigtError):
+            CorpusView(str(path))
+        path.write_bytes(b'not a corpus')
+        with pytest.raises(XigtError):
+            CorpusView(str(path))
+
+    def test_corpus(self, view):
+        assert view.id == 'xc1'
+        assert view.attributes == {'lang': 'spa'}
+        assert view.nsmap == {'dc': 'http://purl.org/dc/elements/1.1/'}
+        assert view.metadata[0][0].text == 'meta text'
+
+    def test_igts(self, view):
+        assert len(view) == 3
+        assert [igt.id for igt in view] == ['i1', 'i2', 'i3']
+        assert isinstance(view[0], IgtView)
+        assert view[-1].id == 'i3'
+        assert [igt.id for igt in view[1:]] == ['i2', 'i3']
+        assert view['i2'].id == 'i2'
+        assert view.get('i4') is None
+        assert view.get(3) is None
+        with pytest.raises(KeyError):
+            view['i4']
+        with pytest.raises(IndexError):
+            view[3]
+
+    def test_pickle(self, view):
+        v2 = pickle.loads(pickle.dumps(view))
+        assert v2.path == view.path
+        assert [igt.id for igt in v2] == ['i1', 'i2', 'i3']
+        v2.close()
+
+
+class TestIgtView():
+    def test_attributes(self, view):
+        i1 = view['i1']
+        assert i1.type == 'odin'
+        assert i1.attributes == {}
+        assert i1.corpus is view
+        assert i1.nsmap == view.nsmap
+        assert view['i2'].get_attribute('dc:subject') == 'cat'
+        assert view['i2'].get_attribute('lang', inherit=True) == 'spa'
+        assert view['i3'].nsmap == {'x': 'http://example.org/x'}
+
+    def test_tiers(self, view):
+        i1 = view['i1']
+        assert len(i1) == 3
+        assert [t.id for t in i1] == ['p', 'w', 'm']
+        assert [t.id for t in i1.tiers] == ['p', 'w', 'm']
+        assert isinstance(i1['w'], TierView)
+        assert i1[1].id == 'w'
+        assert i1.get('x') is None
+        assert len(view['i2']) == 0
+
+    def test_get_item(self, view):
+        i1 = view['i1']
+        assert isinstance(i1.get_item('w2'), ItemView)
+        assert i1.get_item('w2').id == 'w2'
+        assert i1.get_item('x') is None
+        assert i1.get_any('p').id == 'p'
+        assert i1.get_any('m1').id == 'm1'
+
+
+class TestTierAndItemView():
+    def test_tier(self, view):
+        w = view['i1']['w']
+        assert w.type == 'words'
+        assert w.segmentation == 'p'
+        assert w.igt.id == 'i1'
+        assert w.corpus is view
+        assert [i.id for i in w.items] == ['w1', 'w2', 'w3']
+        assert w['w2'].id == 'w2'
+        assert w[0].id == 'w1'
+
+    def test_value(self, view):
+        i1 = view['i1']
+        assert i1['p']['p1'].value() == 'inu=ga san-biki hoe-ru'
+        assert [i.value() for i in i1['w']] == ['inu=ga', 'san-biki', 'hoe-ru']
+        assert [i.value() for i in i1['m']] == ['inu', 'ga']
+        assert i1['m']['m2'].span(0, 1) == 'g'
+        assert i1['m']['m2'].tier.igt is i1
+        i3 = view['i3']
+        assert i3['p']['p1'].value() is None
+        assert i3['p']['p2'].value() == ''
+
+    def test_read_only(self, view):
+        i1 = view['i1']
+        w = i1['w']
+        w1 = w['w1']
+        changes = [
+            lambda: setattr(view, 'id', 'x'),
+            lambda: setattr(view, 'metadata', []),
+            lambda: setattr(i1, 'id', 'x'),
+            lambda: setattr(i1, 'type', 'x'),
+            lambda: setattr(i1, 'attributes', {}),
+            lambda: setattr(i1, 'nsmap', {}),
+            lambda: setattr(w, 'namespace', 'http://example.org/x'),
+            lambda: setattr(w, 'segmentation', 'x'),
+            lambda: setattr(w1, 'text', 'x'),
+            lambda: setattr(w1, 'alignment', 'x'),
+            lambda: setattr(w1, 'content', 'x'),
+        ]
+        for change in changes:
+            with pytest.raises(XigtError):
+                change()
+        with pytest.raises(TypeError):
+            w1.attributes['segmentation'] = 'x'
+        with pytest.raises(AttributeError):
+            view.metadata.append(Metadata())
+        assert i1.id == 'i1' and i1.type == 'odin'
+        assert w.segmentation == 'p'
+        assert w1.segmentation == 'p1[0:6]'
+        assert w1.value() == 'inu=ga'
+        assert view.metadata[0][0].text == 'meta text'
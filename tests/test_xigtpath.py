@@ -89,9 +89,31 @@ class TestXigtPath():
         assert xp.find(xc1, '//tier[@type="phrases"]') == xc1[0][0]
         assert xp.find(xc1, '//tier[@type="translations"]') == xc1[0][1]
         assert xp.find(xc1, '//tier[@type="phrases"]/item') == xc1[0][0][0]
+        assert xp.findall(xc3, '//tier[@type="glosses"]') == [xc3[0][3]]
+        assert xp.findall(xc3, '//tier[@type="glosses"][@id="g"]') == [xc3[0][3]]
+        assert xp.findall(xc3, '//tier[@type="glosses"][@id="x"]') == []
+        assert xp.findall(xc3, '//tier[@type="foo"]') == []
+        assert xp.findall(xc3[0], '//tier[@type="words"]') == [xc3[0][1]]
+        assert xp.findall(xc3, '//tier[@segmentation]') == [xc3[0][1], xc3[0][2]]
+        assert xp.findall(xc3, '//tier[@foo]') == []
         assert xp.find(xc1, '//item[../@type="translations"]') == xc1[0][1][0]
         assert xp.find(xc3, '//item[../@type="glosses"][value()="NOM"]') == xc3[0][3][1]
 
+    def test_predicate_after_changes(self):
+        # //tier[@type=...] on a corpus uses the corpus index
+        xc = XigtCorpus(igts=[xc3[0].copy()])
+        igt = xc[0]
+        assert xp.findall(xc, '//tier[@type="glosses"]') == [igt['g']]
+        igt.append(Tier(id='n', type='glosses'))
+        assert xp.findall(xc, '//tier[@type="glosses"]') == [igt['g'], igt['n']]
+        igt['w'].type = 'glosses'
+        assert xp.findall(xc, '//tier[@type="words"]') == []
+        assert xp.findall(xc, '//tier[@type="glosses"]') == [igt['w'], igt['g'], igt['n']]
+        igt.remove(igt['g'])
+        assert xp.findall(xc, '//tier[@type="glosses"]') == [igt['w'], igt['n']]
+        igt['w'].type = 'words'
+        assert xp.findall(xc, '//tier[@type="words"]') == [igt['w']]
+
     def test_text(self):
         assert xp.find(xc1, '//item/text()') == 'inu=ga san-biki hoe-ru'
 
@@ -130,6 +152,24 @@ class TestXigtPath():
         assert xp.findall(xc3, '//item[../@type="phrases"]/referrer("alignment")') == [xc3[0][5][0]]
         assert xp.findall(xc3, '//item[../@type="words"]/referrer("segmentation")') == [xc3[0][2][0], xc3[0][2][1], xc3[0][2][2], xc3[0][2][3], xc3[0][2][4], xc3[0][2][5]]
 
+    def test_find_referrer_after_changes(self):
+        igt = xc3[0].copy()
+        assert xp.findall(igt, 'tier[@id="m"]/referrer()') == [igt['g']]
+        assert xp.findall(igt, 'tier[@id="g"]/item[@id="g1"]/referrer()') == []
+        igt.append(Tier(id='n', alignment='g', items=[
+            Item(id='n1', alignment='g1')
+        ]))
+        igt['m'].append(Item(id='m7', segmentation='w3[0:1]'))
+        igt['g'].append(Item(id='g7', alignment='m7'))
+        assert xp.findall(igt, 'tier[@id="g"]/referrer()') == [igt['n']]
+        assert xp.findall(igt, 'tier[@id="g"]/item[@id="g1"]/referrer()') == [igt['n']['n1']]
+        assert xp.findall(igt, 'tier[@id="m"]/item[@id="m7"]/referrer()') == [igt['g']['g7']]
+        igt['n']['n1'].alignment = 'g7'
+        assert xp.findall(igt, 'tier[@id="g"]/item[@id="g1"]/referrer()') == []
+        assert xp.findall(igt, 'tier[@id="g"]/item/referrer("alignment")') == [igt['n']['n1']]
+        igt.remove(igt['n'])
+        assert xp.findall(igt, 'tier[@id="g"]/referrer()') == []
+
     def test_disjunction(self):
         assert xp.find(xc1, '(/igt/tier[@type="phrases"] | /igt/tier[@type="translations"])') == xc1[0][0]
         assert xp.findall(xc1, '(/igt/tier[@type="phrases"] | /igt/tier[@type="translations"])') == [xc1[0][0], xc1[0][1]]
@@ -5,7 +5,8 @@ from xigt.model import (
     XigtCorpus,
     Igt,
     Tier,
-    Item
+    Item,
+    IgtSource
 )
 
 from xigt.metadata import (
@@ -0,0 +1,211 @@
+"""
+Decoding corpora from asyncio streams.
+
+The functions and classes here decode XigtXML or XigtJSON data as it
+arrives, such as an upload to a web service, and give each |Igt| as
+soon as it is complete. Only a chunk of data is decoded at a time, so
+the event loop is not blocked for long, and memory use depends on the
+size of the IGTs and not of the whole document.
+
+`iter_igts()` reads a stream and yields the IGTs as an asynchronous
+iterator. The stream is only read as fast as the IGTs are used, so a
+slow consumer slows down the sender (e.g., through the flow control
+of an `asyncio.StreamReader`):
+
+    >>> from xigt import aio
+    >>> async def handle(reader, writer):
+    ...     async for igt in aio.iter_igts(reader):
+    ...         await process(igt)
+
+`load()` reads a whole stream into a |XigtCorpus|. When the data is
+pushed instead (e.g., from the messages of a websocket), a |Decoder|
+is fed the data and iterated separately; feeding waits while too many
+decoded IGTs are waiting to be used:
+
+    >>> decoder = aio.Decoder(format='json')
+    >>> async def receive(messages):
+    ...     async for data in messages:
+    ...         await decoder.feed(data)
+    ...     await decoder.close()
+    >>> async def consume():
+    ...     async for igt in decoder:
+    ...         await process(igt)
+
+In all cases, each |Igt| has a |XigtCorpus| with the corpus-level
+attributes and metadata as its parent (`igt.corpus`), but it is not
+added to the corpus. For XigtJSON, the `igts` member must be the last
+of the corpus object, as `xigtjson.dump()` writes it.
+"""
+
+import asyncio
+from collections import deque
+
+from xigt.codecs import xigtxml, xigtjson
+from xigt.errors import XigtError
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_MAX_PENDING = 100
+
+_decoders = {
+    'xml': xigtxml.XigtXMLParser,
+    'json': xigtjson._IncrementalDecoder,
+}
+
+
+def _decoder(format, validate):
+    try:
+        cls = _decoders[format]
+    except KeyError:
+        raise XigtError('Invalid format: {}'.format(format))
+    return cls(validate=validate)
+
+
+async def _chunks(stream, chunk_size):
+    # a stream with a read() coroutine (e.g., asyncio.StreamReader) or
+    # an asynchronous iterable of chunks
+    if hasattr(stream, 'read'):
+        while True:
+            data = await stream.read(chunk_size)
+            if not data:
+                break
+            yield data
+    else:
+        async for data in stream:
+            yield data
+
+
+async def iter_igts(stream, format='xml', validate=True,
+                    chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode and yield the IGTs of the corpus read from *stream*.
+
+    Args:
+        stream: an object with a `read(n)` coroutine (e.g., an
+            `asyncio.StreamReader`) or an asynchronous iterable of
+            chunks of bytes or text
+        format: `"xml"` or `"json"`
+        validate: if `False`, trust the data as for `xigtxml.load()`
+        chunk_size: the number of bytes to read at a time
+    """
+    decoder = _decoder(format, validate)
+    async for data in _chunks(stream, chunk_size):
+        decoder.feed(data)
+        for igt in decoder.read_igts():
+            yield igt
+    decoder.close()
+    for igt in decoder.read_igts():
+        yield igt
+
+
+async def load(stream, format='xml', validate=True,
+               chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode the corpus read from *stream* and return a |XigtCorpus|
+    with all its IGTs. The arguments are as for `iter_igts()`.
+    """
+    decoder = _decoder(format, validate)
+    igts = []
+    async for data in _chunks(stream, chunk_size):
+        decoder.feed(data)
+        igts.extend(decoder.read_igts())
+    decoder.close()
+    igts.extend(decoder.read_igts())
+    xc = decoder.corpus
+    xc.extend(igts)
+    return xc
+
+
+class Decoder(object):
+    """
+    A decoder that is fed data and iterated for the decoded IGTs.
+
+    `feed()` waits while more than *max_pending* decoded IGTs have not
+    been taken by an iteration. If the data cannot be decoded, `feed()`
+    or `close()` raise the error, and so does the iteration once the
+    IGTs decoded before it are taken.
+
+    Args:
+        format: `"xml"` or `"json"`
+        validate: if `False`, trust the data as for `xigtxml.load()`
+        max_pending: the number of decoded IGTs to keep before `feed()`
+            waits for them to be taken
+    """
+
+    def __init__(self, format='xml', validate=True,
+                 max_pending=DEFAULT_MAX_PENDING):
+        if max_pending < 1:
+            raise XigtError('max_pending must be at least 1.')
+        self._decoder = _decoder(format, validate)
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._done = False
+        self._error = None
+        # created when first used, in the running event loop
+        self._readable = None  # set when IGTs are pending or done
+        self._writable = None  # set when few enough IGTs are pending
+
+    @property
+    def corpus(self):
+        """
+        The |XigtCorpus| for the corpus-level attributes and metadata,
+        or `None` if they have not been decoded yet.
+        """
+        return self._decoder.corpus
+
+    def _events(self):
+        if self._readable is None:
+            self._readable = asyncio.Event()
+            self._writable = asyncio.Event()
+            self._writable.set()
+        return self._readable, self._writable
+
+    def _deliver(self, decode, *args):
+        readable, writable = self._events()
+        if self._done:
+            raise XigtError('The decoder is closed.')
+        try:
+            decode(*args)
+        except Exception as exc:
+            self._error = exc
+            self._done = True
+            readable.set()
+            raise
+        finally:
+            self._pending.extend(self._decoder.read_igts())
+        if self._pending:
+            readable.set()
+        return writable
+
+    async def feed(self, data):
+        """
+        Decode the chunk *data* of bytes or text, waiting while too
+        many decoded IGTs are pending.
+        """
+        writable = self._deliver(self._decoder.feed, data)
+        while len(self._pending) > self.max_pending:
+            writable.clear()
+            await writable.wait()
+
+    async def close(self):
+        """Finish decoding; the data fed so far must be complete."""
+        self._deliver(self._decoder.close)
+        self._done = True
+        self._readable.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        readable, writable = self._events()
+        pending = self._pending
+        while not pending:
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                raise StopAsyncIteration
+            readable.clear()
+            await readable.wait()
+        igt = pending.popleft()
+        if len(pending) <= self.max_pending:
+            writable.set()
+        return igt
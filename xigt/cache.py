@@ -0,0 +1,221 @@
+"""
+XigtXML corpora with a bounded number of decoded IGTs in memory.
+
+A |CachedCorpus| gives random access to every IGT of a XigtXML file by
+position or id, like a fully loaded |XigtCorpus|, but keeps only the
+most recently used IGTs. The others are decoded again from the file
+when they are next used, using the byte offsets found when the corpus
+is opened (see `xigtxml.scan_igts()`). The `cached` mode of
+`xigtxml.load()` returns one, with the default limits unless
+*max_igts* or *max_bytes* are given:
+
+    >>> from xigt.codecs import xigtxml
+    >>> xc = xigtxml.load('big.xml', mode='cached', max_igts=100)
+    >>> igt = xc['igt3482']
+
+or it can be made directly:
+
+    >>> from xigt.cache import CachedCorpus
+    >>> with CachedCorpus('big.xml', max_igts=None,
+    ...                   max_bytes=256 * 1024 * 1024) as xc:
+    ...     print(xc[-1].id)
+
+Limiting the bytes measures each IGT as it is decoded (see
+`xigt.memory.memory_usage()`), which makes decoding a little slower.
+"""
+
+from collections import OrderedDict, namedtuple
+
+from xigt import compression
+from xigt.codecs import xigtxml
+from xigt.consts import CACHED
+from xigt.errors import XigtError
+from xigt.memory import memory_usage
+from xigt.metadata import XigtMetadataMixin
+from xigt.mixins import (
+    XigtAttributeMixin,
+    XigtContainerMixin,
+    _invalidate_nsmaps
+)
+
+DEFAULT_MAX_IGTS = 1000
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'igts', 'bytes'))
+
+
+class CachedCorpus(XigtAttributeMixin, XigtMetadataMixin):
+    """
+    A read-only XigtXML corpus keeping the most recently used IGTs.
+
+    The corpus has the corpus-level attributes and metadata of a
+    |XigtCorpus| and list-like access to its IGTs by position or id.
+    While an |Igt| is in the cache, the same object is returned; after
+    it is evicted, a new one is decoded, so changes made to IGTs are
+    not kept. XigtPath queries (see `xigt.xigtpath`) visit the IGTs
+    through the cache, and `xigtxml.dump()` and `xigtxml.dumps()`
+    write the corpus as they do an unloaded |XigtCorpus|.
+
+    Args:
+        f: the path of an uncompressed or BGZF-compressed XigtXML
+            file (see `xigt.compression`) or an open, seekable binary
+            file
+        max_igts: the most IGTs to keep (`None` for no limit)
+        max_bytes: the most bytes of IGTs to keep, as measured by
+            `xigt.memory.memory_usage()` (`None` for no limit)
+        validate: if `False`, trust the data as for `xigtxml.load()`
+    """
+
+    mode = CACHED
+
+    def __init__(self, f, max_igts=DEFAULT_MAX_IGTS, max_bytes=None,
+                 validate=True):
+        if max_igts is not None and max_igts < 1:
+            raise XigtError('max_igts must be at least 1.')
+        if max_bytes is not None and max_bytes < 1:
+            raise XigtError('max_bytes must be at least 1.')
+        self.max_igts = max_igts
+        self.max_bytes = max_bytes
+        self.validate = validate
+        if hasattr(f, 'read'):
+            self.path = getattr(f, 'name', None)
+            self._fh = f
+            self._close = False
+        else:
+            self.path = f
+            self._fh = compression.open(f, 'rb', random_access=True)
+            self._close = True
+        fh = self._fh
+        try:
+            base = fh.tell()
+            scan = xigtxml.scan_igts(fh)
+            # only decodes up to the first IGT
+            xc = xigtxml.load(fh, mode='transient')
+            fh.seek(base)
+        except Exception:
+            self.close()
+            raise
+        self._header = scan.header
+        self._footer = scan.footer
+        self._offsets = [(base + start, base + end)
+                         for start, end in scan.offsets]
+        self._ids = scan.ids
+        self._positions = None
+        self._parent = None
+        XigtAttributeMixin.__init__(
+            self, id=xc.id, type=xc.type, attributes=xc.attributes,
+            namespace=xc.namespace, nsmap=xc._nsmap
+        )
+        XigtMetadataMixin.__init__(self)
+        self.metadata = list(xc.metadata)
+        self._cache = OrderedDict()  # position: (igt, bytes)
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def __repr__(self):
+        return '<CachedCorpus of {} with {} Igts at {}>'.format(
+            self.path, len(self), str(id(self))
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Clear the cache and close the file if it was opened here."""
+        self.clear_cache()
+        if self._close:
+            self._fh.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for position in range(len(self._offsets)):
+            yield self._load(position)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self._load(i)
+                    for i in range(*key.indices(len(self._offsets)))]
+        if isinstance(key, int):
+            n = len(self._offsets)
+            if key < 0:
+                key += n
+            if not 0 <= key < n:
+                raise IndexError('IGT index out of range: {}'.format(key))
+            return self._load(key)
+        if self._positions is None:
+            self._positions = {}
+            for i, igt_id in enumerate(self._ids):
+                self._positions.setdefault(igt_id, i)
+        try:
+            return self._load(self._positions[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def get(self, obj_id, default=None):
+        try:
+            return self[obj_id]
+        except (KeyError, IndexError):
+            return default
+
+    def ids(self):
+        """Return the list of IGT ids in corpus order."""
+        return list(self._ids)
+
+    @property
+    def igts(self):
+        return list(self)
+
+    # for XigtPath queries, which visit each IGT in turn
+    select = XigtContainerMixin.select
+
+    def cache_info(self):
+        """
+        Return the cache statistics as a `CacheInfo` tuple of the
+        numbers of *hits* and *misses* and the current numbers of
+        cached *igts* and their *bytes* (`0` unless `max_bytes` is
+        set).
+        """
+        return CacheInfo(self._hits, self._misses, len(self._cache),
+                         self._bytes)
+
+    def clear_cache(self):
+        """Forget the cached IGTs so they can be garbage-collected."""
+        self._cache.clear()
+        self._bytes = 0
+
+    def _load(self, position):
+        cache = self._cache
+        entry = cache.get(position)
+        if entry is not None:
+            cache.move_to_end(position)
+            self._hits += 1
+            return entry[0]
+        self._misses += 1
+        start, end = self._offsets[position]
+        igt = xigtxml.load_igt_at(self._fh, start, end, self._header,
+                                  self._footer, validate=self.validate)
+        igt._parent = self
+        _invalidate_nsmaps(igt)
+        size = 0
+        if self.max_bytes is not None:
+            size = memory_usage(igt)['total']
+            self._bytes += size
+        cache[position] = (igt, size)
+        self._evict()
+        return igt
+
+    def _evict(self):
+        # the most recently used IGT is kept even if it is too large
+        cache = self._cache
+        max_igts = self.max_igts
+        max_bytes = self.max_bytes
+        while len(cache) > 1 and (
+                (max_igts is not None and len(cache) > max_igts)
+                or (max_bytes is not None and self._bytes > max_bytes)):
+            _, (_, size) = cache.popitem(last=False)
+            self._bytes -= size
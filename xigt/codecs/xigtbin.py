@@ -0,0 +1,688 @@
+
+"""
+A compact binary encoding of Xigt corpora.
+
+The format stores the same information as the model (and thus as
+XigtXML), so corpora round-trip losslessly through it. Identifiers,
+types, attribute names, namespace URIs, and similar strings are
+interned in a string table, and all structure is written with
+variable-length integers (varints). A file looks like this:
+
+    file    := MAGIC frame(corpus) frame(igt)* 0x00 footer trailer
+    frame   := varint(len) varint(len(strings)) strings body
+    footer  := table varint(#igts) (varint(offset delta) ref(igt id))*
+    trailer := uint64(footer offset) b'XBIN'
+
+Each frame lists the strings it adds to the table before using them,
+so a file can be read front to back from a stream. The footer repeats
+the full string table and gives the offset and id of each IGT frame,
+so a seekable file can also be read in any order with :class:`Reader`.
+
+    >>> from xigt.codecs import xigtbin
+    >>> xigtbin.dump('corpus.xigtb', xc)
+    >>> with xigtbin.Reader('corpus.xigtb') as r:
+    ...     igt = r['igt1']
+"""
+
+import struct
+from io import BytesIO
+from functools import partial
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt import profiling as _profiling
+from xigt import compression
+from xigt.consts import FULL, TRANSIENT
+from xigt.model import IgtSource
+from xigt.errors import XigtError
+
+MAGIC = b'XIGTB\x00\x00\x01'
+TRAILER = struct.Struct('<Q4s')
+TRAILER_MAGIC = b'XBIN'
+
+##############################################################################
+##############################################################################
+# Pickle-API methods
+
+
+def load(fh, mode='full'):
+    if hasattr(fh, 'read'):
+        return decode(fh, mode=mode)
+    elif mode == FULL:
+        with compression.open(fh, 'rb') as fh_:
+            return decode(fh_, mode=mode)
+    else:
+        # the IGTs are read from the file again for each iteration
+        source = IgtSource(partial(_iter_igts, fh), partial(count_igts, fh))
+        with compression.open(fh, 'rb') as fh_:
+            return decode(fh_, mode=mode, igts=source)
+
+
+def _iter_igts(path):
+    with compression.open(path, 'rb') as fh:
+        for igt in decode(fh, mode=TRANSIENT):
+            yield igt
+
+
+def count_igts(f):
+    """
+    Return the number of IGTs in a xigtbin file from its offset table,
+    without decoding them.
+
+    Args:
+        f: a filename or a seekable binary file
+    """
+    if hasattr(f, 'read'):
+        pos = f.tell()
+        try:
+            return len(Reader(f))
+        finally:
+            f.seek(pos)
+    if compression.detect(f) not in (None, 'bgzf'):
+        # the offset table cannot be reached without decompressing
+        # the whole file, so count the frames on the way
+        with compression.open(f, 'rb') as fh:
+            return _count_frames(fh)
+    with Reader(f) as r:
+        return len(r)
+
+
+def _count_frames(fh):
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise XigtError('Not a xigtbin file.')
+    n = -1  # the first frame is the corpus
+    while True:
+        size = _read_file_varint(fh)
+        if size == 0:
+            return n
+        if len(fh.read(size)) != size:
+            raise XigtError('Unexpected end of xigtbin data.')
+        n += 1
+
+
+def loads(s):
+    return decode(BytesIO(s))
+
+
+def dump(f, xc):
+    if not isinstance(xc, XigtCorpus):
+        raise XigtError(
+            'Second argument of dump() must be an instance of XigtCorpus.'
+        )
+    with _profiling.phase('xigtbin.write'), Writer(f, xc) as writer:
+        for igt in xc:
+            writer.write(igt)
+
+
+def dumps(xc):
+    if not isinstance(xc, XigtCorpus):
+        raise XigtError(
+            'First argument of dumps() must be an instance of XigtCorpus.'
+        )
+    f = BytesIO()
+    dump(f, xc)
+    return f.getvalue()
+
+
+# Varints and Strings ##################################################
+
+def _write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data, pos):
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    n = b & 0x7f
+    shift = 7
+    pos += 1
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _write_text(out, s):
+    # inline strings: 0 for None, otherwise the byte length + 1
+    if s is None:
+        out.append(0)
+    else:
+        b = s.encode('utf-8')
+        _write_varint(out, len(b) + 1)
+        out += b
+
+
+def _read_text(data, pos):
+    n, pos = _read_varint(data, pos)
+    if n == 0:
+        return None, pos
+    end = pos + n - 1
+    return data[pos:end].decode('utf-8'), end
+
+
+def _read_file_varint(fh):
+    n = shift = 0
+    while True:
+        b = fh.read(1)
+        if not b:
+            raise XigtError('Unexpected end of xigtbin data.')
+        b = b[0]
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n
+        shift += 7
+
+
+# Encoding #############################################################
+
+class _Encoder(object):
+    # the string table and the encoding of objects into frames
+
+    def __init__(self):
+        self._strings = {}
+        self._new = []
+
+    def _frame(self, encode, obj):
+        body = bytearray()
+        encode(body, obj)
+        strings = bytearray()
+        _write_varint(strings, len(self._new))
+        for s in self._new:
+            _write_text(strings, s)
+        del self._new[:]
+        header = bytearray()
+        payload_len = len(strings) + len(body)
+        _write_varint(header, payload_len)
+        return header + strings + body
+
+    def _ref(self, out, s):
+        # interned strings: 0 for None, otherwise the table index + 1
+        if s is None:
+            out.append(0)
+            return
+        strings = self._strings
+        idx = strings.get(s)
+        if idx is None:
+            idx = strings[s] = len(strings)
+            self._new.append(s)
+        _write_varint(out, idx + 1)
+
+    def _encode_common(self, out, obj):
+        ref = self._ref
+        ref(out, obj.id)
+        ref(out, obj.type)
+        ref(out, obj.namespace)
+        nsmap = obj._nsmap
+        if nsmap is None:
+            out.append(0)
+        else:
+            _write_varint(out, len(nsmap) + 1)
+            for prefix, uri in nsmap.items():
+                ref(out, prefix)
+                ref(out, uri)
+        _write_varint(out, len(obj.attributes))
+        for key, val in obj.attributes.items():
+            ref(out, key)
+            _write_text(out, val)
+
+    def _encode_metadata_list(self, out, mds):
+        _write_varint(out, len(mds))
+        for md in mds:
+            self._encode_common(out, md)
+            _write_varint(out, len(md))
+            for meta in md:
+                self._encode_common(out, meta)
+                _write_text(out, meta.text)
+                self._encode_metachildren(out, meta)
+
+    def _encode_metachildren(self, out, obj):
+        _write_varint(out, len(obj))
+        for mc in obj:
+            self._ref(out, mc.name)
+            self._encode_common(out, mc)
+            _write_text(out, mc.text)
+            self._encode_metachildren(out, mc)
+
+    def _encode_corpus(self, out, xc):
+        self._encode_common(out, xc)
+        self._encode_metadata_list(out, xc.metadata)
+
+    def _encode_igt(self, out, igt):
+        self._encode_common(out, igt)
+        self._encode_metadata_list(out, igt.metadata)
+        _write_varint(out, len(igt))
+        for tier in igt:
+            self._encode_common(out, tier)
+            self._encode_metadata_list(out, tier.metadata)
+            _write_varint(out, len(tier))
+            for item in tier:
+                self._encode_common(out, item)
+                _write_text(out, item.text)
+
+
+class Writer(_Encoder):
+    """
+    Write a corpus to a file one IGT at a time.
+
+    The corpus-level attributes and metadata of *xc* are written
+    immediately, but not its IGTs; write those with :meth:`write` and
+    then call :meth:`close` to write the footer. Only the bytes of the
+    current IGT are buffered, so *f* may be any writable binary file,
+    including unseekable ones.
+
+    Args:
+        f: a filename or a binary file opened for writing
+        xc: the |XigtCorpus| providing corpus-level information; if
+            `None`, an empty corpus is assumed
+    """
+
+    def __init__(self, f, xc=None):
+        if hasattr(f, 'write'):
+            self._fh = f
+            self._close_fh = False
+        else:
+            self._fh = compression.open(f, 'wb')
+            self._close_fh = True
+        _Encoder.__init__(self)
+        self._pos = 0
+        self._offsets = []
+        self._ids = []
+        self._write(MAGIC)
+        if xc is None:
+            xc = XigtCorpus()
+        self._write(self._frame(self._encode_corpus, xc))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, igt):
+        """Write |Igt| *igt* to the file."""
+        self._offsets.append(self._pos)
+        self._ids.append(igt.id)
+        self._write(self._frame(self._encode_igt, igt))
+
+    def close(self):
+        """Write the footer and close the file if it was opened here."""
+        if self._fh is None:
+            return
+        footer_pos = self._pos + 1
+        out = bytearray([0])  # end of frames
+        _write_varint(out, len(self._strings))
+        for s in sorted(self._strings, key=self._strings.get):
+            _write_text(out, s)
+        _write_varint(out, len(self._offsets))
+        prev = 0
+        for offset, igt_id in zip(self._offsets, self._ids):
+            _write_varint(out, offset - prev)
+            self._ref(out, igt_id)
+            prev = offset
+        out += TRAILER.pack(footer_pos, TRAILER_MAGIC)
+        self._write(out)
+        if self._close_fh:
+            self._fh.close()
+        self._fh = None
+
+    def _write(self, data):
+        self._fh.write(data)
+        self._pos += len(data)
+
+
+def encode_igt(igt):
+    """
+    Return a self-contained encoding of |Igt| *igt* as bytes.
+
+    The result is a frame with its own string table, so it can be
+    stored and decoded (with `decode_igt()`) apart from any file.
+    """
+    encoder = _Encoder()
+    return bytes(encoder._frame(encoder._encode_igt, igt))
+
+
+# Decoding #############################################################
+
+def decode(fh, mode='full', close=False, igts=None):
+    """
+    Decode a corpus from binary file *fh*, reading it front to back.
+
+    In `transient` and `incremental` modes, IGTs are decoded as the
+    corpus is iterated. If *close* is `True`, *fh* is closed after the
+    last IGT is read. If *igts* is given, it is used for the IGTs of
+    the corpus instead of reading them from *fh* (e.g., an |IgtSource|
+    reading them from the file again).
+    """
+    if _profiling.enabled:
+        fh = _profiling.CountingReader(fh)
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise XigtError('Not a xigtbin file.')
+    strings = [None]  # ref 0 is None
+    data, pos = _next_frame(fh, strings)
+
+    def frames():
+        try:
+            while True:
+                frame = _next_frame(fh, strings)
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            if close:
+                fh.close()
+
+    def decode_frame(frame):
+        return _decode_igt(frame[0], frame[1], strings)
+
+    if igts is None:
+        if _profiling.enabled:
+            igts = _profiling.decoded('xigtbin', decode_frame, frames())
+        else:
+            igts = (decode_frame(frame) for frame in frames())
+    return _decode_corpus(data, pos, strings, igts, mode)
+
+
+def decode_igt(data):
+    """Decode an |Igt| from bytes encoded with `encode_igt()`."""
+    strings = [None]
+    return _decode_igt(data, _read_frame_strings(data, strings), strings)
+
+
+def _read_frame_strings(data, strings):
+    # add the strings at the start of the frame in data to the table
+    # and return the position of the frame's body
+    _, pos = _read_varint(data, 0)  # frame length
+    n, pos = _read_varint(data, pos)
+    for _ in range(n):
+        s, pos = _read_text(data, pos)
+        strings.append(s)
+    return pos
+
+
+def _next_frame(fh, strings):
+    # read the next frame, add its strings to the table, and return
+    # the frame and the position of its body, or None after the last
+    size = _read_file_varint(fh)
+    if size == 0:
+        return None
+    data = fh.read(size)
+    if len(data) != size:
+        raise XigtError('Unexpected end of xigtbin data.')
+    n, pos = _read_varint(data, 0)
+    for _ in range(n):
+        s, pos = _read_text(data, pos)
+        strings.append(s)
+    return data, pos
+
+
+def _skip_strings(data, pos):
+    n, pos = _read_varint(data, pos)
+    for _ in range(n):
+        size, pos = _read_varint(data, pos)
+        if size:
+            pos += size - 1
+    return pos
+
+
+def _decode_common(data, pos, strings):
+    # this is the innermost loop of decoding, so one-byte varints
+    # (nearly all of them) are read inline
+    rv = _read_varint
+    i = data[pos]
+    if i < 0x80: pos += 1
+    else: i, pos = rv(data, pos)
+    id = strings[i]
+    i = data[pos]
+    if i < 0x80: pos += 1
+    else: i, pos = rv(data, pos)
+    type = strings[i]
+    i = data[pos]
+    if i < 0x80: pos += 1
+    else: i, pos = rv(data, pos)
+    namespace = strings[i]
+    n, pos = rv(data, pos)
+    nsmap = None
+    if n:
+        nsmap = {}
+        for _ in range(n - 1):
+            i, pos = rv(data, pos)
+            j, pos = rv(data, pos)
+            nsmap[strings[i]] = strings[j]
+    n = data[pos]
+    if n < 0x80: pos += 1
+    else: n, pos = rv(data, pos)
+    attributes = {}
+    for _ in range(n):
+        i = data[pos]
+        if i < 0x80: pos += 1
+        else: i, pos = rv(data, pos)
+        size = data[pos]
+        if size < 0x80: pos += 1
+        else: size, pos = rv(data, pos)
+        if size:
+            end = pos + size - 1
+            attributes[strings[i]] = data[pos:end].decode('utf-8')
+            pos = end
+        else:
+            attributes[strings[i]] = None
+    return id, type, namespace, nsmap, attributes, pos
+
+
+def _decode_metadata_list(data, pos, strings):
+    mds = []
+    n, pos = _read_varint(data, pos)
+    for _ in range(n):
+        id, type, ns, nsmap, attrs, pos = _decode_common(data, pos, strings)
+        metas = []
+        m, pos = _read_varint(data, pos)
+        for _ in range(m):
+            meta, pos = _decode_meta(data, pos, strings)
+            metas.append(meta)
+        mds.append(Metadata(id=id, type=type, attributes=attrs, metas=metas,
+                            namespace=ns, nsmap=nsmap))
+    return mds, pos
+
+
+def _decode_meta(data, pos, strings):
+    id, type, ns, nsmap, attrs, pos = _decode_common(data, pos, strings)
+    text, pos = _read_text(data, pos)
+    children, pos = _decode_metachildren(data, pos, strings)
+    meta = Meta(id=id, type=type, attributes=attrs, text=text,
+                children=children, namespace=ns, nsmap=nsmap)
+    return meta, pos
+
+
+def _decode_metachildren(data, pos, strings):
+    children = []
+    n, pos = _read_varint(data, pos)
+    for _ in range(n):
+        i, pos = _read_varint(data, pos)
+        name = strings[i]
+        _, _, ns, nsmap, attrs, pos = _decode_common(data, pos, strings)
+        text, pos = _read_text(data, pos)
+        grandchildren, pos = _decode_metachildren(data, pos, strings)
+        children.append(MetaChild(name, attributes=attrs, text=text,
+                                  children=grandchildren, namespace=ns,
+                                  nsmap=nsmap))
+    return children, pos
+
+
+def _decode_corpus(data, pos, strings, igts, mode):
+    id, type, ns, nsmap, attrs, pos = _decode_common(data, pos, strings)
+    metadata, pos = _decode_metadata_list(data, pos, strings)
+    return XigtCorpus(id=id, type=type, attributes=attrs, metadata=metadata,
+                      igts=igts, mode=mode, namespace=ns, nsmap=nsmap)
+
+
+def _decode_igt(data, pos, strings):
+    rv = _read_varint
+    id, type, ns, nsmap, attrs, pos = _decode_common(data, pos, strings)
+    metadata, pos = _decode_metadata_list(data, pos, strings)
+    tiers = []
+    n, pos = rv(data, pos)
+    for _ in range(n):
+        t_id, t_type, t_ns, t_nsmap, t_attrs, pos = _decode_common(
+            data, pos, strings
+        )
+        t_metadata, pos = _decode_metadata_list(data, pos, strings)
+        items = []
+        m, pos = rv(data, pos)
+        for _ in range(m):
+            i_id, i_type, i_ns, i_nsmap, i_attrs, pos = _decode_common(
+                data, pos, strings
+            )
+            text, pos = _read_text(data, pos)
+            items.append(Item(id=i_id, type=i_type, attributes=i_attrs,
+                              text=text, namespace=i_ns, nsmap=i_nsmap))
+        tiers.append(Tier(id=t_id, type=t_type, attributes=t_attrs,
+                          metadata=t_metadata, items=items,
+                          namespace=t_ns, nsmap=t_nsmap))
+    return Igt(id=id, type=type, attributes=attrs, metadata=metadata,
+               tiers=tiers, namespace=ns, nsmap=nsmap)
+
+
+# Random Access ########################################################
+
+def read_trailer(data):
+    """Return the footer offset from the trailer bytes *data*."""
+    footer_pos, magic = TRAILER.unpack(data)
+    if magic != TRAILER_MAGIC:
+        raise XigtError('Invalid or truncated xigtbin file.')
+    return footer_pos
+
+
+def read_footer(data):
+    """
+    Decode the footer bytes *data* and return a tuple of the string
+    table, the IGT frame offsets, and the IGT ids. The string table
+    begins with `None` so string references can index it directly.
+    """
+    n, pos = _read_varint(data, 0)
+    strings = [None]  # ref 0 is None
+    for _ in range(n):
+        s, pos = _read_text(data, pos)
+        strings.append(s)
+    n, pos = _read_varint(data, pos)
+    offsets = []
+    ids = []
+    offset = 0
+    for _ in range(n):
+        delta, pos = _read_varint(data, pos)
+        offset += delta
+        offsets.append(offset)
+        i, pos = _read_varint(data, pos)
+        ids.append(strings[i])
+    return strings, offsets, ids
+
+
+class Reader(object):
+    """
+    Random access to the IGTs of a xigtbin file.
+
+    IGTs are decoded on request by position or by id, using the offset
+    table in the file's footer. Each decoded |Igt| belongs to its own
+    |XigtCorpus| carrying the file's corpus-level attributes and
+    metadata, so namespaces and inherited attributes resolve as they
+    would in the full corpus.
+
+    Args:
+        f: a filename (of an uncompressed or BGZF-compressed file; see
+            `xigt.compression`) or a seekable binary file
+    """
+
+    def __init__(self, f):
+        if hasattr(f, 'read'):
+            self._fh = f
+            self._close_fh = False
+        else:
+            self._fh = compression.open(f, 'rb', random_access=True)
+            self._close_fh = True
+        fh = self._fh
+        fh.seek(0)
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise XigtError('Not a xigtbin file.')
+        fh.seek(-TRAILER.size, 2)
+        footer_end = fh.tell()
+        footer_pos = read_trailer(fh.read(TRAILER.size))
+        fh.seek(footer_pos)
+        strings, offsets, ids = read_footer(fh.read(footer_end - footer_pos))
+        self._strings = strings
+        self._offsets = offsets
+        self._ids = ids
+        self._positions = None
+        fh.seek(len(MAGIC))
+        self._corpus_frame = _next_frame(fh, [])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._close_fh:
+            self._fh.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for i in range(len(self._offsets)):
+            yield self._decode(i)
+
+    def __getitem__(self, key):
+        """
+        Return the |Igt| at position *key* if it is an integer, or the
+        one with id *key* otherwise.
+        """
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self._offsets)
+            if not 0 <= key < len(self._offsets):
+                raise IndexError('IGT index out of range: {}'.format(key))
+            return self._decode(key)
+        return self._decode(self.index(key))
+
+    def get(self, id, default=None):
+        """Return the |Igt| with id *id*, or *default* if none."""
+        try:
+            return self[id]
+        except KeyError:
+            return default
+
+    def ids(self):
+        """Return the list of IGT ids in document order."""
+        return list(self._ids)
+
+    def index(self, id):
+        """Return the position of the |Igt| with id *id*."""
+        if self._positions is None:
+            self._positions = {}
+            for i, igt_id in enumerate(self._ids):
+                self._positions.setdefault(igt_id, i)
+        try:
+            return self._positions[id]
+        except KeyError:
+            raise KeyError('No IGT with id: {}'.format(id))
+
+    def corpus(self):
+        """Return the corpus-level information as an empty |XigtCorpus|."""
+        data, pos = self._corpus_frame
+        pos = _skip_strings(data, 0)
+        return _decode_corpus(data, pos, self._strings, None, FULL)
+
+    def _decode(self, i):
+        fh = self._fh
+        fh.seek(self._offsets[i])
+        size = _read_file_varint(fh)
+        data = fh.read(size)
+        pos = _skip_strings(data, 0)
+        igt = _decode_igt(data, pos, self._strings)
+        self.corpus().append(igt)
+        return igt
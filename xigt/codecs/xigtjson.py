@@ -1,24 +1,43 @@
 
+import re
 import json
+import codecs
+from collections import deque
 
 from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt import profiling as _profiling
+from xigt import compression
+from xigt.mixins import _invalidate_nsmaps
+from xigt.consts import FULL
 from xigt.errors import XigtError
 
+# stands in for the IGTs when dump() writes the corpus object around them
+_PLACEHOLDER = '\x00igt\x00'
+
 ##############################################################################
 ##############################################################################
 # Pickle-API methods
 
 
-def load(fh, mode='full'):
-    if hasattr(fh, 'read'):
-        return decode(json.load(fh), mode=mode)
-    else:
-        with open(fh, 'r') as fh_:
-            return decode(json.load(fh_), mode=mode)
+def load(fh, mode='full', validate=True):
+    with _profiling.phase('xigtjson.parse'):
+        if hasattr(fh, 'read'):
+            obj = json.load(_reader(fh), object_hook=_pooling_hook())
+        else:
+            with compression.open(fh, 'rb') as fh_:
+                obj = json.load(_reader(fh_), object_hook=_pooling_hook())
+    return decode(obj, mode=mode, validate=validate)
+
 
+def _reader(fh):
+    return _profiling.CountingReader(fh) if _profiling.enabled else fh
 
-def loads(s):
-    return decode(json.loads(s))
+
+def loads(s, validate=True):
+    _profiling.count('bytes_read', len(s))
+    with _profiling.phase('xigtjson.parse'):
+        obj = json.loads(s, object_hook=_pooling_hook())
+    return decode(obj, validate=validate)
 
 
 def dump(f, xc, encoding='utf-8', indent=2):
@@ -26,12 +45,59 @@ def dump(f, xc, encoding='utf-8', indent=2):
         raise XigtError(
             'Second argument of dump() must be an instance of XigtCorpus.'
         )
-    data = encode(xc)
-    if hasattr(f, 'write'):
-        json.dump(data, f, indent=indent)
+    with _profiling.phase('xigtjson.write'):
+        if xc.mode != FULL:
+            # write unloaded IGTs as they are decoded instead of encoding
+            # the whole corpus first
+            if hasattr(f, 'write'):
+                _dump_incremental(f, xc, indent)
+            else:
+                with compression.open(f, 'w') as fh:
+                    _dump_incremental(fh, xc, indent)
+            return
+        data = encode(xc)
+        if hasattr(f, 'write'):
+            json.dump(data, f, indent=indent)
+        else:
+            with compression.open(f, 'w') as fh:
+                json.dump(data, fh, indent=indent)
+
+
+def _dump_incremental(f, xc, indent):
+    # Write the same text as json.dump() would for the whole corpus:
+    # the corpus object is encoded around a placeholder IGT, and the
+    # IGTs are encoded one by one in its place, indented to the depth
+    # of the "igts" list.
+    igts = iter(xc)
+    first = next(igts, None)
+    obj, ns = _make_obj(xc)
+    if xc.metadata:
+        obj['metadata'] = [encode_metadata(md, ns) for md in xc.metadata]
+    obj['igts'] = [] if first is None else [_PLACEHOLDER]
+    doc = json.dumps(obj, indent=indent)
+    if first is None:
+        f.write(doc)
+        return
+    head, tail = doc.rsplit(json.dumps(_PLACEHOLDER), 1)
+    f.write(head)
+    if indent is None:
+        sep, prefix = ', ', None
     else:
-        with open(f, 'w') as fh:
-            json.dump(data, fh, indent=indent)
+        if not isinstance(indent, str):
+            indent = ' ' * indent
+        prefix = '\n' + indent * 2
+        sep = ',' + prefix
+    igt = first
+    while igt is not None:
+        s = json.dumps(encode_igt(igt, ns), indent=indent)
+        if prefix is not None:
+            s = s.replace('\n', prefix)
+        f.write(s)
+        igt = next(igts, None)
+        if igt is not None:
+            f.write(sep)
+    f.write(tail)
+
 
 def dumps(xc, encoding='unicode', indent=2):
     if not isinstance(xc, XigtCorpus):
@@ -43,6 +109,26 @@ def dumps(xc, encoding='unicode', indent=2):
 
 # Helper Functions #####################################################
 
+def _pooling_hook():
+    # Return a JSON object hook that makes recurring string values (ids,
+    # types, attribute values) share one object per distinct value for
+    # the duration of a load. Object keys are already shared by the
+    # json module. Texts and IGT ids are rarely repeated, so they are
+    # not pooled.
+    pool = {}
+    intern = pool.setdefault
+
+    def hook(obj):
+        is_igt = 'tiers' in obj
+        for key, val in obj.items():
+            if (val.__class__ is str and key != 'text'
+                    and not (is_igt and key == 'id')):
+                obj[key] = intern(val, val)
+        return obj
+
+    return hook
+
+
 def ns_split(name):
     if ':' in name:
         return name.split(':', 1)
@@ -57,20 +143,180 @@ def validate(f):
 
 # Decoding #############################################################
 
-def decode(obj, mode='full', nsmap=None):
+def decode(obj, mode='full', nsmap=None, validate=True):
+    # if validate is False, the Igts, tiers, and items are trusted to
+    # be valid and are built with their unchecked() constructors
     nsmap = active_namespaces(obj, nsmap)
+    _decode_igt = decode_igt if validate else unchecked_decode_igt
+    with _profiling.phase('xigtjson.decode'):
+        igts = [_decode_igt(igt, nsmap) for igt in obj.get('igts', [])]
+    _profiling.count('igts_decoded', len(igts))
     return XigtCorpus(
         id=obj.get('id'),
         attributes=obj.get('attributes', {}),
         metadata=[decode_metadata(md, nsmap)
                   for md in obj.get('metadata', [])],
-        igts=[decode_igt(igt, nsmap)
-              for igt in obj.get('igts', [])],
+        igts=igts,
         mode=mode,
         namespace=obj.get('namespace'),
         nsmap=obj.get('namespaces')
     )
 
+_whitespace = re.compile(r'[ \t\n\r]*')
+_closers = {'{': '}', '[': ']', '"': '"'}
+
+
+class _IncrementalDecoder(object):
+    """
+    Decode a XigtJSON document fed in chunks of bytes or text.
+
+    Like `xigtxml.XigtXMLParser`, `read_igts()` yields the IGTs
+    completed by the data fed so far, and `corpus` is the |XigtCorpus|
+    (without IGTs) for the corpus-level attributes and metadata once
+    they are decoded, i.e., at the start of the `igts` list. The IGTs
+    have the corpus as their parent but are not added to it. The
+    `igts` member must be the last of the corpus object, as `dump()`
+    writes it.
+    """
+
+    def __init__(self, validate=True):
+        self._json = json.JSONDecoder(object_hook=_pooling_hook())
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decode_igt = decode_igt if validate else unchecked_decode_igt
+        self._validate = validate
+        self._buf = ''
+        self._pos = 0
+        self._state = 'start'  # start, members, igts, or end
+        self._members = {}
+        self._nsmap = None
+        self._closer = None  # the end of an incomplete object or array
+        self._igts = deque()
+        self.corpus = None
+
+    def feed(self, data):
+        _profiling.count('bytes_read', len(data))
+        if not isinstance(data, str):
+            data = self._text.decode(data)
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        # don't decode an incomplete value again until it may be complete
+        if self._closer is not None and self._closer not in data:
+            return
+        self._read(False)
+
+    def close(self):
+        self._buf = self._buf[self._pos:] + self._text.decode(b'', True)
+        self._pos = 0
+        self._read(True)
+        if self._state != 'end':
+            raise XigtError('Incomplete XigtJSON document.')
+
+    def read_igts(self):
+        igts = self._igts
+        while igts:
+            yield igts.popleft()
+
+    def _read(self, final):
+        igts = self._igts
+        buf = self._buf
+        while True:
+            pos = _whitespace.match(buf, self._pos).end()
+            self._pos = pos
+            if pos == len(buf):
+                break
+            c = buf[pos]
+            state = self._state
+            if state == 'start':
+                if c != '{':
+                    raise XigtError('A XigtJSON document must be an object.')
+                self._pos = pos + 1
+                self._state = 'members'
+            elif state == 'end':
+                raise XigtError('Unexpected data after the XigtJSON object.')
+            elif c == ',':
+                self._pos = pos + 1
+            elif state == 'members':
+                if c == '}':
+                    if self.corpus is None:
+                        self._decode_corpus()
+                    self._pos = pos + 1
+                    self._state = 'end'
+                    continue
+                member = self._member(buf, pos, final)
+                if member is None:
+                    break  # wait for more data
+                key, value, end = member
+                if self.corpus is not None:
+                    raise XigtError(
+                        'Corpus members after "igts" are not supported.'
+                    )
+                if key == 'igts':
+                    self._decode_corpus()
+                    self._state = 'igts'
+                else:
+                    self._members[key] = value
+                self._pos = end
+            elif state == 'igts':
+                if c == ']':
+                    self._pos = pos + 1
+                    self._state = 'members'
+                    continue
+                value = self._value(buf, pos, final)
+                if value is None:
+                    break
+                obj, self._pos = value
+                with _profiling.phase('xigtjson.decode'):
+                    igt = self._decode_igt(obj, self._nsmap)
+                _profiling.count('igts_decoded')
+                igt._parent = self.corpus
+                _invalidate_nsmaps(igt)
+                igts.append(igt)
+
+    def _member(self, buf, pos, final):
+        # (key, value, end) of the member at pos, or None if incomplete;
+        # the value of "igts" is not read, only its opening bracket
+        key = self._value(buf, pos, final)
+        if key is None:
+            return None
+        key, pos = key
+        pos = _whitespace.match(buf, pos).end()
+        if pos == len(buf):
+            return None
+        if buf[pos] != ':':
+            raise XigtError('Invalid XigtJSON at character {}.'.format(pos))
+        pos = _whitespace.match(buf, pos + 1).end()
+        if key == 'igts':
+            if pos == len(buf):
+                return None
+            if buf[pos] != '[':
+                raise XigtError('The "igts" member must be a list.')
+            return key, None, pos + 1
+        value = self._value(buf, pos, final)
+        if value is None:
+            return None
+        return (key,) + value
+
+    def _value(self, buf, pos, final):
+        # (value, end) of the JSON value at pos, or None if incomplete
+        self._closer = None
+        try:
+            value, end = self._json.raw_decode(buf, pos)
+        except ValueError as exc:
+            if final:
+                raise XigtError('Invalid XigtJSON: {}'.format(exc))
+            self._closer = _closers.get(buf[pos:pos + 1])
+            return None
+        # a number at the end of the data may continue
+        if end == len(buf) and not final and buf[end - 1] not in '"]}':
+            return None
+        return value, end
+
+    def _decode_corpus(self):
+        members = self._members
+        self._nsmap = active_namespaces(members, None)
+        self.corpus = decode(members, validate=self._validate)
+
+
 def decode_igt(obj, nsmap=None):
     nsmap = active_namespaces(obj, nsmap)
     igt = Igt(
@@ -116,6 +362,45 @@ def decode_item(obj, nsmap=None):
     return item
 
 
+def unchecked_decode_igt(obj, nsmap=None):
+    nsmap = active_namespaces(obj, nsmap)
+    return Igt.unchecked(
+        id=obj.get('id'),
+        type=obj.get('type'),
+        attributes=obj.get('attributes'),
+        metadata=[decode_metadata(md, nsmap)
+                  for md in obj.get('metadata', [])],
+        tiers=[unchecked_decode_tier(tier, nsmap)
+               for tier in obj.get('tiers', [])],
+        namespace=obj.get('namespace'),
+        nsmap=obj.get('namespaces')
+    )
+
+
+def unchecked_decode_tier(obj, nsmap=None):
+    return Tier.unchecked(
+        id=obj.get('id'),
+        type=obj.get('type'),
+        attributes=obj.get('attributes'),
+        metadata=[decode_metadata(md, active_namespaces(obj, nsmap))
+                  for md in obj.get('metadata', [])],
+        items=[unchecked_decode_item(item) for item in obj.get('items', [])],
+        namespace=obj.get('namespace'),
+        nsmap=obj.get('namespaces')
+    )
+
+
+def unchecked_decode_item(obj, nsmap=None):
+    return Item.unchecked(
+        id=obj.get('id'),
+        type=obj.get('type'),
+        attributes=obj.get('attributes'),
+        text=obj.get('text'),
+        namespace=obj.get('namespace'),
+        nsmap=obj.get('namespaces')
+    )
+
+
 def decode_metadata(obj, nsmap=None):
     nsmap = active_namespaces(obj, nsmap)
     metadata = Metadata(
@@ -1,8 +1,13 @@
 
-from io import StringIO
+from io import StringIO, BytesIO
+from collections import deque, namedtuple
+from functools import partial
+from xml.parsers import expat
 from xml.etree.ElementTree import (
     tostring,
     iterparse,
+    XMLPullParser,
+    ParseError,
     Element,
     ElementTree,
     QName
@@ -42,6 +47,11 @@ except LookupError:
 
 
 from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt import profiling as _profiling
+from xigt import compression
+from xigt.mixins import _invalidate_nsmaps
+from xigt.consts import FULL, TRANSIENT, CACHED
+from xigt.model import IgtSource
 from xigt.errors import XigtError
 
 
@@ -50,36 +60,89 @@ from xigt.errors import XigtError
 # Pickle-API methods
 
 
-def load(fh, mode='full'):
+def load(fh, mode='full', validate=True, **kwargs):
+    # kwargs are the cache limits (max_igts, max_bytes) of the cached mode
+    if mode == CACHED:
+        # imported here as xigt.cache uses this module
+        from xigt.cache import CachedCorpus
+        return CachedCorpus(fh, validate=validate, **kwargs)
+    if kwargs:
+        raise TypeError(
+            'Unexpected arguments for the {} mode: {}'
+            .format(mode, ', '.join(sorted(kwargs)))
+        )
+    if mode != FULL and not hasattr(fh, 'read'):
+        # the IGTs are read from the file again for each iteration
+        source = IgtSource(partial(_iter_igts, fh, validate),
+                           partial(count_igts, fh))
+        with compression.open(fh, 'rb') as fh_:
+            return decode(ns_iterparse(_profiling.reader(fh_)
+                                       if _profiling.enabled else fh_),
+                          mode=mode, validate=validate, igts=source)
+    if not hasattr(fh, 'read'):
+        with compression.open(fh, 'rb') as fh_:
+            return load(fh_, mode=mode, validate=validate)
+    if _profiling.enabled:
+        fh = _profiling.reader(fh)
     events = ns_iterparse(fh)
-    return decode(events, mode=mode)
+    return decode(events, mode=mode, validate=validate)
+
 
+def _iter_igts(path, validate):
+    with compression.open(path, 'rb') as fh:
+        for igt in load(fh, mode=TRANSIENT, validate=validate):
+            yield igt
 
-def loads(s):
+
+def loads(s, validate=True):
     if hasattr(s, 'decode'): s = s.decode('utf-8')
-    return load(StringIO(s))
+    return load(StringIO(s), validate=validate)
 
 
 def dump(f, xc, encoding='utf-8', indent=2):
-    if not isinstance(xc, XigtCorpus):
+    if not _is_corpus(xc):
         raise XigtError(
             'Second argument of dump() must be an instance of XigtCorpus.'
         )
     if hasattr(f, 'buffer') and encoding != 'unicode':
         f = f.buffer
-    root = _build_corpus(xc)
-    _indent(root, indent=indent)
-    ElementTree(root).write(f, encoding=encoding)
+    with _profiling.phase('xigtxml.write'):
+        if xc.mode != FULL:
+            # write unloaded IGTs as they are decoded instead of building
+            # the whole tree
+            if hasattr(f, 'write'):
+                _dump_incremental(f, xc, encoding, indent)
+            else:
+                with compression.open(f, _write_mode(encoding)) as fh:
+                    _dump_incremental(fh, xc, encoding, indent)
+            return
+        root = _build_corpus(xc)
+        _indent(root, indent=indent)
+        if hasattr(f, 'write'):
+            ElementTree(root).write(f, encoding=encoding)
+        else:
+            with compression.open(f, _write_mode(encoding)) as fh:
+                ElementTree(root).write(fh, encoding=encoding)
+
+
+def _write_mode(encoding):
+    return 'w' if encoding == 'unicode' else 'wb'
 
 
 def dumps(xc, encoding='unicode', indent=2):
-    if not isinstance(xc, XigtCorpus):
+    if not _is_corpus(xc):
         raise XigtError(
             'First argument of dumps() must be an instance of XigtCorpus.'
         )
     return encode_xigtcorpus(xc, encoding=encoding, indent=indent)
 
 
+def _is_corpus(xc):
+    # a CachedCorpus is written like an unloaded XigtCorpus
+    from xigt.cache import CachedCorpus
+    return isinstance(xc, (XigtCorpus, CachedCorpus))
+
+
 # XML Utilities#########################################################
 
 class _QName(QName):
@@ -173,27 +236,55 @@ def xigt_attrsort(attr):
     )
 
 def ns_iterparse(fh, events=('start', 'end')):
-    events = iter(
-        iterparse(fh, events=tuple(['start-ns', 'end-ns'] + list(events)))
+    events = iterparse(
+        fh, events=tuple(['start-ns', 'end-ns'] + list(events))
     )
-    # thanks: http://effbot.org/elementtree/iterparse.htm
-    namespaces = []
-    for event, elem in events:
-        if event == 'start-ns':
-            namespaces.append(elem)
-        elif event == 'end-ns':
-            namespaces.pop()
-        elif event == 'start':
-            elem.tag = _QName(elem.tag)
-            elem.attrib = NSAttribDict(
-                elem.attrib,
-                # [(_QName(k, sortkey=xigt_attrsort), v)
-                #   for k, v, in elem.attrib.items()],
-                namespaces=namespaces
-            )
-            yield event, elem
-        elif event == 'end':
-            yield event, elem
+    return _NamespaceFilter()(events)
+
+
+class _NamespaceFilter(object):
+    """
+    Filter the events of an ElementTree parser, replacing the tags and
+    attribute dictionaries of started elements with ones that know the
+    namespaces in scope. A filter can be applied to successive batches
+    of events of the same document (see `_IncrementalDecoder`).
+    """
+
+    def __init__(self):
+        # Attribute names and values (ids, types, references) recur
+        # across IGTs, so they are pooled for the duration of the parse
+        # to share one string object per distinct value. IGT ids are
+        # unique and would only grow the pool.
+        self.pool = {}
+        self.namespaces = []
+
+    def __call__(self, events):
+        intern = self.pool.setdefault
+        # thanks: http://effbot.org/elementtree/iterparse.htm
+        namespaces = self.namespaces
+        for event, elem in events:
+            if event == 'start-ns':
+                namespaces.append(elem)
+            elif event == 'end-ns':
+                namespaces.pop()
+            elif event == 'start':
+                attrib = elem.attrib
+                if attrib:
+                    igt_id = attrib.get('id') if elem.tag == 'igt' else None
+                    attrib = [
+                        (intern(k, k), v if v is igt_id else intern(v, v))
+                        for k, v in attrib.items()
+                    ]
+                elem.tag = _QName(elem.tag)
+                elem.attrib = NSAttribDict(
+                    attrib,
+                    # [(_QName(k, sortkey=xigt_attrsort), v)
+                    #   for k, v, in elem.attrib.items()],
+                    namespaces=namespaces
+                )
+                yield event, elem
+            elif event == 'end':
+                yield event, elem
 
 
 # Decoding #############################################################
@@ -209,24 +300,137 @@ def iter_elements(tag, events, root, break_on=None):
         event, elem = next(events)
 
 
-def default_decode(events, mode='full'):
-    """Decode a XigtCorpus element."""
+def default_decode(events, mode='full', validate=True, igts=None):
+    """
+    Decode a XigtCorpus element.
+
+    If *validate* is `False`, the Igts, tiers, and items are trusted to
+    be valid (e.g., the file was validated against the schema) and are
+    built with their `unchecked()` constructors. If *igts* is given,
+    it is used for the IGTs of the corpus instead of decoding those of
+    *events* (e.g., an |IgtSource| reading them from the file again).
+    """
     event, elem = next(events)
     root = elem  # store root for later instantiation
     while (event, elem.tag) not in [('start', 'igt'), ('end', 'xigt-corpus')]:
         event, elem = next(events)
-    igts = None
-    if event == 'start' and elem.tag == 'igt':
-        igts = (
-            decode_igt(e)
-            for e in iter_elements(
-                'igt', events, root, break_on=[('end', 'xigt-corpus')]
-            )
+    _decode_igt = decode_igt if validate else unchecked_decode_igt
+    if igts is None and event == 'start' and elem.tag == 'igt':
+        elements = iter_elements(
+            'igt', events, root, break_on=[('end', 'xigt-corpus')]
         )
+        if _profiling.enabled:
+            igts = _profiling.decoded('xigtxml', _decode_igt, elements)
+        else:
+            igts = (_decode_igt(e) for e in elements)
     xc = decode_xigtcorpus(root, igts=igts, mode=mode)
     return xc
 
 
+class XigtXMLParser(object):
+    """
+    A push parser decoding a XigtXML document fed in chunks.
+
+    The caller reads the data and passes it to `feed()`, and each |Igt|
+    is decoded as soon as its `</igt>` end tag is fed. `read_igts()`
+    then yields the IGTs completed since it was last called:
+
+        >>> parser = XigtXMLParser()
+        >>> for chunk in chunks:
+        ...     parser.feed(chunk)
+        ...     for igt in parser.read_igts():
+        ...         process(igt)
+        >>> parser.close()
+        >>> for igt in parser.read_igts():
+        ...     process(igt)
+
+    The corpus-level attributes and metadata are decoded into `corpus`,
+    a |XigtCorpus| without IGTs, at the start of the first IGT (or at
+    the end of the document if it has none); until then it is `None`.
+    The IGTs have the corpus as their parent but are not added to it,
+    so only the IGTs not yet read are kept in memory.
+
+    IGTs and the corpus are decoded with the module's `decode_igt()`
+    (`unchecked_decode_igt()` if *validate* is `False`) and
+    `decode_xigtcorpus()` functions.
+
+    Args:
+        validate: if `False`, trust the data as for `load()`
+    """
+
+    def __init__(self, validate=True):
+        self._parser = XMLPullParser(
+            events=('start-ns', 'end-ns', 'start', 'end')
+        )
+        self._filter = _NamespaceFilter()
+        self._decode_igt = decode_igt if validate else unchecked_decode_igt
+        self._root = None
+        self._depth = 0
+        self._igts = deque()
+        self.corpus = None
+
+    def feed(self, data):
+        """
+        Parse the chunk *data* of bytes or text and decode the IGTs it
+        completes.
+        """
+        _profiling.count('bytes_read', len(data))
+        try:
+            self._parser.feed(data)
+        except ParseError as exc:
+            raise XigtError('Invalid XigtXML: {}'.format(exc))
+        self._read()
+
+    def close(self):
+        """
+        Finish parsing; raise a |XigtError| if the data fed is not a
+        complete document.
+        """
+        try:
+            self._parser.close()
+        except ParseError as exc:
+            raise XigtError('Invalid XigtXML: {}'.format(exc))
+        self._read()
+        if self.corpus is None:
+            raise XigtError('Incomplete XigtXML document.')
+
+    def read_igts(self):
+        """
+        Iterate over the IGTs completed since the last call. The IGTs
+        are removed from the parser as they are yielded.
+        """
+        igts = self._igts
+        while igts:
+            yield igts.popleft()
+
+    def _read(self):
+        igts = self._igts
+        for event, elem in self._filter(self._parser.read_events()):
+            if event == 'start':
+                if self._root is None:
+                    self._root = elem
+                elif (self._depth == 1 and self.corpus is None
+                        and elem.tag == 'igt'):
+                    self._decode_corpus()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 1 and elem.tag == 'igt':
+                    with _profiling.phase('xigtxml.decode'):
+                        igt = self._decode_igt(elem)
+                    self._root.clear()  # free the decoded elements
+                    _profiling.count('igts_decoded')
+                    igt._parent = self.corpus
+                    _invalidate_nsmaps(igt)
+                    igts.append(igt)
+                elif self._depth == 0 and self.corpus is None:
+                    self._decode_corpus()
+
+    def _decode_corpus(self):
+        # the metadata before the first IGT is complete
+        self.corpus = decode_xigtcorpus(self._root, igts=())
+
+
 def default_get_attributes(elem, ignore=None):
     if ignore is None:
         ignore = tuple()
@@ -244,7 +448,8 @@ def default_decode_xigtcorpus(elem, igts=None, mode='full'):
         attributes=get_attributes(elem, ignore=('id',)),
         metadata=[decode_metadata(md) for md in elem.findall('metadata')],
         # NOTE: possible bug here; does nsiterparse run with elem.findall?
-        igts=igts or [decode_igt(igt) for igt in elem.findall('igt')],
+        igts=(igts if igts is not None
+              else [decode_igt(igt) for igt in elem.findall('igt')]),
         mode=mode,
         namespace=ns,
         nsmap=elem.attrib.nsmap
@@ -298,6 +503,53 @@ def default_decode_item(elem):
     return item
 
 
+def unchecked_decode_igt(elem):
+    ns, tag = _qname_split(elem.tag)
+    attributes = dict(elem.attrib)
+    igt = Igt.unchecked(
+        id=attributes.pop('id', None),
+        type=attributes.pop('type', None),
+        attributes=attributes,
+        metadata=[decode_metadata(md) for md in elem.findall('metadata')],
+        tiers=[unchecked_decode_tier(tier) for tier in elem.findall('tier')],
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    elem.clear()
+    return igt
+
+
+def unchecked_decode_tier(elem):
+    ns, tag = _qname_split(elem.tag)
+    attributes = dict(elem.attrib)
+    tier = Tier.unchecked(
+        id=attributes.pop('id', None),
+        type=attributes.pop('type', None),
+        attributes=attributes,
+        metadata=[decode_metadata(md) for md in elem.findall('metadata')],
+        items=[unchecked_decode_item(item) for item in elem.findall('item')],
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    elem.clear()
+    return tier
+
+
+def unchecked_decode_item(elem):
+    ns, tag = _qname_split(elem.tag)
+    attributes = dict(elem.attrib)
+    item = Item.unchecked(
+        id=attributes.pop('id', None),
+        type=attributes.pop('type', None),
+        attributes=attributes,
+        text=elem.text,
+        namespace=ns,
+        nsmap=elem.attrib.nsmap
+    )
+    elem.clear()
+    return item
+
+
 def default_decode_metadata(elem):
     if elem is None:
         return None
@@ -350,6 +602,177 @@ def default_decode_metachild(elem):
     return mc
 
 
+# Byte Offsets #########################################################
+
+IgtOffsets = namedtuple('IgtOffsets', ('header', 'footer', 'offsets'))
+IgtScan = namedtuple('IgtScan', ('header', 'footer', 'offsets', 'ids'))
+
+
+def scan_offsets(f):
+    """
+    Find the byte offsets of the `<igt>` elements in a XigtXML file.
+
+    This only tokenizes the XML, so it is much faster than decoding.
+    Return an `IgtOffsets` tuple: *header* is the XML declaration (if
+    any) and the start tag of the root element, *footer* is the end tag
+    of the root element, and *offsets* is the list of `(start, end)`
+    byte offsets of each `<igt>` element in document order. Wrapping
+    the bytes of an element in the header and footer gives a complete
+    document that can be decoded with `load_igt_at()`.
+
+    Args:
+        f: the path of a XigtXML file, which may be uncompressed or
+            BGZF-compressed (see `xigt.compression`), or an open,
+            seekable binary file
+    """
+    header, footer, offsets, _ = scan_igts(f)
+    return IgtOffsets(header, footer, offsets)
+
+
+def scan_igts(f):
+    """
+    Find the byte offsets and ids of the `<igt>` elements in a XigtXML
+    file.
+
+    Return an `IgtScan` tuple of the *header*, *footer*, and
+    *offsets* given by `scan_offsets()` and *ids*, the list of the
+    IGTs' ids (`None` for IGTs without one), found in the same pass.
+
+    Args:
+        f: as for `scan_offsets()`
+    """
+    if not hasattr(f, 'read'):
+        with compression.open(f, 'rb', random_access=True) as fh:
+            return scan_igts(fh)
+    base = f.tell()
+    parser = expat.ParserCreate()
+    root = []  # [(raw name, start)]
+    spans = []  # [(start, end-event index)]
+    ids = []
+    state = {'depth': 0, 'start': None}
+
+    def start_element(name, attrs):
+        depth = state['depth']
+        if depth == 0:
+            root.append((name, parser.CurrentByteIndex))
+        elif depth == 1 and _local_name(name) == 'igt':
+            state['start'] = parser.CurrentByteIndex
+            ids.append(attrs.get('id'))
+        state['depth'] = depth + 1
+
+    def end_element(name):
+        state['depth'] -= 1
+        if state['depth'] == 1 and state['start'] is not None:
+            spans.append((state['start'], parser.CurrentByteIndex, name))
+            state['start'] = None
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.ParseFile(f)
+    if not root:
+        raise XigtError('No root element found.')
+    # expat reports the start of the end tag, or for empty elements,
+    # the position after the element
+    offsets = []
+    for start, end, name in spans:
+        end_tag = '</{}'.format(name).encode('utf-8')
+        f.seek(base + end)
+        chunk = f.read(len(end_tag) + 256)
+        if (chunk.startswith(end_tag)
+                and chunk[len(end_tag):len(end_tag)+1] in (b'>', b' ', b'\t',
+                                                           b'\r', b'\n')):
+            end += chunk.index(b'>') + 1
+        offsets.append((start, end))
+    # header: XML declaration and root start tag
+    root_name, root_start = root[0]
+    f.seek(base)
+    prolog = f.read(root_start)
+    header = b''
+    decl_start = prolog.find(b'<?xml')
+    if decl_start != -1 and not prolog[:decl_start].strip(b'\xef\xbb\xbf \t\r\n'):
+        header = prolog[:prolog.index(b'?>') + 2] + b'\n'
+    header += _read_start_tag(f, base + root_start)
+    footer = '</{}>'.format(root_name).encode('utf-8')
+    f.seek(base)
+    return IgtScan(header, footer, offsets, ids)
+
+
+def count_igts(f):
+    """
+    Return the number of `<igt>` elements in a XigtXML file.
+
+    Like `scan_offsets()`, this only tokenizes the XML and does not
+    decode the IGTs.
+
+    Args:
+        f: the path of a XigtXML file or an open binary file
+    """
+    if not hasattr(f, 'read'):
+        with compression.open(f, 'rb') as fh:
+            return count_igts(fh)
+    parser = expat.ParserCreate()
+    state = {'depth': 0, 'igts': 0}
+
+    def start_element(name, attrs):
+        depth = state['depth']
+        if depth == 1 and _local_name(name) == 'igt':
+            state['igts'] += 1
+        state['depth'] = depth + 1
+
+    def end_element(name):
+        state['depth'] -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.ParseFile(f)
+    return state['igts']
+
+
+def load_igt_at(f, start, end, header, footer, validate=True):
+    """
+    Decode the `<igt>` element between byte offsets *start* and *end*.
+
+    The *header* and *footer* are those given by `scan_offsets()`. The
+    |Igt| belongs to a new, otherwise empty, |XigtCorpus| with the
+    attributes and namespaces of the root element.
+
+    Args:
+        f: an open, seekable binary file
+        validate: if `False`, trust the data as for `load()`
+    """
+    f.seek(start)
+    data = f.read(end - start)
+    xc = load(BytesIO(header + data + footer), validate=validate)
+    return xc[0]
+
+
+def _local_name(name):
+    return name.rsplit(':', 1)[-1]
+
+
+def _read_start_tag(f, pos):
+    # find the end of a start tag, skipping '>' in attribute values
+    f.seek(pos)
+    data = b''
+    quote = None
+    i = 0
+    while True:
+        chunk = f.read(4096)
+        if not chunk:
+            raise XigtError('Unterminated start tag.')
+        data += chunk
+        while i < len(data):
+            c = data[i:i+1]
+            if quote is not None:
+                if c == quote:
+                    quote = None
+            elif c in (b'"', b"'"):
+                quote = c
+            elif c == b'>':
+                return data[:i+1]
+            i += 1
+
+
 ##############################################################################
 ##############################################################################
 # Encoding
@@ -522,6 +945,48 @@ def _indent(elem, indent=2, level=0):
 #     xf.write(closing_tag)
 
 
+def _dump_incremental(f, xc, encoding, indent):
+    # Write the same document as ElementTree.write() would for the full
+    # tree: the corpus element (and metadata) is serialized around a
+    # placeholder IGT, and the IGTs are serialized one by one in its
+    # place.
+    igts = iter(xc)
+    first = next(igts, None)
+    root = _build_elem('xigt-corpus', xc, {})
+    nsmap = xc.nsmap
+    for md in xc.metadata:
+        root.append(_build_metadata(md, nsmap))
+    if first is not None:
+        root.append(Element('igt'))
+    _indent(root, indent=indent)
+    doc = _tostring(root, encoding='unicode')
+    if encoding != 'unicode' and encoding.lower() not in ('utf-8',
+                                                          'us-ascii'):
+        doc = "<?xml version='1.0' encoding='{}'?>\n{}".format(encoding, doc)
+
+    def write(s):
+        if encoding != 'unicode':
+            s = s.encode(encoding, 'xmlcharrefreplace')
+        f.write(s)
+
+    if first is None:
+        write(doc)
+        return
+    head, tail = doc.rsplit('<igt />', 1)
+    write(head)
+    sep = '' if indent is None else '\n' + (' ' * indent)
+    igt = first
+    while igt is not None:
+        elem = _build_igt(igt, nsmap)
+        _indent(elem, indent=indent, level=1)
+        elem.tail = None
+        write(_tostring(elem, encoding='unicode'))
+        igt = next(igts, None)
+        if igt is not None:
+            write(sep)
+    write(tail)
+
+
 def default_encode_xigtcorpus(xc, encoding='unicode', indent=2):
     # this encodes the whole xigtcorpus at once.
     # for incremental encoding, see encode() (default_encode())
@@ -0,0 +1,423 @@
+"""
+Reading and writing compressed corpus files.
+
+`open()` opens a file for the codecs and commands. When reading, it
+detects gzip, bzip2, xz, and Zstandard data by their magic bytes and
+decompresses it as it is read; when writing, the compression is
+chosen by the file extension (or given explicitly):
+
+    ==========  ===========  ===================================
+    extension   compression  notes
+    ==========  ===========  ===================================
+    `.gz`       `gzip`
+    `.bgz`      `bgzf`       block-compressed gzip, seekable
+    `.bz2`      `bz2`
+    `.xz`       `xz`
+    `.zst`      `zstd`       needs Python 3.14 or `zstandard`
+    ==========  ===========  ===================================
+
+All codecs open paths with `open()`, so compressed corpora can be used
+anywhere an uncompressed one can:
+
+    >>> from xigt.codecs import xigtxml
+    >>> xc = xigtxml.load('corpus.xml.gz')
+    >>> xigtxml.dump('corpus.xml.xz', xc)
+
+Random access to the IGTs of a file (`xigtxml.scan_offsets()`, the
+`cached` mode of `xigtxml.load()`, and |XigtIndex|) needs to seek by
+uncompressed offsets, which the stream compressions can only do by
+decompressing from the start. BGZF files, as written by this module or
+by htslib's `bgzip`, are sequences of independently compressed gzip
+blocks of at most 64 KiB, so a |BGZFReader| seeks by decompressing a
+single block. They remain valid gzip files. An existing file can be
+recompressed with:
+
+    >>> import shutil
+    >>> from xigt import compression
+    >>> with compression.open('corpus.xml.gz') as src, \\
+    ...         compression.open('corpus.xml.bgz', 'wb') as dst:
+    ...     shutil.copyfileobj(src, dst)
+"""
+
+import io
+import os
+import bz2
+import gzip
+import lzma
+import zlib
+import struct
+import builtins
+from bisect import bisect_right
+
+from xigt.errors import XigtError
+
+COMPRESSIONS = ('gzip', 'bgzf', 'bz2', 'xz', 'zstd')
+
+EXTENSIONS = {
+    '.gz': 'gzip',
+    '.bgz': 'bgzf',
+    '.bz2': 'bz2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+
+# BGZF blocks: a gzip member with a 'BC' extra subfield giving the
+# size of the block, at most 64 KiB
+_BGZF_HEADER = struct.Struct('<4sIBBH2sHH')
+_BGZF_TRAILER = struct.Struct('<II')
+_BGZF_EOF = (b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+             b'\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00')
+BGZF_BLOCK_SIZE = 0xff00  # uncompressed bytes per block
+_BGZF_MAX_BLOCK = 0x10000
+
+
+def detect(f):
+    """
+    Return the compression of *f* detected by its magic bytes, or
+    `None` if it is not compressed.
+
+    Args:
+        f: a filename or a binary file that can peek or seek (it is
+            not moved)
+    """
+    if not hasattr(f, 'read'):
+        with builtins.open(f, 'rb') as fh:
+            return _detect(fh.read(_BGZF_HEADER.size))
+    if hasattr(f, 'peek'):
+        return _detect(f.peek(_BGZF_HEADER.size)[:_BGZF_HEADER.size])
+    pos = f.tell()
+    head = f.read(_BGZF_HEADER.size)
+    f.seek(pos)
+    return _detect(head)
+
+
+def _detect(head):
+    for magic, compression in _MAGIC:
+        if head.startswith(magic):
+            if compression == 'gzip' and _is_bgzf(head):
+                return 'bgzf'
+            return compression
+    return None
+
+
+def _is_bgzf(header):
+    # FEXTRA flag and a 'BC' subfield first in the extra field
+    return (len(header) >= _BGZF_HEADER.size
+            and header[:2] == b'\x1f\x8b'
+            and header[3] & 4
+            and header[12:16] == b'BC\x02\x00')
+
+
+def compression_for(path):
+    """
+    Return the compression for writing *path* as chosen by its file
+    extension, or `None` for none.
+    """
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def open(f, mode='rb', compression=None, encoding=None,
+         random_access=False, newline=None):
+    """
+    Open file *f*, decompressing or compressing its data.
+
+    When reading, the compression is detected by the magic bytes of
+    the file, and when writing, it is chosen by the file extension,
+    unless *compression* is given. Files opened for reading in text
+    mode are decoded with *encoding* (the platform default if `None`,
+    as for the built-in `open()`).
+
+    Args:
+        f: the path of the file
+        mode: `"r"`, `"w"`, `"x"`, or `"a"`, with `"b"` for binary or
+            `"t"` for text mode (the default, as for the built-in
+            `open()`)
+        compression: `None` to detect or choose the compression, or
+            one of `"gzip"`, `"bgzf"`, `"bz2"`, `"xz"`, or `"zstd"`
+        encoding: the text encoding in text mode
+        newline: how line endings are translated in text mode, as for
+            the built-in `open()`
+        random_access: if `True`, raise a |XigtError| when reading a
+            file that cannot be seeked efficiently, i.e., one that is
+            compressed but not with BGZF
+    Returns:
+        a file object
+    """
+    text = 'b' not in mode
+    if not text:
+        encoding = newline = None
+    base = mode.replace('b', '').replace('t', '')
+    if base not in ('r', 'w', 'x', 'a'):
+        raise XigtError('Invalid mode: {}'.format(mode))
+    if compression is None:
+        if base == 'r':
+            compression = detect(f)
+        else:
+            compression = compression_for(f)
+    elif compression not in COMPRESSIONS:
+        raise XigtError('Invalid compression: {}'.format(compression))
+    if random_access and compression not in (None, 'bgzf'):
+        raise XigtError(
+            'Cannot randomly access {}-compressed file {}; recompress it '
+            'with BGZF (see xigt.compression).'.format(compression, f)
+        )
+    if compression is None:
+        return builtins.open(f, mode, encoding=encoding, newline=newline)
+    if compression == 'bgzf':
+        if base == 'r':
+            fh = BGZFReader(f)
+        elif base == 'w':
+            fh = BGZFWriter(f)
+        else:
+            raise XigtError('BGZF files can only be read or written.')
+        if text:
+            return io.TextIOWrapper(fh, encoding=encoding, newline=newline)
+        return fh
+    mode = base + ('t' if text else 'b')
+    if compression == 'gzip':
+        return gzip.open(f, mode, encoding=encoding, newline=newline)
+    elif compression == 'bz2':
+        return bz2.open(f, mode, encoding=encoding, newline=newline)
+    elif compression == 'xz':
+        return lzma.open(f, mode, encoding=encoding, newline=newline)
+    else:
+        return _zstd().open(f, mode, encoding=encoding, newline=newline)
+
+
+def _zstd():
+    try:
+        from compression import zstd  # Python 3.14+
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise XigtError(
+                'Zstandard compression requires Python 3.14 or the '
+                'zstandard package.'
+            )
+    return zstd
+
+
+class BGZFReader(io.BufferedIOBase):
+    """
+    A seekable binary file of the decompressed data of a BGZF file.
+
+    Reading decompresses one block at a time. Seeking to an offset of
+    the decompressed data decompresses only the block containing it,
+    using a table of the blocks that is made (from the block headers)
+    when first needed.
+
+    Args:
+        f: a filename or a binary file positioned at the first block
+    """
+
+    def __init__(self, f):
+        if hasattr(f, 'read'):
+            self._fh = f
+            self._close_fh = False
+        else:
+            self._fh = builtins.open(f, 'rb')
+            self._close_fh = True
+        self.name = getattr(self._fh, 'name', None)
+        self._base = self._fh.tell()
+        self._block = b''
+        self._block_start = 0  # decompressed offset of the block
+        self._offset = 0  # position in the block
+        self._next = self._base  # compressed offset of the next block
+        self._table = None  # ([compressed offsets], [offsets], size)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if not self.closed and self._close_fh:
+            self._fh.close()
+        self._block = b''
+        super(BGZFReader, self).close()
+
+    def read(self, size=-1):
+        if size is None:
+            size = -1
+        chunks = []
+        while size != 0:
+            if self._offset >= len(self._block) and not self._advance():
+                break
+            start = self._offset
+            end = len(self._block) if size < 0 else start + size
+            data = self._block[start:end]
+            self._offset += len(data)
+            if size > 0:
+                size -= len(data)
+            chunks.append(data)
+        return b''.join(chunks)
+
+    read1 = read
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def tell(self):
+        return self._block_start + self._offset
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            offset += self._get_table()[2]
+        elif whence != io.SEEK_SET:
+            raise ValueError('Invalid whence: {}'.format(whence))
+        if offset < 0:
+            raise ValueError('Negative seek position: {}'.format(offset))
+        block_start = self._block_start
+        if not block_start <= offset <= block_start + len(self._block):
+            coffsets, offsets, _ = self._get_table()
+            i = max(bisect_right(offsets, offset) - 1, 0)
+            if offsets:
+                self._block, self._next = _read_block(self._fh, coffsets[i])
+                self._block_start = offsets[i]
+        self._offset = offset - self._block_start
+        return offset
+
+    def _advance(self):
+        # read the next block; return False at the end of the file
+        data, end = _read_block(self._fh, self._next)
+        if end == self._next:
+            return False
+        self._block_start += len(self._block)
+        self._block = data
+        self._offset = 0
+        self._next = end
+        return True
+
+    def _get_table(self):
+        if self._table is None:
+            fh = self._fh
+            coffsets, offsets = [], []
+            pos, size = self._base, 0
+            while True:
+                fh.seek(pos)
+                header = fh.read(_BGZF_HEADER.size)
+                if not header:
+                    break
+                bsize = _block_size(header, pos)
+                fh.seek(pos + bsize - 4)
+                isize = struct.unpack('<I', fh.read(4))[0]
+                if isize:  # skip empty blocks, like the EOF marker
+                    coffsets.append(pos)
+                    offsets.append(size)
+                pos += bsize
+                size += isize
+            self._table = (coffsets, offsets, size)
+        return self._table
+
+
+def _block_size(header, pos):
+    if not _is_bgzf(header):
+        raise XigtError('Invalid BGZF block at byte {}.'.format(pos))
+    return _BGZF_HEADER.unpack(header)[-1] + 1
+
+
+def _read_block(fh, pos):
+    # return the data of the block at pos and the offset of the next
+    fh.seek(pos)
+    header = fh.read(_BGZF_HEADER.size)
+    if not header:
+        return b'', pos
+    bsize = _block_size(header, pos)
+    rest = fh.read(bsize - _BGZF_HEADER.size)
+    if len(rest) != bsize - _BGZF_HEADER.size:
+        raise XigtError('Truncated BGZF block at byte {}.'.format(pos))
+    crc, isize = _BGZF_TRAILER.unpack_from(rest, len(rest) - 8)
+    try:
+        data = zlib.decompress(rest[:-8], -15)
+    except zlib.error as exc:
+        raise XigtError('Invalid BGZF block at byte {}: {}'.format(pos, exc))
+    if len(data) != isize or zlib.crc32(data) != crc:
+        raise XigtError('Corrupt BGZF block at byte {}.'.format(pos))
+    return data, pos + bsize
+
+
+class BGZFWriter(io.BufferedIOBase):
+    """
+    A binary file writing BGZF blocks of at most 64 KiB of data.
+
+    Closing the writer writes the remaining data and the empty block
+    that marks the end of a BGZF file.
+
+    Args:
+        f: a filename or a binary file opened for writing
+        compresslevel: the zlib compression level
+    """
+
+    def __init__(self, f, compresslevel=6):
+        if hasattr(f, 'write'):
+            self._fh = f
+            self._close_fh = False
+        else:
+            self._fh = builtins.open(f, 'wb')
+            self._close_fh = True
+        self.name = getattr(self._fh, 'name', None)
+        self.compresslevel = compresslevel
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        buf = self._buffer
+        buf += data
+        if len(buf) >= BGZF_BLOCK_SIZE:
+            n = len(buf) - len(buf) % BGZF_BLOCK_SIZE
+            for i in range(0, n, BGZF_BLOCK_SIZE):
+                self._write_block(bytes(buf[i:i + BGZF_BLOCK_SIZE]))
+            del buf[:n]
+        return len(data)
+
+    def flush(self):
+        """Write the buffered data as a (possibly short) block."""
+        if self._buffer:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+        if not self._fh.closed:  # also called when closing
+            self._fh.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+            self._fh.write(_BGZF_EOF)
+            if self._close_fh:
+                self._fh.close()
+        finally:
+            super(BGZFWriter, self).close()
+
+    def _write_block(self, data):
+        compressor = zlib.compressobj(
+            self.compresslevel, zlib.DEFLATED, -15
+        )
+        cdata = compressor.compress(data) + compressor.flush()
+        bsize = _BGZF_HEADER.size + len(cdata) + _BGZF_TRAILER.size
+        if bsize > _BGZF_MAX_BLOCK:
+            # incompressible data; split it
+            half = len(data) // 2
+            self._write_block(data[:half])
+            self._write_block(data[half:])
+            return
+        self._fh.write(_BGZF_HEADER.pack(
+            b'\x1f\x8b\x08\x04', 0, 0, 0xff, 6, b'BC', 2, bsize - 1
+        ))
+        self._fh.write(cdata)
+        self._fh.write(_BGZF_TRAILER.pack(zlib.crc32(data), len(data)))
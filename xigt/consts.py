@@ -10,3 +10,4 @@ SEGMENTATION = 'segmentation'
 FULL = 'full'
 INCREMENTAL = 'incremental'
 TRANSIENT = 'transient'
+CACHED = 'cached'
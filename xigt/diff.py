@@ -0,0 +1,323 @@
+
+"""
+Differences between corpora as compact, applicable patches.
+
+A |Patch| records which IGTs were added to, changed in, or removed
+from a corpus, matching IGTs by id and comparing their fingerprints
+(see `Igt.fingerprint`), so unchanged IGTs are neither stored in the
+patch nor compared deeply. Applying the patch to the old corpus gives
+the new one, and it is applied as the old corpus is read, so neither
+corpus needs to be fully loaded:
+
+    >>> from xigt.codecs import xigtxml
+    >>> from xigt import diff
+    >>> old = xigtxml.load('v1.xml', mode='transient')
+    >>> new = xigtxml.load('v2.xml', mode='transient')
+    >>> diff.dump('v1-v2.xpatch', diff.diff(old, new))
+    >>> xc = diff.apply(xigtxml.load('v1.xml', mode='transient'),
+    ...                 diff.load('v1-v2.xpatch'))
+    >>> xigtxml.dump('v2-copy.xml', xc)
+
+Patches are serialized in a small binary format whose IGTs are
+xigtbin frames (see :mod:`xigt.codecs.xigtbin`):
+
+    patch   := MAGIC bytes(frame(corpus)) op* 0x00
+    op      := 0x01 text(after id) bytes(frame(igt))   (added)
+             | 0x02 base bytes(frame(igt))             (changed)
+             | 0x03 text(igt id) base                  (removed)
+    bytes   := varint(len) data
+
+where *base* is the 16-byte fingerprint of the IGT the operation
+replaces or removes, which is checked when the patch is applied.
+"""
+
+import copy
+from io import BytesIO
+from collections import OrderedDict, defaultdict
+
+from xigt import XigtCorpus
+from xigt import compression
+from xigt.consts import FULL, TRANSIENT
+from xigt.errors import XigtError
+from xigt.codecs import xigtbin
+from xigt.codecs.xigtbin import (
+    _Encoder,
+    _write_varint,
+    _read_file_varint,
+    _write_text,
+    _read_frame_strings,
+    _decode_corpus,
+)
+
+MAGIC = b'XIGTP\x00\x00\x01'
+FINGERPRINT_SIZE = 16
+
+_END, _ADD, _CHANGE, _REMOVE = 0, 1, 2, 3
+
+
+class Patch(object):
+    """
+    The IGT-level differences between two corpora.
+
+    Attributes:
+        header: a |XigtCorpus| without IGTs giving the new corpus's id,
+            attributes, metadata, and namespaces
+        added: list of (*after*, *igt*) pairs, in corpus order, where
+            *igt* is a new |Igt| to be inserted after the IGT whose id
+            is *after* (or first, if *after* is `None`)
+        changed: dictionary mapping the ids of changed IGTs to
+            (*base*, *igt*) pairs, where *base* is the fingerprint of
+            the old IGT and *igt* is its replacement
+        removed: dictionary mapping the ids of removed IGTs to their
+            fingerprints
+    """
+
+    def __init__(self, header=None):
+        self.header = header if header is not None else XigtCorpus()
+        self.added = []
+        self.changed = OrderedDict()
+        self.removed = OrderedDict()
+
+    def __repr__(self):
+        return '<Patch object (+{} ~{} -{}) at {}>'.format(
+            len(self.added), len(self.changed), len(self.removed),
+            str(id(self))
+        )
+
+    def __len__(self):
+        return len(self.added) + len(self.changed) + len(self.removed)
+
+
+def diff(old, new):
+    """
+    Return the |Patch| that turns corpus *old* into corpus *new*.
+
+    Both corpora are iterated once, so they may be transient. IGTs are
+    matched by id, so every IGT must have one. An IGT that comes before
+    an IGT that preceded it in *old* is recorded as removed and added
+    again in its new place; other matched IGTs are recorded only if
+    their fingerprints differ.
+    """
+    old_igts = OrderedDict()  # id: (position, fingerprint)
+    for i, igt in enumerate(old):
+        key = _igt_id(igt, old_igts)
+        old_igts[key] = (i, igt.fingerprint)
+
+    patch = Patch(_header(new))
+    kept = set()
+    seen = set()
+    last = -1  # the old position of the last kept IGT
+    prev = None
+    for igt in new:
+        key = _igt_id(igt, seen)
+        seen.add(key)
+        entry = old_igts.get(key)
+        if entry is not None and entry[0] > last:
+            last = entry[0]
+            kept.add(key)
+            if igt.fingerprint != entry[1]:
+                patch.changed[key] = (entry[1], igt)
+        else:
+            patch.added.append((prev, igt))
+        prev = key
+    for key, (_, fingerprint) in old_igts.items():
+        if key not in kept:
+            patch.removed[key] = fingerprint
+    return patch
+
+
+def apply(xc, patch):
+    """
+    Apply |Patch| *patch* to corpus *xc* and return the new corpus.
+
+    The new corpus is transient: the IGTs of *xc* are read, replaced,
+    removed, or followed by added IGTs only as the new corpus is
+    iterated, so *xc* may be transient as well. The added and changed
+    IGTs of *patch* are used as they are, not copied.
+
+    Raises:
+        XigtError: when an IGT to be changed or removed differs from
+            the one the patch was made for, or, after the last IGT,
+            when some part of the patch was not applied
+    """
+    header = patch.header
+    return XigtCorpus(
+        id=header.id,
+        type=header.type,
+        attributes=header.attributes,
+        metadata=[copy.deepcopy(md) for md in header.metadata],
+        igts=_patched_igts(xc, patch),
+        mode=TRANSIENT,
+        namespace=header.namespace,
+        nsmap=header.nsmap
+    )
+
+
+def _patched_igts(igts, patch):
+    following = defaultdict(list)  # after: [added igt]
+    for after, igt in patch.added:
+        following[after].append(igt)
+    changed = patch.changed
+    removed = patch.removed
+    applied = 0
+    for igt in _and_following(following.pop(None, []), following):
+        yield igt
+    for igt in igts:
+        key = igt.id
+        if key in removed:
+            _check_base(igt, removed[key])
+            applied += 1
+            continue
+        if key in changed:
+            base, new_igt = changed[key]
+            _check_base(igt, base)
+            applied += 1
+            igt = new_igt
+        for igt in _and_following([igt], following):
+            yield igt
+    if applied != len(changed) + len(removed) or following:
+        raise XigtError(
+            'The patch does not apply: some IGTs to change or remove, or '
+            'to add IGTs after, were not found.'
+        )
+
+
+def _and_following(igts, following):
+    # yield igts, each followed by the IGTs added after it (and those
+    # added after them, and so on); iterative, as chains may be long
+    stack = list(reversed(igts))
+    while stack:
+        igt = stack.pop()
+        yield igt
+        stack.extend(reversed(following.pop(igt.id, [])))
+
+
+def _check_base(igt, base):
+    if igt.fingerprint != base:
+        raise XigtError(
+            'The patch does not apply: IGT "{}" differs from the one the '
+            'patch was made for.'.format(igt.id)
+        )
+
+
+def _igt_id(igt, seen):
+    key = igt.id
+    if key is None:
+        raise XigtError('Only IGTs with ids can be compared.')
+    if key in seen:
+        raise XigtError('Duplicate IGT id: {}'.format(key))
+    return key
+
+
+def _header(xc):
+    # a copy of the corpus-level information of xc
+    return XigtCorpus(
+        id=xc.id,
+        type=xc.type,
+        attributes=xc.attributes,
+        metadata=[copy.deepcopy(md) for md in xc.metadata],
+        namespace=xc.namespace,
+        nsmap=xc.nsmap
+    )
+
+
+# Serialization ########################################################
+
+def dump(f, patch):
+    """Write |Patch| *patch* to *f*, a filename or binary file."""
+    if hasattr(f, 'write'):
+        _encode(f, patch)
+    else:
+        with compression.open(f, 'wb') as fh:
+            _encode(fh, patch)
+
+
+def dumps(patch):
+    """Return |Patch| *patch* encoded as bytes."""
+    f = BytesIO()
+    _encode(f, patch)
+    return f.getvalue()
+
+
+def load(f):
+    """Read a |Patch| from *f*, a filename or binary file."""
+    if hasattr(f, 'read'):
+        return _decode(f)
+    with compression.open(f, 'rb') as fh:
+        return _decode(fh)
+
+
+def loads(s):
+    """Read a |Patch| from bytes *s*."""
+    return _decode(BytesIO(s))
+
+
+def _encode(fh, patch):
+    fh.write(MAGIC)
+    encoder = _Encoder()
+    _write_bytes(fh, encoder._frame(encoder._encode_corpus, patch.header))
+    for after, igt in patch.added:
+        out = bytearray([_ADD])
+        _write_text(out, after)
+        fh.write(out)
+        _write_bytes(fh, xigtbin.encode_igt(igt))
+    for base, igt in patch.changed.values():
+        fh.write(bytes([_CHANGE]) + base)
+        _write_bytes(fh, xigtbin.encode_igt(igt))
+    for key, base in patch.removed.items():
+        out = bytearray([_REMOVE])
+        _write_text(out, key)
+        fh.write(out + base)
+    fh.write(bytes([_END]))
+
+
+def _write_bytes(fh, data):
+    out = bytearray()
+    _write_varint(out, len(data))
+    fh.write(out)
+    fh.write(data)
+
+
+def _decode(fh):
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise XigtError('Not a Xigt patch.')
+    data = _read_bytes(fh)
+    strings = [None]
+    pos = _read_frame_strings(data, strings)
+    patch = Patch(_decode_corpus(data, pos, strings, None, FULL))
+    while True:
+        op = _read_exactly(fh, 1)[0]
+        if op == _END:
+            break
+        elif op == _ADD:
+            after = _read_file_text(fh)
+            patch.added.append((after, xigtbin.decode_igt(_read_bytes(fh))))
+        elif op == _CHANGE:
+            base = _read_exactly(fh, FINGERPRINT_SIZE)
+            igt = xigtbin.decode_igt(_read_bytes(fh))
+            patch.changed[igt.id] = (base, igt)
+        elif op == _REMOVE:
+            key = _read_file_text(fh)
+            patch.removed[key] = _read_exactly(fh, FINGERPRINT_SIZE)
+        else:
+            raise XigtError('Invalid patch operation: {}'.format(op))
+    return patch
+
+
+def _read_exactly(fh, size):
+    data = fh.read(size)
+    if len(data) != size:
+        raise XigtError('Unexpected end of patch data.')
+    return data
+
+
+def _read_bytes(fh):
+    return _read_exactly(fh, _read_file_varint(fh))
+
+
+def _read_file_text(fh):
+    # text as written by _write_text(): 0 for None, else length + 1
+    n = _read_file_varint(fh)
+    if n == 0:
+        return None
+    return _read_exactly(fh, n - 1).decode('utf-8')
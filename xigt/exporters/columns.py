@@ -0,0 +1,175 @@
+"""
+Export the items of a corpus as a table with one row per item.
+
+Each row describes an item and its context (e.g., the IGT id, tier id
+and type, item id, value, and the ids the item aligns to). Rows are
+produced one IGT at a time, so a transient corpus is exported without
+loading it all at once. Item values are resolved with one memoized
+pass per IGT, so values built from the same referenced items (e.g.,
+morphemes segmenting words segmenting a phrase) are only resolved once.
+
+    >>> from xigt.exporters import columns
+    >>> cols = columns.columns(xc, fields=('tier_type', 'value'))
+    >>> cols['value'][:3]
+    ['inu=ga', 'san-biki', 'hoe-ru']
+
+The `columns()` result can be given directly to, e.g., a pandas
+DataFrame constructor.
+"""
+
+import sys
+import csv
+
+from xigt import ref
+from xigt import compression
+from xigt.consts import ALIGNMENT, CONTENT, SEGMENTATION
+from xigt.errors import XigtError, XigtStructureError
+
+DEFAULT_FIELDS = (
+    'igt_id', 'tier_id', 'tier_type', 'item_id', 'value', 'alignment'
+)
+
+
+def _item_ids(refattr):
+    def get(igt, tier, items, value):
+        ids = ref.ids
+        return [' '.join(ids(item.attributes.get(refattr, '')))
+                for item in items]
+    return get
+
+# functions computing a column for the items of a tier; they take the
+# IGT, the tier, the tier's items, and a function that returns an
+# item's resolved value
+FIELDS = {
+    'igt_id': lambda igt, tier, items, value: [igt.id] * len(items),
+    'tier_id': lambda igt, tier, items, value: [tier.id] * len(items),
+    'tier_type': lambda igt, tier, items, value: [tier.type] * len(items),
+    'item_id': lambda igt, tier, items, value: [i.id for i in items],
+    'item_type': lambda igt, tier, items, value: [i.type for i in items],
+    'text': lambda igt, tier, items, value: [i.text for i in items],
+    'value': lambda igt, tier, items, value: [value(i) for i in items],
+    ALIGNMENT: _item_ids(ALIGNMENT),
+    CONTENT: _item_ids(CONTENT),
+    SEGMENTATION: _item_ids(SEGMENTATION),
+}
+
+
+def xigt_export(xc, outpath, config=None):
+    config = prepare_config(config, outpath)
+    if outpath == '-':
+        export_table(xc, sys.stdout, config)
+    else:
+        with compression.open(outpath, 'w', newline='') as out_fh:
+            export_table(xc, out_fh, config)
+
+
+def prepare_config(config, outpath=None):
+    if config is None:
+        config = {}
+    config.setdefault('fields', DEFAULT_FIELDS)
+    config.setdefault('tier_types', None)
+    if outpath is not None and outpath.endswith('.tsv'):
+        config.setdefault('delimiter', '\t')
+    config.setdefault('delimiter', ',')
+    config.setdefault('header', True)
+    unknown = [f for f in config['fields'] if f not in FIELDS]
+    if unknown:
+        raise XigtError(
+            'Unknown column field(s): {}'.format(', '.join(unknown))
+        )
+    return config
+
+
+def export_table(xc, fh, config):
+    writer = csv.writer(fh, delimiter=config['delimiter'])
+    if config['header']:
+        writer.writerow(config['fields'])
+    writer.writerows(
+        iter_rows(xc, fields=config['fields'],
+                  tier_types=config['tier_types'])
+    )
+
+
+def iter_rows(xc, fields=DEFAULT_FIELDS, tier_types=None):
+    """
+    Yield a tuple of the *fields* for each item in *xc*.
+
+    Args:
+        xc: a |XigtCorpus| or any iterable of |Igt| objects
+        fields: the names of the columns; see `FIELDS` for the
+            available names
+        tier_types: if not `None`, only items on tiers with these
+            types are included
+    """
+    for cols in iter_tier_columns(xc, fields, tier_types):
+        for row in zip(*cols):
+            yield row
+
+
+def columns(xc, fields=DEFAULT_FIELDS, tier_types=None):
+    """
+    Return a dictionary mapping each of *fields* to the list of its
+    values for each item in *xc*. The arguments are the same as for
+    `iter_rows()`.
+    """
+    table = [[] for _ in fields]
+    for cols in iter_tier_columns(xc, fields, tier_types):
+        for column, col in zip(table, cols):
+            column.extend(col)
+    return dict(zip(fields, table))
+
+
+def iter_tier_columns(xc, fields=DEFAULT_FIELDS, tier_types=None):
+    """
+    Yield, for each tier in *xc*, a list with a column of values for
+    the tier's items for each of *fields*. The arguments are the same
+    as for `iter_rows()`.
+    """
+    getters = [FIELDS[field] for field in fields]
+    if tier_types is not None:
+        tier_types = set(tier_types)
+    for igt in xc:
+        value = igt_values(igt)
+        for tier in igt:
+            if tier_types is not None and tier.type not in tier_types:
+                continue
+            items = tier.items
+            if items:
+                yield [get(igt, tier, items, value) for get in getters]
+
+
+def igt_values(igt, refattrs=(CONTENT, SEGMENTATION)):
+    """
+    Return a function that gives the value of an item in *igt*.
+
+    The values are the same as given by `Item.value()` with
+    *refattrs*, but each item is only resolved once.
+    """
+    memo = {}
+
+    def value(item):
+        val = item.text
+        if val is not None:
+            return val
+        key = id(item)
+        try:
+            return memo[key]
+        except KeyError:
+            pass
+        for refattr in refattrs:
+            if refattr in item.attributes:
+                reftier_id = item.tier.attributes[refattr]
+                reftier = igt.get(reftier_id)
+                if reftier is None:
+                    raise XigtStructureError(
+                        'Referred tier (id: {}) does not exist in the Igt.'
+                        .format(reftier_id)
+                    )
+                val = ref.resolve(
+                    reftier, item.attributes[refattr], value=value
+                )
+                break
+        memo[key] = val
+        return val
+
+    return value
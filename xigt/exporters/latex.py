@@ -9,7 +9,8 @@ except ImportError:
     from itertools import izip_longest as zip_longest
 from collections import deque
 from xigt import ref
-from xigt.exporters.util import sub
+from xigt import compression
+from xigt.exporters.util import Substitutions
 
 DEFAULT_TIER_TYPES = ('words', 'morphemes', 'glosses')
 # order matters here
@@ -25,6 +26,14 @@ LATEX_CHARMAP = [
     ('~', '\\textasciitilde'),
     ('^', '\\textasciicircum'),
 ]
+# each character is replaced independently, so one pass is enough
+_latex_escapes = dict(LATEX_CHARMAP)
+_latex_escape_re = re.compile(
+    '[{}]'.format(re.escape(''.join(c for c, _ in LATEX_CHARMAP)))
+)
+
+def _latex_escape(m):
+    return _latex_escapes[m.group(0)]
 
 header = '''
 \\documentclass{article}
@@ -38,7 +47,7 @@ footer = '''
 
 def xigt_export(xc, outpath, config=None):
     config = prepare_config(config)
-    with open(outpath, 'w') as out_fh:
+    with compression.open(outpath, 'w') as out_fh:
         print(header, file=out_fh)
         for s in export_corpus(xc, config):
             print(s, file=out_fh)
@@ -49,19 +58,17 @@ def prepare_config(config):
     if config is None:
         config = {}
     config.setdefault('tier_types', DEFAULT_TIER_TYPES)
-    config.setdefault('item_substitutions', [])
-    config.setdefault('tier_substitutions', [])
+    # compile substitutions now, since they won't change
+    config['item_substitutions'] = Substitutions(
+        config.get('item_substitutions')
+    )
+    config['tier_substitutions'] = Substitutions(
+        config.get('tier_substitutions')
+    )
     return config
 
 def escape(s):
-    # consider a re sub with a function. e.g.
-    # _character_unescapes = {'\\s': _field_delimiter, '\\n': '\n', '\\\\': '\\'}
-    # _unescape_func = lambda m: _character_unescapes[m.group(0)]
-    # _unescape_re = re.compile(r'(\\s|\\n|\\\\)')
-    # _unescape_re.sub(_unescape_func, string, re.UNICODE)
-    for c, r in LATEX_CHARMAP:
-        s = s.replace(c, r)
-    return s
+    return _latex_escape_re.sub(_latex_escape, s)
 
 def export_corpus(xc, config):
     for igt in xc:
@@ -71,8 +78,8 @@ def export_corpus(xc, config):
 
 def export_igt(igt, config):
     tier_types = config['tier_types']
-    item_subs = config['item_substitutions']
-    tier_subs = config['tier_substitutions']
+    item_subs = Substitutions(config['item_substitutions'])
+    tier_subs = Substitutions(config['tier_substitutions'])
     tiers = []
     for tier in igt.tiers:
         typ = tier.type
@@ -95,20 +102,16 @@ def export_igt(igt, config):
             items = col[i]
             toks.append('{{{}}}'.format(
                 ' '.join(
-                    sub(escape(item.get_content() or '{}'),
-                        tier_type,
-                        item_subs)
+                    item_subs(escape(item.value() or '{}'), tier_type)
                     for item in items
                 )
             ))
-        lines.append(sub(' '.join(toks) + '\\\\', tier_type, tier_subs))
+        lines.append(tier_subs(' '.join(toks) + '\\\\', tier_type))
     # add translation
     for tier in igt.tiers:
         if tier.type == 'translations' and len(tier) > 0:
             lines.append('\\trans {}'.format(
-                sub(escape(tier[0].get_content() or '{}'),
-                    tier.type,
-                    tier_subs)
+                tier_subs(escape(tier[0].value() or '{}'), tier.type)
             ))
     lines.append('\\end{exe}')
     return '\n'.join(lines)
@@ -170,8 +173,8 @@ def align_tier(trellis, tier):
         #trellis[idx]
         #trellis[idx][depth]
         trellis[idx][depth].extend(items)
-        logging.debug('Added items at idx {} depth {}: {}'
-                      .format(idx, depth, items))
+        # lazy formatting; item reprs resolve values
+        logging.debug('Added items at idx %s depth %s: %s', idx, depth, items)
     # when agendum is done, just append any remaining delayed items
     trellis, _ = add_delayed(trellis, delay, len(trellis), depth)
     # if the agenda was shorter than the prev tier, fill in empty values
@@ -182,7 +185,7 @@ def align_tier(trellis, tier):
         idx += 1
     logging.debug('Agenda done.')
     for col in trellis:
-        logging.debug('Col {}'.format(col))
+        logging.debug('Col %s', col)
     return trellis
 
 def get_agenda(tier):
@@ -205,8 +208,7 @@ def add_delayed(trellis, delay, pos, depth):
         col = [[]] * (depth)
         col.append(delayed_items)
         trellis.insert(pos, col)
-        logging.debug('Added delayed items at {}: {}'
-                      .format(pos, delayed_items))
+        logging.debug('Added delayed items at %s: %s', pos, delayed_items)
         num += 1
     return trellis, num
 
@@ -223,6 +225,8 @@ def merge_columns(trellis, start, end):
     )
 
 def debug_display_trellis(trellis):
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
     strs = []
     for col in trellis:
         toks = [' '.join(i.id for i in row) if row else '[]' for row in col]
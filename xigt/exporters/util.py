@@ -1,13 +1,66 @@
 import re
 
-def sub(s, tier_type, subs):
-    for tier_regex, patterns in subs:
-        if not re.match(tier_regex, tier_type):
+
+class Substitutions(object):
+    """
+    Substitution rules compiled for repeated application.
+
+    The *subs* argument is a list of `(tier_regex, patterns)` pairs,
+    where *patterns* is a list of `(regex, sub_pattern)` pairs as used
+    in exporter configurations. A *sub_pattern* is either a
+    replacement string or an `(args, expr)` pair that is evaluated to
+    a replacement function. All regular expressions are compiled once,
+    and the rules applicable to each tier type are resolved on first
+    use and reused thereafter. Rules are applied in order, so the
+    output of one rule is the input of the next.
+    """
+    def __init__(self, subs):
+        if isinstance(subs, Substitutions):
+            self._rules = subs._rules
+            self._by_tier_type = subs._by_tier_type
+        else:
+            self._rules = [
+                (re.compile(tier_regex), _compile_patterns(patterns))
+                for tier_regex, patterns in (subs or [])
+            ]
+            self._by_tier_type = {}
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def rules(self, tier_type):
+        try:
+            return self._by_tier_type[tier_type]
+        except KeyError:
+            rules = [
+                rule
+                for tier_re, patterns in self._rules
+                if tier_re.match(tier_type)
+                for rule in patterns
+            ]
+            self._by_tier_type[tier_type] = rules
+            return rules
+
+    def __call__(self, s, tier_type):
+        for regex, repl in self.rules(tier_type):
+            s = regex.sub(repl, s)
+        return s
+
+
+def _compile_patterns(patterns):
+    compiled = []
+    for regex, sub_pattern in patterns:
+        if isinstance(sub_pattern, str):
+            repl = sub_pattern
+        elif len(sub_pattern) == 2:
+            repl = eval('lambda {}: {}'.format(*sub_pattern))
+        else:
             continue
-        for regex, sub_pattern in patterns:
-            if isinstance(sub_pattern, str):
-                s = re.sub(regex, sub_pattern, s)
-            elif len(sub_pattern) == 2:
-                f = eval('lambda {}: {}'.format(*sub_pattern))
-                s = re.sub(regex, f, s)
-    return s
\ No newline at end of file
+        compiled.append((re.compile(regex), repl))
+    return compiled
+
+
+def sub(s, tier_type, subs):
+    if not isinstance(subs, Substitutions):
+        subs = Substitutions(subs)
+    return subs(s, tier_type)
@@ -0,0 +1,388 @@
+
+"""
+Deterministic synthetic corpora for load, scaling, and stress tests.
+
+The generated IGTs are shaped like the output of the ODIN and Toolbox
+importers: a phrase is segmented into words and the words into
+morphemes, the morphemes are glossed, and a translation is aligned to
+the phrase. The words are made of invented morphemes, so the text is
+nonsense, but every segmentation span and content reference resolves.
+
+* `odin` IGTs have the raw, cleaned, and normalized `odin` tiers of
+  the ODIN importer; the phrases, glosses, and translations take their
+  content from the normalized lines, and each IGT has OLAC metadata
+  (`dc:subject` and `dc:language` with `olac:code` attributes) giving
+  its language, which is shared by the IGTs of a document (`doc-id`)
+* `toolbox` IGTs have the words, morphemes, glosses, and parts of
+  speech tiers of the Toolbox importer, with the text on the items, and
+  the corpus has OLAC metadata giving the language of all IGTs
+
+Further structure can be added to either shape for stress tests:
+
+* `tiers` extra annotation tiers (`x1`, `x2`, etc.) with an item for
+  each morpheme; they form reference chains of length `depth`, where
+  the first tier of a chain aligns to the morphemes and each other
+  tier to the one before it. The tiers of the first chain have the
+  types `annotations`, `tags`, and `notes` (for the rest of a longer
+  chain), and those of later chains have numbered types (e.g.,
+  `annotations-2`)
+* `namespaces` extra namespaces declared on the corpus, each used by
+  an attribute on every IGT and extra annotation tier
+
+IGT *i* depends only on *i*, the shape, the structure options, and the
+seed, so the same arguments always give the same corpus, and a smaller
+corpus is a prefix of a larger one. The IGTs are made as they are
+needed, so corpora of any size can be written without being held in
+memory:
+
+    >>> from xigt.generate import generate
+    >>> from xigt.codecs import xigtxml
+    >>> xigtxml.dump('big.xml', generate(igts=1000000, shape='toolbox'))
+"""
+
+import random
+from functools import partial
+
+from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt.model import IgtSource
+from xigt.consts import TRANSIENT
+from xigt.errors import XigtError
+
+SHAPES = ('odin', 'toolbox')
+
+OLAC = 'http://www.language-archives.org/OLAC/1.1/'
+DC = 'http://purl.org/dc/elements/1.1/'
+XSI = 'http://www.w3.org/2001/XMLSchema-instance'
+NSMAP = {'olac': OLAC, 'dc': DC, 'xsi': XSI}
+
+SYLLABLES = [
+    'ka', 'ni', 'ro', 'su', 'te', 'mi', 'ga', 'do', 'ya', 'pe',
+    'la', 'bu', 'ko', 'se', 'ta', 'wi', 'no', 'ha', 'ri', 'zu'
+]
+STEM_GLOSSES = [
+    'dog', 'child', 'rice', 'house', 'water', 'tree', 'see', 'eat',
+    'give', 'run', 'sleep', 'big', 'red', 'three', 'river', 'stone',
+    'woman', 'man', 'bird', 'go', 'come', 'fish', 'hand', 'good'
+]
+AFFIX_GLOSSES = [
+    'NOM', 'ACC', 'DAT', 'GEN', 'LOC', 'PL', 'PST', 'PRS', 'FUT',
+    'CAUS', 'NEG', 'DEC', 'Q', '1SG', '3SG', 'DEF'
+]
+POS_TAGS = {'stem': ['N', 'V', 'ADJ'], 'affix': ['SUFF']}
+
+# the invented morphemes: (form, gloss); the lexicon does not depend
+# on the seed, so the seed only changes which morphemes are used
+_lexicon_rng = random.Random('xigt.generate')
+STEMS = [
+    (''.join(_lexicon_rng.choice(SYLLABLES)
+             for _ in range(_lexicon_rng.randint(1, 2))), gloss)
+    for gloss in STEM_GLOSSES
+]
+AFFIXES = [(_lexicon_rng.choice(SYLLABLES), gloss) for gloss in AFFIX_GLOSSES]
+del _lexicon_rng
+
+IGTS_PER_DOCUMENT = 10
+
+ANNOTATION_TYPES = ('annotations', 'tags', 'notes')
+
+
+def language(n):
+    """
+    Return the (code, name) of invented language *n*.
+
+    The codes are in the ISO 639-3 range reserved for local use
+    (`qaa`-`qtz`), so there are 520 languages.
+    """
+    if not 0 <= n < 520:
+        raise XigtError('Invalid language number: {}'.format(n))
+    first, second = divmod(n, 26)
+    code = 'q' + chr(ord('a') + first) + chr(ord('a') + second)
+    name = (SYLLABLES[first] + SYLLABLES[second % 20]).capitalize()
+    return code, name
+
+
+def generate(igts=1000, shape='odin', seed=0, mode=TRANSIENT, **kwargs):
+    """
+    Return a synthetic corpus of *igts* IGTs.
+
+    Args:
+        igts: the number of IGTs
+        shape: `"odin"` or `"toolbox"` (see the module documentation)
+        seed: the random seed
+        mode: the mode of the corpus; in the default `transient` mode,
+            the IGTs are made (again) each time the corpus is iterated,
+            and in `full` mode they are all made at once
+        kwargs: structure options passed to :func:`generate_igt`
+    Returns:
+        a |XigtCorpus|
+    """
+    _check_shape(shape)
+    nsmap = dict(NSMAP)
+    nsmap.update(extra_namespaces(kwargs.get('namespaces', 0)))
+    metadata = None
+    if shape == 'toolbox':
+        lang = language(_corpus_language(seed, kwargs.get('languages', 10)))
+        metadata = [_olac_metadata('md1', lang)]
+    return XigtCorpus(
+        id='{}-{}'.format(shape, seed),
+        metadata=metadata,
+        igts=IgtSource(
+            partial(generate_igts, igts, shape=shape, seed=seed, **kwargs),
+            count=lambda: igts
+        ),
+        mode=mode,
+        nsmap=nsmap
+    )
+
+
+def generate_igts(igts=1000, shape='odin', seed=0, start=0, **kwargs):
+    """
+    Yield *igts* synthetic IGTs, starting with IGT *start*.
+
+    The arguments are as for :func:`generate`.
+    """
+    for i in range(start, start + igts):
+        yield generate_igt(i, shape=shape, seed=seed, **kwargs)
+
+
+def generate_igt(i, shape='odin', seed=0, words=(2, 8), morphemes=(1, 3),
+                 languages=10, tiers=0, items=None, depth=2, namespaces=0):
+    """
+    Return synthetic IGT *i*.
+
+    Args:
+        i: the number of the IGT, giving its id (e.g., `igt1` for 0)
+        shape: `"odin"` or `"toolbox"` (see the module documentation)
+        seed: the random seed
+        words: the (minimum, maximum) number of words in the phrase
+        morphemes: the (minimum, maximum) number of morphemes per word
+        languages: the number of languages the IGTs are spread over
+        tiers: the number of extra annotation tiers
+        items: if given, the exact number of words in the phrase,
+            instead of *words*
+        depth: the length of the reference chains of the extra
+            annotation tiers
+        namespaces: the number of extra namespaces used by attributes
+    Returns:
+        an |Igt|
+    """
+    _check_shape(shape)
+    if tiers < 0 or depth < 1 or namespaces < 0 or (
+            items is not None and items < 1):
+        raise XigtError(
+            'Invalid structure options: tiers={}, items={}, depth={}, '
+            'namespaces={}'.format(tiers, items, depth, namespaces)
+        )
+    if items is not None:
+        words = (items, items)
+    rng = random.Random('{}:{}'.format(seed, i))
+    phrase = [
+        [rng.choice(STEMS)] + [
+            rng.choice(AFFIXES) for _ in range(rng.randint(*morphemes) - 1)
+        ]
+        for _ in range(rng.randint(*words))
+    ]
+    if shape == 'odin':
+        igt = _odin_igt(i, phrase, seed, languages)
+    else:
+        igt = _toolbox_igt(i, rng, phrase)
+    if tiers or namespaces:
+        _add_structure(igt, i, rng, tiers, depth, namespaces)
+    return igt
+
+
+def extra_namespaces(n):
+    """Return the map of *n* extra namespaces (see `namespaces`)."""
+    return dict(
+        ('ns{}'.format(j), 'http://example.org/ns{}'.format(j))
+        for j in range(n)
+    )
+
+
+def _check_shape(shape):
+    if shape not in SHAPES:
+        raise XigtError(
+            'Invalid corpus shape: {} (expected one of: {})'
+            .format(shape, ', '.join(SHAPES))
+        )
+
+
+def _corpus_language(seed, languages):
+    return random.Random('{}:language'.format(seed)).randrange(languages)
+
+
+def _olac_metadata(meta_id, lang):
+    code, name = lang
+    return Metadata(metas=[Meta(id=meta_id, children=[
+        MetaChild('subject', namespace=DC, text=name, attributes={
+            '{%s}type' % XSI: 'olac:language', '{%s}code' % OLAC: code
+        }),
+        MetaChild('language', namespace=DC, text='English', attributes={
+            '{%s}type' % XSI: 'olac:language', '{%s}code' % OLAC: 'en'
+        })
+    ])])
+
+
+def _lines(phrase):
+    # the morpheme-segmented line, the gloss line, and the translation
+    # of a phrase, and the spans of the words, morphemes, and glosses
+    line, gloss_line = [], []
+    word_spans, morph_spans, gloss_spans = [], [], []
+    pos = gpos = 0
+    for word in phrase:
+        wstart, mspans, gspans = pos, [], []
+        for j, (form, gloss) in enumerate(word):
+            if j:
+                line.append('-')
+                gloss_line.append('-')
+                pos += 1
+                gpos += 1
+            mspans.append((pos - wstart, pos - wstart + len(form)))
+            gspans.append((gpos, gpos + len(gloss)))
+            line.append(form)
+            gloss_line.append(gloss)
+            pos += len(form)
+            gpos += len(gloss)
+        word_spans.append((wstart, pos))
+        morph_spans.append(mspans)
+        gloss_spans.append(gspans)
+        line.append(' ')
+        gloss_line.append(' ')
+        pos += 1
+        gpos += 1
+    translation = ' '.join(word[0][1] for word in phrase).capitalize() + '.'
+    return (''.join(line[:-1]), ''.join(gloss_line[:-1]), translation,
+            word_spans, morph_spans, gloss_spans)
+
+
+def _odin_igt(i, phrase, seed, languages):
+    line, gloss_line, translation, wspans, mspans, gspans = _lines(phrase)
+    doc = i // IGTS_PER_DOCUMENT
+    lineno = 3 * i + 1
+    lines = [
+        ('L', '{:>4} {}'.format(i % IGTS_PER_DOCUMENT + 1, line), line),
+        ('G', '     ' + gloss_line, gloss_line),
+        ('T', "     `{}'".format(translation), translation),
+    ]
+    raw, cleaned, normalized = [], [], []
+    for j, (tag, text, norm) in enumerate(lines, 1):
+        line_attr = str(lineno + j - 1)
+        raw.append(_item('r{}'.format(j), text, line=line_attr, tag=tag))
+        cleaned.append(_item('c{}'.format(j), text, line=line_attr, tag=tag,
+                             alignment='r{}'.format(j)))
+        normalized.append(_item('n{}'.format(j), norm, line=line_attr,
+                                tag=tag, alignment='c{}'.format(j)))
+    words, morphs, glosses = [], [], []
+    for w, (start, end) in enumerate(wspans, 1):
+        words.append(_item('w{}'.format(w), None,
+                           segmentation='p1[{}:{}]'.format(start, end)))
+        for m, ((ms, me), (gs, ge)) in enumerate(
+                zip(mspans[w - 1], gspans[w - 1]), 1):
+            morphs.append(_item('m{}.{}'.format(w, m), None,
+                                segmentation='w{}[{}:{}]'.format(w, ms, me)))
+            glosses.append(_item('g{}.{}'.format(w, m), None,
+                                 alignment='m{}.{}'.format(w, m),
+                                 content='n2[{}:{}]'.format(gs, ge)))
+    lang = random.Random('{}:doc{}'.format(seed, doc)).randrange(languages)
+    return Igt.unchecked(
+        id='igt{}'.format(i + 1),
+        attributes={
+            'doc-id': str(doc),
+            'line-range': '{} {}'.format(lineno, lineno + 2),
+            'tag-types': 'L G T'
+        },
+        metadata=[_olac_metadata('md1', language(lang))],
+        tiers=[
+            _tier('r', 'odin', raw, state='raw'),
+            _tier('c', 'odin', cleaned, state='cleaned', alignment='r'),
+            _tier('n', 'odin', normalized, state='normalized',
+                  alignment='c'),
+            _tier('p', 'phrases', [_item('p1', None, content='n1')],
+                  content='n'),
+            _tier('w', 'words', words, segmentation='p'),
+            _tier('m', 'morphemes', morphs, segmentation='w'),
+            _tier('g', 'glosses', glosses, alignment='m', content='n'),
+            _tier('t', 'translations',
+                  [_item('t1', None, alignment='p1', content='n3')],
+                  alignment='p', content='n')
+        ]
+    )
+
+
+def _toolbox_igt(i, rng, phrase):
+    line, _, translation, wspans, mspans, _ = _lines(phrase)
+    words, morphs, glosses, pos = [], [], [], []
+    n = 0
+    for w, (start, end) in enumerate(wspans, 1):
+        words.append(_item('w{}'.format(w), line[start:end],
+                           segmentation='p1[{}:{}]'.format(start, end)))
+        for j, ((form, gloss), (ms, me)) in enumerate(
+                zip(phrase[w - 1], mspans[w - 1])):
+            n += 1
+            morph_id = 'm{}'.format(n)
+            morphs.append(_item(morph_id, form if j == 0 else '-' + form,
+                                segmentation='w{}[{}:{}]'.format(w, ms, me)))
+            glosses.append(_item('g{}'.format(n),
+                                 gloss if j == 0 else '-' + gloss,
+                                 alignment=morph_id))
+            tag = rng.choice(POS_TAGS['affix' if j else 'stem'])
+            pos.append(_item('pos{}'.format(n), tag, alignment=morph_id))
+    return Igt.unchecked(
+        id='igt{}'.format(i + 1),
+        attributes={'corpus-id': 'ref{:06d}'.format(i + 1)},
+        tiers=[
+            _tier('p', 'phrases', [_item('p1', line)]),
+            _tier('w', 'words', words, segmentation='p'),
+            _tier('m', 'morphemes', morphs, segmentation='w'),
+            _tier('g', 'glosses', glosses, alignment='m'),
+            _tier('pos', 'pos', pos, alignment='m'),
+            _tier('t', 'translations',
+                  [_item('t1', translation, alignment='p1')],
+                  alignment='p')
+        ]
+    )
+
+
+def _add_structure(igt, i, rng, tiers, depth, namespaces):
+    # add the extra annotation tiers and namespaced attributes; this
+    # comes after everything else is made, so without them the IGT is
+    # the same as before
+    attributes = dict(
+        ('{{http://example.org/ns{}}}attr'.format(j),
+         'v{}'.format(i % 7))
+        for j in range(namespaces)
+    )
+    igt.attributes.update(attributes)
+    morph_ids = [item.id for item in igt['m']]
+    for k in range(tiers):
+        tier_id = 'x{}'.format(k + 1)
+        chain, pos = divmod(k, depth)
+        tier_type = ANNOTATION_TYPES[min(pos, len(ANNOTATION_TYPES) - 1)]
+        if chain:
+            tier_type = '{}-{}'.format(tier_type, chain + 1)
+        if pos == 0:
+            target, target_ids = 'm', morph_ids
+        else:
+            target = 'x{}'.format(k)
+            target_ids = ['{}.{}'.format(target, n)
+                          for n in range(1, len(morph_ids) + 1)]
+        items = [
+            _item('{}.{}'.format(tier_id, n), rng.choice(AFFIX_GLOSSES),
+                  alignment=target_id)
+            for n, target_id in enumerate(target_ids, 1)
+        ]
+        tier = _tier(tier_id, tier_type, items, alignment=target)
+        tier.attributes.update(attributes)
+        igt.append(tier)
+
+
+# the generated data is valid by construction, so the objects are
+# built with the unchecked constructors
+
+def _tier(id, type, items, **attributes):
+    return Tier.unchecked(id=id, type=type, attributes=attributes,
+                          items=items)
+
+
+def _item(id, text, **attributes):
+    return Item.unchecked(id=id, text=text, attributes=attributes)
@@ -36,6 +36,7 @@ from itertools import chain
 import odintxt # https://github.com/xigt/odin-utils
 
 from xigt import XigtCorpus, Igt, Tier, Item, Metadata, Meta, MetaChild
+from xigt import compression
 from xigt.codecs import xigtxml
 from xigt.errors import XigtImportError
 
@@ -77,7 +78,8 @@ def xigt_import(inpath, outpath, options=None):
 
 
 def _xigt_import(infile, outfile, options):
-    with open(infile, 'r') as in_fh, open(outfile, 'w') as out_fh:
+    with compression.open(infile, 'r') as in_fh, \
+            compression.open(outfile, 'w') as out_fh:
         igts = odin_igts(in_fh, options)
         xc = XigtCorpus(
             igts=igts,
@@ -50,6 +50,7 @@ except ImportError:
     from itertools import chain, izip_longest as zip_longest
 
 from xigt import (XigtCorpus, Igt, Tier, Item, Metadata, Meta)
+from xigt import compression
 from xigt.codecs import xigtxml
 from xigt.errors import XigtImportError
 
@@ -122,7 +123,8 @@ def xigt_import(infile, outfile, options=None, encoding='utf-8'):
     # just use existing info to create marker-based alignment info
     options['tb_alignments'] = _make_tb_alignments(options) 
 
-    with open(infile, 'rb') as in_fh, open(outfile, 'w') as out_fh:
+    with compression.open(infile, 'rb') as in_fh, \
+            compression.open(outfile, 'w') as out_fh:
         in_lines = (_respace_decode(line, encoding) for line in in_fh)
         tb = toolbox.read_toolbox_file(in_lines)
         igts = toolbox_igts(tb, options)
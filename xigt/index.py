@@ -0,0 +1,435 @@
+
+"""
+Persistent query indices over collections of XigtXML files.
+
+An index is a SQLite database that records, for each indexed file, the
+byte offsets of every `<igt>` element along with the IGT's attributes,
+tier ids and types, and metadata. Queries whose first step selects IGTs
+(e.g., `igt[@doc-id="397"]/tier`) use the index to find candidate IGTs
+and only those IGTs are decoded; other queries, and queries on files
+that changed since they were indexed, fall back to decoding the whole
+file.
+
+    >>> from xigt.index import XigtIndex
+    >>> with XigtIndex('corpora.idx') as idx:
+    ...     idx.update('kor.xml')
+    ...     words = idx.findall('kor.xml', 'igt[tier/@type="words"]')
+"""
+
+import os
+import json
+import logging
+import sqlite3
+from collections import deque
+
+from xigt import xigtpath as xp
+from xigt import compression
+from xigt.codecs import xigtxml
+from xigt.errors import XigtError
+
+
+class XigtIndexError(XigtError): pass
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    header BLOB NOT NULL,
+    footer BLOB NOT NULL,
+    nsmap TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS igts (
+    id INTEGER PRIMARY KEY,
+    file INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    igt_id TEXT,
+    start_offset INTEGER NOT NULL,
+    end_offset INTEGER NOT NULL,
+    nsmap TEXT
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    igt INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS tiers (
+    igt INTEGER NOT NULL,
+    tier_id TEXT,
+    type TEXT
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    igt INTEGER NOT NULL,
+    element TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS igts_file ON igts (file, position);
+CREATE INDEX IF NOT EXISTS attributes_name ON attributes (name, value);
+CREATE INDEX IF NOT EXISTS attributes_igt ON attributes (igt);
+CREATE INDEX IF NOT EXISTS tiers_type ON tiers (type);
+CREATE INDEX IF NOT EXISTS tiers_id ON tiers (tier_id);
+CREATE INDEX IF NOT EXISTS tiers_igt ON tiers (igt);
+CREATE INDEX IF NOT EXISTS metadata_name ON metadata (element, name, value);
+CREATE INDEX IF NOT EXISTS metadata_igt ON metadata (igt);
+'''
+
+
+class XigtIndex(object):
+    """
+    A persistent index of XigtXML files.
+
+    Args:
+        path: the path of the SQLite database; it is created if it
+            does not exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def files(self):
+        """Return the list of indexed file paths."""
+        rows = self._conn.execute('SELECT path FROM files ORDER BY path')
+        return [row[0] for row in rows]
+
+    def is_current(self, filename):
+        """
+        Return `True` if *filename* is indexed and has not changed
+        since it was indexed.
+        """
+        row = self._file_row(filename)
+        if row is None:
+            return False
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        return row[2] == stat.st_size and row[3] == stat.st_mtime
+
+    def update(self, filename):
+        """
+        Index *filename* unless its index is current. Return `True` if
+        the file was (re)indexed.
+        """
+        if self.is_current(filename):
+            return False
+        self.add(filename)
+        return True
+
+    def add(self, filename):
+        """Index *filename*, replacing any previous index of it."""
+        path = _normpath(filename)
+        stat = os.stat(path)
+        offsets = xigtxml.scan_offsets(path)
+        xc = xigtxml.load(path, mode='transient')
+        conn = self._conn
+        with conn:
+            self._delete(path)
+            cur = conn.execute(
+                'INSERT INTO files (path, size, mtime, header, footer, nsmap) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (path, stat.st_size, stat.st_mtime,
+                 offsets.header, offsets.footer, json.dumps(xc.nsmap))
+            )
+            file_id = cur.lastrowid
+            count = 0
+            for position, (igt, span) in enumerate(zip(xc, offsets.offsets)):
+                self._add_igt(file_id, position, igt, span)
+                count += 1
+            if count != len(offsets.offsets):
+                raise XigtIndexError(
+                    'Could not align IGTs with byte offsets in {}.'
+                    .format(filename)
+                )
+        logging.debug('Indexed {} IGTs in {}'.format(count, filename))
+
+    def remove(self, filename):
+        """Remove *filename* from the index."""
+        with self._conn:
+            self._delete(_normpath(filename))
+
+    def load_igts(self, filename, positions=None):
+        """
+        Decode IGTs of *filename* using their byte offsets.
+
+        Yield `(position, igt)` pairs in document order for the IGTs at
+        *positions* (an iterable of integers), or for all IGTs if
+        *positions* is `None`. The file's index must be current.
+        """
+        row = self._current_file_row(filename)
+        file_id, header, footer = row[0], row[4], row[5]
+        rows = self._conn.execute(
+            'SELECT position, start_offset, end_offset FROM igts '
+            'WHERE file=? ORDER BY position',
+            (file_id,)
+        )
+        if positions is not None:
+            positions = set(positions)
+        with compression.open(filename, 'rb', random_access=True) as fh:
+            for position, start, end in rows:
+                if positions is None or position in positions:
+                    igt = xigtxml.load_igt_at(fh, start, end, header, footer)
+                    yield position, igt
+
+    def can_plan(self, filename, path):
+        """
+        Return `True` if queries for *path* on *filename* can use the
+        index, or `False` if they would decode the whole file.
+        """
+        return _plan(path) is not None and self.is_current(filename)
+
+    def find(self, filename, path):
+        """Return the first result of *path* on *filename*, or `None`."""
+        return next(self.iterfind(filename, path), None)
+
+    def findall(self, filename, path):
+        """Return the list of results of *path* on *filename*."""
+        return list(self.iterfind(filename, path))
+
+    def iterfind(self, filename, path):
+        """
+        Yield the results of the XigtPath *path* on the corpus in
+        *filename*, as `xigt.xigtpath.iterfind()` would on the fully
+        loaded corpus.
+        """
+        if not self.can_plan(filename, path):
+            logging.info(
+                'Cannot use the index for {} on {}; decoding the file.'
+                .format(path, filename)
+            )
+            xc = xigtxml.load(filename)
+            for result in xp.iterfind(xc, path):
+                yield result
+            return
+        predicates, rest = _plan(path)
+        # the predicates are checked again on the decoded IGTs, so the
+        # index only needs to find a superset of the matching IGTs
+        subpath = '.{}{}'.format(
+            ''.join('[{}]'.format(''.join(pred)) for pred in predicates),
+            ''.join(rest)
+        )
+        positions = self._candidates(filename, predicates)
+        for _, igt in self.load_igts(filename, positions):
+            for result in xp.iterfind(igt, subpath):
+                yield result
+
+    def key_values(self, filename, keypath):
+        """
+        Return the value of *keypath* (as `xigt.xigtpath.find()` would
+        give) for each IGT of *filename*, as a list in document order.
+
+        Only attribute paths (e.g., `@doc-id`) are answered from the
+        index; other paths are evaluated on IGTs decoded from their
+        byte offsets. The file's index must be current.
+        """
+        tokens = xp.tokenize(keypath)
+        if len(tokens) != 2 or tokens[0] != '@' or tokens[1] == '*':
+            return [xp.find(igt, keypath)
+                    for _, igt in self.load_igts(filename)]
+        file_id, nsmap = self._file_id_and_nsmap(filename)
+        name = tokens[1]
+        rows = self._conn.execute(
+            'SELECT igts.position, igts.nsmap, attributes.value '
+            'FROM igts LEFT JOIN attributes '
+            'ON attributes.igt = igts.id AND attributes.name = ? '
+            'WHERE igts.file = ? ORDER BY igts.position',
+            (_attribute_key(name, nsmap), file_id)
+        )
+        values = []
+        undetermined = []
+        for position, igt_nsmap, value in rows:
+            if name == 'name':
+                value = None  # not an Igt attribute in XigtPath
+            elif igt_nsmap is not None and ':' in name:
+                undetermined.append(position)
+            values.append(value)
+        for position, igt in self.load_igts(filename, undetermined):
+            values[position] = xp.find(igt, keypath)
+        return values
+
+    def _file_row(self, filename):
+        return self._conn.execute(
+            'SELECT id, path, size, mtime, header, footer, nsmap '
+            'FROM files WHERE path=?',
+            (_normpath(filename),)
+        ).fetchone()
+
+    def _current_file_row(self, filename):
+        if not self.is_current(filename):
+            raise XigtIndexError(
+                'The index of {} is missing or out of date.'.format(filename)
+            )
+        return self._file_row(filename)
+
+    def _file_id_and_nsmap(self, filename):
+        row = self._current_file_row(filename)
+        return row[0], json.loads(row[6])
+
+    def _delete(self, path):
+        conn = self._conn
+        row = conn.execute(
+            'SELECT id FROM files WHERE path=?', (path,)
+        ).fetchone()
+        if row is None:
+            return
+        file_id = row[0]
+        for table in ('attributes', 'tiers', 'metadata'):
+            conn.execute(
+                'DELETE FROM {} WHERE igt IN '
+                '(SELECT id FROM igts WHERE file=?)'.format(table),
+                (file_id,)
+            )
+        conn.execute('DELETE FROM igts WHERE file=?', (file_id,))
+        conn.execute('DELETE FROM files WHERE id=?', (file_id,))
+
+    def _add_igt(self, file_id, position, igt, span):
+        conn = self._conn
+        own_nsmap = igt._nsmap
+        if own_nsmap is None and any(
+                md._nsmap is not None
+                or any(meta._nsmap is not None for meta in md)
+                for md in igt.metadata):
+            own_nsmap = {}  # prefixes in metadata may resolve differently
+        cur = conn.execute(
+            'INSERT INTO igts '
+            '(file, position, igt_id, start_offset, end_offset, nsmap) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (file_id, position, igt.id, span[0], span[1],
+             None if own_nsmap is None else json.dumps(own_nsmap))
+        )
+        rowid = cur.lastrowid
+        conn.executemany(
+            'INSERT INTO attributes (igt, name, value) VALUES (?, ?, ?)',
+            [(rowid, name, value) for name, value in _attribute_rows(igt)]
+        )
+        conn.executemany(
+            'INSERT INTO tiers (igt, tier_id, type) VALUES (?, ?, ?)',
+            [(rowid, tier.id, tier.type) for tier in igt]
+        )
+        conn.executemany(
+            'INSERT INTO metadata (igt, element, name, value) '
+            'VALUES (?, ?, ?, ?)',
+            [(rowid, element, name, value)
+             for md in igt.metadata
+             for meta in md
+             for element, name, value in _metadata_rows('meta', meta)]
+        )
+
+    def _candidates(self, filename, predicates):
+        file_id, nsmap = self._file_id_and_nsmap(filename)
+        conditions = ['igts.file = ?']
+        params = [file_id]
+        for pred in predicates:
+            condition = _predicate_condition(pred, nsmap)
+            if condition is not None:
+                sql, args = condition
+                # IGTs that declare namespaces may resolve prefixes
+                # differently, so they are always candidates
+                conditions.append(
+                    '(igts.nsmap IS NOT NULL OR {})'.format(sql)
+                )
+                params.extend(args)
+        rows = self._conn.execute(
+            'SELECT igts.position FROM igts WHERE {} '
+            'ORDER BY igts.position'.format(' AND '.join(conditions)),
+            params
+        )
+        return [row[0] for row in rows]
+
+
+def _normpath(filename):
+    return os.path.abspath(filename)
+
+
+def _attribute_rows(obj):
+    # id and type are model attributes but XigtPath treats them as
+    # XML attributes
+    if obj.id is not None:
+        yield ('id', obj.id)
+    if obj.type is not None:
+        yield ('type', obj.type)
+    for name, value in obj.attributes.items():
+        yield (name, value)
+
+
+def _metadata_rows(element, obj):
+    for name, value in _attribute_rows(obj):
+        yield (element, name, value)
+    if obj.text is not None:
+        yield (element, '', obj.text)
+    for child in obj:
+        child_element = child.name
+        if child.namespace is not None:
+            child_element = '{%s}%s' % (child.namespace, child.name)
+        for row in _metadata_rows(child_element, child):
+            yield row
+
+
+def _attribute_key(name, nsmap):
+    # as XigtAttributeMixin.get_attribute() resolves prefixes
+    if ':' in name:
+        prefix, name = name.split(':', 1)
+        return '{%s}%s' % (nsmap.get(prefix, prefix), name)
+    return name
+
+
+def _plan(path):
+    # split a path like igt[pred1][pred2]/rest into its predicates and
+    # the rest; return None if the path does not start with an igt step
+    tokens = deque(xp.tokenize(path))
+    if tokens and tokens[0] in ('/', '//'):
+        tokens.popleft()
+    if not tokens or tokens.popleft() != 'igt':
+        return None
+    predicates = []
+    while tokens and tokens[0] == '[':
+        tokens.popleft()
+        pred = []
+        while tokens and tokens[0] != ']':
+            pred.append(tokens.popleft())
+        if not tokens:
+            return None
+        tokens.popleft()  # ']'
+        predicates.append(pred)
+    if tokens and tokens[0] not in ('/', '//'):
+        return None
+    return predicates, list(tokens)
+
+
+def _predicate_condition(pred, nsmap):
+    # return (sql, params) for a condition every IGT satisfying pred
+    # meets, or None if the predicate cannot be checked in the index
+    n = len(pred)
+    if (n == 4 and pred[0] == '@' and pred[1] not in ('*', 'name')
+            and pred[2] == '='):
+        sql = ('EXISTS (SELECT 1 FROM attributes WHERE '
+               'attributes.igt = igts.id AND attributes.name = ? '
+               'AND attributes.value = ?)')
+        return sql, [_attribute_key(pred[1], nsmap), pred[3].strip('"')]
+    elif (n == 6 and pred[:3] == ['tier', '/', '@']
+            and pred[3] in ('id', 'type') and pred[4] == '='):
+        column = 'tier_id' if pred[3] == 'id' else 'type'
+        sql = ('EXISTS (SELECT 1 FROM tiers WHERE '
+               'tiers.igt = igts.id AND tiers.{} = ?)'.format(column))
+        return sql, [pred[5].strip('"')]
+    elif (n == 8 and pred[:5] == ['metadata', '/', 'meta', '/', '@']
+            and pred[5] not in ('*', 'name') and pred[6] == '='):
+        sql = ('EXISTS (SELECT 1 FROM metadata WHERE '
+               'metadata.igt = igts.id AND metadata.element = ? '
+               'AND metadata.name = ? AND metadata.value = ?)')
+        return sql, ['meta', _attribute_key(pred[5], nsmap),
+                     pred[7].strip('"')]
+    return None
@@ -1,29 +1,67 @@
 
+import sys
+import json
 import argparse
 
+from xigt import profiling
+
 from xigt.scripts import (
+    xigt_diff,
     xigt_export,
+    xigt_generate,
     xigt_import,
+    xigt_index,
     xigt_partition,
+    xigt_patch,
     xigt_process,
     xigt_sort,
     xigt_query,
+    xigt_stats,
     xigt_validate
 )
 
 cmdmap = {
+    'diff': xigt_diff,
     'export': xigt_export,
+    'generate': xigt_generate,
     'import': xigt_import,
+    'index': xigt_index,
     'partition': xigt_partition,
+    'patch': xigt_patch,
     'process': xigt_process,
     'sort': xigt_sort,
     'query': xigt_query,
+    'stats': xigt_stats,
     'validate': xigt_validate,
 }
 
 
 def main():
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(
+        epilog='Corpus files may be compressed with gzip, bzip2, xz, or '
+               'Zstandard; compressed files are detected when read, and '
+               'the compression of files written is chosen by their '
+               'extension (.gz, .bgz, .bz2, .xz, or .zst). Indexing and '
+               'other random access need uncompressed or block-compressed '
+               '(.bgz) files.'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='report the time spent in each phase of the command and '
+             'counts of the work done (e.g., IGTs decoded) on stderr'
+    )
+    parser.add_argument(
+        '--profile-json',
+        metavar='PATH',
+        help='write the --profile report as JSON to PATH'
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='PATH',
+        help='write cProfile statistics of the command to PATH (for '
+             'the pstats module)'
+    )
     parser.add_argument(
         'command',
         choices=sorted(cmdmap.keys())  # sorted for help printing
@@ -34,9 +72,38 @@ def main():
     )
 
     args = parser.parse_args()
-    cmdmap[args.command].main(args.args)
+    command = cmdmap[args.command]
+    if args.profile or args.profile_json or args.cprofile:
+        run_profiled(command, args)
+    else:
+        command.main(args.args)
+
+
+def run_profiled(command, args):
+    name = 'xigt ' + args.command
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    profiling.enable()
+    try:
+        with profiling.phase(name):
+            if profiler is None:
+                command.main(args.args)
+            else:
+                profiler.runcall(command.main, args.args)
+    finally:
+        profiling.disable()
+        report = profiling.report()
+        if args.profile:
+            print(name, file=sys.stderr)
+            print(profiling.format_report(report), file=sys.stderr)
+        if args.profile_json:
+            with open(args.profile_json, 'w') as fh:
+                json.dump(report, fh, indent=2, sort_keys=True)
+        if profiler is not None:
+            profiler.dump_stats(args.cprofile)
 
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,159 @@
+
+"""
+Accounting of the memory used by Xigt objects.
+
+`memory_usage()` (and the `memory_usage()` methods of |XigtCorpus| and
+|Igt|) report the bytes an object and its descendants use, broken down
+by component:
+
+    >>> igt.memory_usage()
+    {'objects': 11491, 'attributes': 11436, 'text': 1961, 'metadata': 3136,
+     'indices': 3888, 'reference_caches': 64, 'total': 31976}
+
+The components are:
+
+================== ====================================================
+  Component          Description
+================== ====================================================
+objects            the corpus, IGT, tier, and item objects, their
+                   instance attribute storage, and their ids, types,
+                   namespaces, and namespace maps
+attributes         the attribute dictionaries and their keys and values
+text               the text of items
+metadata           the metadata, metas, and meta children
+indices            the id lookup tables of containers and IGTs
+                   (`Igt.get_item()`) and the corpus-wide index
+reference_caches   the referent and referrer caches and the reference
+                   graphs of IGTs, when they have been built
+================== ====================================================
+
+Each object is counted once, in the first component it is found in,
+so strings shared by several objects (such as a common tier type) are
+not counted again; for the same reason, the total of a corpus may be
+less than the sum of those of its IGTs. Parent objects are not
+counted. Only the IGTs in memory are counted, so those of a
+`transient` corpus are not, and an `incremental` corpus counts those
+loaded so far.
+
+The sizes are those reported by `sys.getsizeof()`, except that the
+attribute storage Python keeps within an object (instead of in an
+instance dictionary) is estimated, as measuring it exactly would
+create the dictionary and make the object larger.
+"""
+
+import sys
+import gc
+import struct
+
+from xigt.mixins import XigtAttributeMixin, XigtContainerMixin
+
+COMPONENTS = (
+    'objects',
+    'attributes',
+    'text',
+    'metadata',
+    'indices',
+    'reference_caches',
+)
+
+_getsizeof = sys.getsizeof
+_POINTER = struct.calcsize('P')  # bytes per inline value
+_MODEL_TYPES = (XigtAttributeMixin, XigtContainerMixin)
+_ATOMS = (str, bytes, int, float)
+# the attributes with strings and namespace maps of model objects
+_OBJECT_ATTRS = ('_id', '_type', '_namespace', '_name', '_nsmap',
+                 '_nsmap_cache', '_fingerprint')
+_INDEX_ATTRS = ('_dict', '_itemdict', '_corpus_index')
+_CACHE_ATTRS = ('_referent_cache', '_referrer_cache', '_reference_graphs')
+
+
+def memory_usage(obj):
+    """
+    Return the bytes used by *obj* and its descendants by component.
+
+    Args:
+        obj: a |XigtCorpus|, |Igt|, |Tier|, |Item|, or metadata object
+    Returns:
+        a dictionary mapping the names in `COMPONENTS` and `total`
+        to numbers of bytes
+    """
+    usage = dict.fromkeys(COMPONENTS, 0)
+    _account(obj, usage, set(), None)
+    usage['total'] = sum(usage[name] for name in COMPONENTS)
+    return usage
+
+
+def _account(obj, usage, seen, component):
+    # add obj and its descendants to usage; metadata objects are all
+    # counted as metadata
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    objects = component or 'objects'
+    usage[objects] += _getsizeof(obj) + _instance_storage(obj)
+    for name in _OBJECT_ATTRS:
+        usage[objects] += _sizeof(_attr(obj, name), seen)
+    usage[component or 'attributes'] += _sizeof(
+        _attr(obj, '_attributes'), seen)
+    usage[component or 'text'] += _sizeof(_attr(obj, '_text'), seen)
+    md = _attr(obj, '_md')
+    if md is not None:
+        _account(md, usage, seen, 'metadata')
+    if isinstance(obj, list):
+        for child in list.__iter__(obj):
+            _account(child, usage, seen, component)
+    for name in _INDEX_ATTRS:
+        value = _attr(obj, name)
+        if value is not None:
+            usage[component or 'indices'] += _sizeof(value, seen)
+    for name in _CACHE_ATTRS:
+        value = _attr(obj, name)
+        if value is not None:
+            usage[component or 'reference_caches'] += _sizeof(value, seen)
+
+
+def _attr(obj, name):
+    # the value of a stored attribute; properties (e.g., the deprecated
+    # Metadata.text) are not used
+    if isinstance(getattr(obj.__class__, name, None), property):
+        return None
+    return getattr(obj, name, None)
+
+
+def _instance_storage(obj):
+    # The size of the attribute storage outside the object itself. The
+    # referents of an object are its instance dictionary (or else the
+    # values stored within the object), its type, and, for containers,
+    # the contained objects. Getting obj.__dict__ would create the
+    # dictionary if the values are stored within the object.
+    refs = gc.get_referents(obj)
+    n = len(refs) - 1  # not the type
+    if isinstance(obj, list):
+        n -= list.__len__(obj)
+    if n == 1 and refs[0].__class__ is dict:
+        return _getsizeof(refs[0])
+    return _POINTER * n
+
+
+def _sizeof(value, seen):
+    # the size of value and the data within it; model objects are
+    # counted on their own (e.g., those in indices) and not here
+    if value is None or value is True or value is False:
+        return 0
+    if id(value) in seen or isinstance(value, _MODEL_TYPES):
+        return 0
+    seen.add(id(value))
+    size = _getsizeof(value)
+    if isinstance(value, _ATOMS):
+        pass
+    elif isinstance(value, dict):
+        for key, val in value.items():
+            size += _sizeof(key, seen) + _sizeof(val, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for val in value:
+            size += _sizeof(val, seen)
+    elif hasattr(value, '__dict__'):
+        # e.g., the corpus index, which is not a model object, so its
+        # instance dictionary may be used
+        size += _sizeof(vars(value), seen)
+    return size
@@ -4,7 +4,12 @@ import re
 
 from xigt.mixins import (
     XigtContainerMixin,
-    XigtAttributeMixin
+    XigtAttributeMixin,
+    _detached_nsmap,
+    _invalidating_property,
+    _fingerprints_equal,
+    _hash_value,
+    _hash_children
 )
 from xigt.errors import XigtError
 
@@ -103,11 +108,25 @@ class Metadata(XigtContainerMixin, XigtAttributeMixin):
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         return (
             XigtContainerMixin.__eq__(self, other)
             and XigtAttributeMixin.__eq__(self, other)
         )
 
+    def _hash_contents(self, update):
+        update(b'metadata')
+        self._hash_attributes(update)
+        _hash_children(update, self)
+
+    def __reduce__(self):
+        return (
+            _restore_metadata,
+            (_metadata_state(self, _detached_nsmap(self)),)
+        )
+
     @property
     def metas(self):
         return list(self)
@@ -147,6 +166,9 @@ class Meta(XigtContainerMixin, XigtAttributeMixin):
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         try:
             return (
                 self.text == other.text
@@ -156,6 +178,17 @@ class Meta(XigtContainerMixin, XigtAttributeMixin):
         except AttributeError:
             return False
 
+    def _hash_contents(self, update):
+        update(b'meta')
+        self._hash_attributes(update)
+        _hash_value(update, self.text)
+        _hash_children(update, self)
+
+    def __reduce__(self):
+        return (_restore_meta, (_meta_state(self, _detached_nsmap(self)),))
+
+    text = _invalidating_property('_text')
+
     @property
     def children(self):
         return list(self)
@@ -187,6 +220,9 @@ class MetaChild(XigtContainerMixin, XigtAttributeMixin):
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         try:
             return (
                 self.name == other.name
@@ -197,6 +233,16 @@ class MetaChild(XigtContainerMixin, XigtAttributeMixin):
         except AttributeError:
             return False
 
+    def _hash_contents(self, update):
+        update(b'metachild')
+        _hash_value(update, self.name)
+        self._hash_attributes(update)
+        _hash_value(update, self.text)
+        _hash_children(update, self)
+
+    name = _invalidating_property('_name')
+    text = _invalidating_property('_text')
+
     @property
     def children(self):
         return list(self)
@@ -204,3 +250,48 @@ class MetaChild(XigtContainerMixin, XigtAttributeMixin):
     def children(self, value):
         self.clear()
         self.extend(value or [])
+
+    def __reduce__(self):
+        return (
+            _restore_metachild,
+            (_metachild_state(self, _detached_nsmap(self)),)
+        )
+
+
+# Compact states for pickling and copying. Parents are not included;
+# they are re-linked as the restored objects are put in containers.
+
+def _metadata_state(md, nsmap):
+    return (md._id, md.type, dict(md.attributes), md.namespace, nsmap,
+            [_meta_state(m, m._nsmap) for m in md])
+
+
+def _restore_metadata(state):
+    id, type, attributes, namespace, nsmap, metas = state
+    return Metadata(id=id, type=type, attributes=attributes,
+                    metas=[_restore_meta(m) for m in metas],
+                    namespace=namespace, nsmap=nsmap)
+
+
+def _meta_state(meta, nsmap):
+    return (meta._id, meta.type, dict(meta.attributes), meta.namespace, nsmap,
+            meta.text, [_metachild_state(mc, mc._nsmap) for mc in meta])
+
+
+def _restore_meta(state):
+    id, type, attributes, namespace, nsmap, text, children = state
+    return Meta(id=id, type=type, attributes=attributes, text=text,
+                children=[_restore_metachild(mc) for mc in children],
+                namespace=namespace, nsmap=nsmap)
+
+
+def _metachild_state(mc, nsmap):
+    return (mc.name, dict(mc.attributes), mc.namespace, nsmap, mc.text,
+            [_metachild_state(c, c._nsmap) for c in mc])
+
+
+def _restore_metachild(state):
+    name, attributes, namespace, nsmap, text, children = state
+    return MetaChild(name, attributes=attributes, text=text,
+                     children=[_restore_metachild(mc) for mc in children],
+                     namespace=namespace, nsmap=nsmap)
@@ -1,5 +1,8 @@
 
 import warnings
+from hashlib import blake2b
+from itertools import chain
+from operator import attrgetter
 
 from xigt.consts import (
     ID,
@@ -22,9 +25,161 @@ except AttributeError:
 else:
     def listclear(x): list.clear(x)
 
+# Effective namespace maps (see XigtAttributeMixin.nsmap) are cached per
+# object with the parent they were computed from. When an nsmap is
+# replaced or a container (re)parents an object, the caches of the
+# object and of the descendants that inherit through it are cleared.
+def _invalidate_nsmaps(obj):
+    if obj._nsmap_cache is not None:
+        _setattr(obj, '_nsmap_cache', None)
+    agenda = [obj]
+    while agenda:
+        obj = agenda.pop()
+        children = list.__iter__(obj) if isinstance(obj, list) else ()
+        md = getattr(obj, '_md', None)
+        if md:
+            children = chain(children, list.__iter__(md))
+        for child in children:
+            # a child with its own nsmap does not inherit, and a child
+            # without a cached map has no descendants with one
+            if child._nsmap is None and child._nsmap_cache is not None:
+                _setattr(child, '_nsmap_cache', None)
+                agenda.append(child)
+
+# Fingerprints (see XigtAttributeMixin.fingerprint) and other data
+# derived from an object's contents, such as the reference graphs of an
+# Igt, are cached. When anything that equality compares is changed,
+# they are cleared on the object and its ancestors; see
+# XigtAttributeMixin._clear_derived(). A cleared object is marked stale,
+# and clearing stops at the first stale ancestor, as nothing has been
+# derived from it since its own ancestors were cleared. Whatever derives
+# data from an object's descendants (other than fingerprints, which
+# unmark the objects they are computed on) unmarks them with _watch().
+_setattr = object.__setattr__
+
+def _invalidate(obj):
+    while obj is not None and not obj._stale:
+        _setattr(obj, '_stale', True)
+        if obj._fingerprint is not None:
+            _setattr(obj, '_fingerprint', None)
+        obj._clear_derived()
+        obj = obj._parent
+
+def _watch(obj, metadata=True):
+    # pass the next change to obj or its descendants (and their
+    # metadata, if *metadata* is True) on to obj's ancestors again
+    agenda = [obj]
+    while agenda:
+        obj = agenda.pop()
+        if obj._stale:
+            _setattr(obj, '_stale', False)
+        if isinstance(obj, list):
+            agenda.extend(list.__iter__(obj))
+        if metadata:
+            md = getattr(obj, '_md', None)
+            if md:
+                agenda.extend(list.__iter__(md))
+
+def _invalidating_property(name):
+    # a property for a stored value that equality compares
+    def setter(self, value):
+        _setattr(self, name, value)
+        _invalidate(self)
+    return property(attrgetter(name), setter)
+
+def _fingerprints_equal(a, b):
+    # compare cached fingerprints; None if either is not cached
+    fp = a._fingerprint
+    if fp is not None:
+        other_fp = getattr(b, '_fingerprint', None)
+        if other_fp is not None:
+            return fp == other_fp
+    return None
+
+def _hash_value(update, value):
+    if value is None:
+        update(b'\x00')
+    elif value.__class__ is str:
+        value = value.encode('utf-8')
+        update(b's%d:' % len(value))
+        update(value)
+    else:
+        value = repr(value).encode('utf-8')
+        update(b'r%d:' % len(value))
+        update(value)
+
+def _hash_children(update, objs):
+    update(b'%d:' % len(objs))
+    for obj in objs:
+        update(obj.fingerprint)
+
+
+class _AttributeDict(dict):
+    """
+    The attribute dictionary of a Xigt object; changes clear the
+    object's fingerprint and derived caches.
+    """
+    __slots__ = ('_owner',)  # set by _attribute_dict()
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        _invalidate(self._owner)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        _invalidate(self._owner)
+
+    def __ior__(self, other):
+        dict.update(self, other)
+        _invalidate(self._owner)
+        return self
+
+    def clear(self):
+        dict.clear(self)
+        _invalidate(self._owner)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = dict.pop(self, key)
+        _invalidate(self._owner)
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        _invalidate(self._owner)
+        return item
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return dict.__getitem__(self, key)
+        dict.__setitem__(self, key, default)
+        _invalidate(self._owner)
+        return default
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        _invalidate(self._owner)
+
+
+def _attribute_dict(data, owner):
+    # cheaper than an _AttributeDict.__init__() as dict's is used
+    attributes = _AttributeDict(data)
+    attributes._owner = owner
+    return attributes
+
 def _has_parent(obj):
     return hasattr(obj, '_parent') and obj._parent is not None
 
+def _detached_nsmap(obj):
+    # the nsmap an object needs to keep its namespaces without a parent
+    if obj._nsmap is not None:
+        return obj._nsmap
+    return obj.nsmap or None
+
 
 class XigtContainerMixin(list):
     """
@@ -62,6 +217,8 @@ class XigtContainerMixin(list):
     def __setitem__(self, idx, obj):
         # only allow list indices, not dict keys (IDs)
         # NOTE: this method is destructive. check for broken refs here?
+        if isinstance(idx, slice):
+            return self._set_slice(idx, obj)
         self._assert_type(obj)
         try:
             cur_obj = list.__getitem__(self, idx)
@@ -71,12 +228,54 @@ class XigtContainerMixin(list):
         if cur_obj.id is not None:
             del self._dict[cur_obj.id]
         self._create_id_mapping(obj)
+        self._adopt(obj)
         list.__setitem__(self, idx, obj)
+        _invalidate(self._container)
+
+    def _set_slice(self, idx, objs):
+        objs = list(objs)
+        for obj in objs:
+            self._assert_type(obj)
+        old = list.__getitem__(self, idx)
+        for obj in old:
+            if obj.id is not None:
+                del self._dict[obj.id]
+        try:
+            for obj in objs:
+                self._create_id_mapping(obj)
+            list.__setitem__(self, idx, objs)
+        except (XigtError, ValueError):
+            self.refresh_index()  # the list is unchanged
+            raise
+        for obj in objs:
+            self._adopt(obj)
+        _invalidate(self._container)
 
     def __delitem__(self, obj_id):
         # NOTE: this method is destructive. check for broken refs here?
-        obj = self[obj_id]
-        self.remove(obj)
+        if isinstance(obj_id, slice):
+            for obj in list.__getitem__(self, obj_id):
+                if obj.id is not None:
+                    del self._dict[obj.id]
+            list.__delitem__(self, obj_id)
+            _invalidate(self._container)
+        else:
+            obj = self[obj_id]
+            self.remove(obj)
+
+    def __iadd__(self, objs):
+        self.extend(objs)
+        return self
+
+    def __imul__(self, n):
+        # an object can only be in one place, so nothing can be repeated
+        if n <= 0:
+            self.clear()
+        elif n > 1 and list.__len__(self) > 0:
+            raise XigtStructureError(
+                'The objects in a container cannot be repeated.'
+            )
+        return self
 
     def get(self, obj_id, default=None):
         try:
@@ -100,33 +299,68 @@ class XigtContainerMixin(list):
                 .format(self._contained_type.__name__)
             )
 
+    def _adopt(self, obj):
+        _setattr(obj, '_parent', self._container)
+        _invalidate_nsmaps(obj)
+
     def append(self, obj):
         self._assert_type(obj)
-        obj._parent = self._container
+        self._adopt(obj)
         self._create_id_mapping(obj)
         list.append(self, obj)
+        _invalidate(self._container)
 
     def insert(self, i, obj):
         self._assert_type(obj)
-        obj._parent = self._container
+        self._adopt(obj)
         self._create_id_mapping(obj)
         list.insert(self, i, obj)
+        _invalidate(self._container)
 
     def extend(self, objs):
         for obj in objs:
             self.append(obj)
 
+    def _extend_unchecked(self, objs):
+        # like extend() but without type or duplicate-id checks
+        container = self._container
+        d = self._dict
+        for obj in objs:
+            _setattr(obj, '_parent', container)
+            _invalidate_nsmaps(obj)
+            if obj._id is not None:
+                d[obj._id] = obj
+        list.extend(self, objs)
+        _invalidate(container)
+
     def remove(self, obj):
         # NOTE: this method is destructive. check for broken refs here?
         if obj.id is not None:
             del self._dict[obj.id]
         list.remove(self, obj)
+        _invalidate(self._container)
+
+    def pop(self, i=-1):
+        obj = list.pop(self, i)
+        if obj.id is not None:
+            del self._dict[obj.id]
+        _invalidate(self._container)
+        return obj
 
     def clear(self):
         self._dict.clear()
         # list.clear doesn't exist in Python2
         # list.clear(self)
         listclear(self)
+        _invalidate(self._container)
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        _invalidate(self._container)
+
+    def reverse(self):
+        list.reverse(self)
+        _invalidate(self._container)
 
     def _create_id_mapping(self, obj):
         if obj.id is not None:
@@ -160,13 +394,22 @@ class XigtContainerMixin(list):
 
 class XigtAttributeMixin(object):
 
+    _parent = None
+    _nsmap_cache = None  # (parent, effective nsmap)
+    _fingerprint = None
+    _stale = False  # see _invalidate()
+
     def __init__(self, id=None, type=None, attributes=None,
                  namespace=None, nsmap=None):
-        self.id = id
-        self.type = type
-        self.attributes = dict(attributes or [])
-        self.namespace = namespace
-        self.nsmap = nsmap
+        if id is not None and not id_re.match(id):
+            raise ValueError('Invalid ID: {}'.format(id))
+        # a new object has no fingerprint or derived caches to clear,
+        # so the property setters are skipped
+        _setattr(self, '_id', id)
+        _setattr(self, '_type', type)
+        _setattr(self, '_attributes', _attribute_dict(attributes or (), self))
+        _setattr(self, '_namespace', namespace)
+        _setattr(self, '_nsmap', None if nsmap is None else dict(nsmap))
         # if id is not None or ID not in self.attributes:
         #     self.attributes[ID] = id
         # if type is not None or TYPE not in self.attributes:
@@ -184,6 +427,44 @@ class XigtAttributeMixin(object):
         except AttributeError:
             return False
 
+    def _clear_derived(self):
+        # Called by _invalidate() when the object or a descendant has
+        # changed; objects with other caches that depend on their
+        # contents clear them here, and unmark with _watch() whatever
+        # they derive them from when they rebuild them.
+        pass
+
+    @property
+    def fingerprint(self):
+        """
+        A digest of everything that equality compares.
+
+        Objects with different fingerprints are not equal, and equal
+        fingerprints mean equal objects (barring a hash collision, which
+        is vanishingly unlikely). The fingerprint is computed on first
+        use and kept until the object or one of its descendants changes.
+        Note that the nsmap is not compared, so it is not included.
+        """
+        fp = self._fingerprint
+        if fp is None:
+            h = blake2b(digest_size=16)
+            self._hash_contents(h.update)
+            fp = h.digest()
+            _setattr(self, '_fingerprint', fp)
+            if self._stale:
+                _setattr(self, '_stale', False)
+        return fp
+
+    def _hash_attributes(self, update):
+        _hash_value(update, self._id)
+        _hash_value(update, self._type)
+        _hash_value(update, self._namespace)
+        attributes = self._attributes
+        update(b'%d:' % len(attributes))
+        for key in sorted(attributes):
+            _hash_value(update, key)
+            _hash_value(update, attributes[key])
+
     def get_attribute(self, key, default=None, inherit=False, namespace=None):
         if key is None:
             raise ValueError(
@@ -215,30 +496,43 @@ class XigtAttributeMixin(object):
         if value is not None and not id_re.match(value):
             raise ValueError('Invalid ID: {}'.format(value))
         self._id = value
+        _invalidate(self)
+
+    # no validation for these yet, but setting them must clear the
+    # fingerprint and derived caches
+    type = _invalidating_property('_type')
+    namespace = _invalidating_property('_namespace')
+
+    @property
+    def attributes(self):
+        return self._attributes
+    @attributes.setter
+    def attributes(self, value):
+        if value.__class__ is not _AttributeDict or value._owner is not self:
+            value = _attribute_dict(value, self)
+        self._attributes = value
+        _invalidate(self)
 
     @property
     def nsmap(self):
-        if self._nsmap is None:
-            if _has_parent(self):
-                return self._parent.nsmap
-            else:
-                return {}
-        else:
-            return self._nsmap
+        nsmap = self._nsmap
+        if nsmap is not None:
+            return nsmap
+        parent = self._parent
+        if parent is None:
+            return {}
+        cache = self._nsmap_cache
+        if cache is not None and cache[0] is parent:
+            return cache[1]
+        nsmap = parent.nsmap
+        _setattr(self, '_nsmap_cache', (parent, nsmap))
+        return nsmap
     @nsmap.setter
     def nsmap(self, value):
         if value is not None:
             value = dict(value or [])
         self._nsmap = value
-
-
-    # no validation for type yet, so the property isn't necessary
-    # @property
-    # def type(self):
-    #     return self._type
-    # @type.setter
-    # def type(self, value):
-    #     self._type = value
+        _invalidate_nsmaps(self)
 
 
 class XigtReferenceAttributeMixin(object):
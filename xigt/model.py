@@ -6,6 +6,7 @@
 #
 
 from collections import defaultdict
+from bisect import bisect_left, insort
 from itertools import chain
 import logging
 import warnings
@@ -23,13 +24,26 @@ from xigt.mixins import (
     XigtContainerMixin,  # XigtCorpus, Igt, Tier, Metadata
     XigtAttributeMixin,  # XigtCorpus, Igt, Tier, Item, Metadata, Meta
     XigtReferenceAttributeMixin,  # Tier, Item
+    _attribute_dict,
+    _setattr,
+    _invalidating_property,
+    _detached_nsmap,
+    _invalidate_nsmaps,
+    _watch,
+    _fingerprints_equal,
+    _hash_value,
+    _hash_children
 )
 
 from xigt.metadata import (
-    XigtMetadataMixin  # XigtCorpus, Igt, Tier
+    XigtMetadataMixin,  # XigtCorpus, Igt, Tier
+    _metadata_state,
+    _restore_metadata
 )
 
 from xigt import ref
+from xigt import profiling as _profiling
+from xigt.memory import memory_usage as _memory_usage
 
 from xigt.errors import (
     XigtError,
@@ -39,6 +53,130 @@ from xigt.errors import (
 )
 
 
+class _CorpusIndex(object):
+    """
+    Corpus-wide lookup tables for the tiers and items of loaded Igts.
+
+    Igts are numbered in corpus order as they are added, and the lists
+    of Igts and tiers are kept in that order, so an Igt that changed
+    can be indexed again in its place.
+    """
+    def __init__(self, igts=None):
+        self.objects = {}  # (igt id, tier or item id) : tier or item
+        self._igts = {}  # tier or item id : [(igt number, igt)]
+        self._tier_types = {}  # tier type : [(igt number, position, tier)]
+        self._entries = {}  # id(igt) : (igt number, ..., what was indexed)
+        self._stale = {}  # id(igt) : igt, changed since it was indexed
+        self._next = 0
+        for igt in (igts or []):
+            self.add(igt)
+
+    def igts(self, obj_id):
+        return [igt for _, igt in self._igts.get(obj_id, [])]
+
+    def tiers_of_type(self, type):
+        return [tier for _, _, tier in self._tier_types.get(type, [])]
+
+    def add(self, igt, n=None):
+        if n is None:
+            n = self._next
+            self._next += 1
+        objects = self.objects
+        igts = self._igts
+        tier_types = self._tier_types
+        igt_id = igt.id
+        igt_entry = (n, igt)
+        # what is indexed, to discard it later
+        tier_entries = []
+        obj_ids = []
+        objs = []
+        seen = set()
+        for i, tier in enumerate(igt):
+            entry = (n, i, tier)
+            _insert(tier_types.setdefault(tier.type, []), entry)
+            tier_entries.append((tier.type, entry))
+            for obj in [tier] + tier.items:
+                obj_id = obj.id
+                if obj_id is None:
+                    continue
+                objects[(igt_id, obj_id)] = obj
+                obj_ids.append(obj_id)
+                objs.append(obj)
+                if obj_id not in seen:
+                    seen.add(obj_id)
+                    _insert(igts.setdefault(obj_id, []), igt_entry)
+        self._entries[id(igt)] = (
+            n, igt, igt_id, tier_entries, obj_ids, objs, seen
+        )
+        # have changes within the Igt mark it stale
+        _watch(igt, metadata=False)
+
+    def discard(self, igt):
+        self._stale.pop(id(igt), None)
+        try:
+            entry = self._entries.pop(id(igt))
+        except KeyError:
+            return None
+        n, igt, igt_id, tier_entries, obj_ids, objs, seen = entry
+        objects = self.objects
+        for obj_id, obj in zip(obj_ids, objs):
+            if objects.get((igt_id, obj_id)) is obj:
+                del objects[(igt_id, obj_id)]
+        for table, entries in (
+                (self._tier_types, tier_entries),
+                (self._igts, [(obj_id, (n, igt)) for obj_id in seen])):
+            for key, entry in entries:
+                lst = table[key]
+                del lst[bisect_left(lst, entry)]
+                if not lst:
+                    del table[key]
+        return n
+
+    def mark_stale(self, igt):
+        if id(igt) in self._entries:
+            self._stale[id(igt)] = igt
+
+    def refresh(self):
+        # index the Igts that changed again, in their places
+        stale = self._stale
+        while stale:
+            _, igt = stale.popitem()
+            self.add(igt, self.discard(igt))
+
+
+def _insert(entries, entry):
+    # keep the entries ordered by Igt number; Igts are usually added
+    # in corpus order
+    if not entries or entries[-1] < entry:
+        entries.append(entry)
+    else:
+        insort(entries, entry)
+
+
+class IgtSource(object):
+    """
+    A source of |Igt| objects that can be read more than once, for
+    `transient` and `incremental` corpora.
+
+    Args:
+        open: a function returning a new iterator of the IGTs
+        count: a function returning the number of IGTs without
+            decoding them, used for `len()`
+    """
+
+    def __init__(self, open, count=None):
+        self._open = open
+        self._count = count
+
+    def __call__(self):
+        return self._open()
+
+    def __len__(self):
+        if self._count is None:
+            raise TypeError('The IGT source has no count function.')
+        return self._count()
+
+
 class XigtCorpus(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
     """
     A container of Igt objects, as well as corpus-level attributes and
@@ -49,7 +187,8 @@ class XigtCorpus(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
         id: corpus identifier
         attributes: corpus-level attributes
         metadata: corpus-level |Metadata|
-        igts: iterator of |Igt|
+        igts: iterable of |Igt|, or a function returning a new
+            iterator of them each time it is called (see |IgtSource|)
         mode: how to instantiate the corpus (default: `full`).
             Possible values include:
 
@@ -64,10 +203,33 @@ class XigtCorpus(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
                         don't keep them in memory; useful for piped
                         input processing
             =========== ================================================
+
+    In the `transient` and `incremental` modes, iterating the corpus
+    more than once gives the same IGTs. An incremental corpus yields
+    the loaded IGTs and then loads the rest. A transient corpus reads
+    its IGTs again from *igts* if it is a collection (e.g., a list) or
+    a function, but if it is an iterator (e.g., a generator), the
+    corpus can be iterated only once. `len()` gives the number of all
+    IGTs, loaded or not; it is counted without decoding the IGTs if
+    *igts* has a length (e.g., an |IgtSource| with a *count*
+    function), by decoding but not keeping them if *igts* can be
+    iterated again, and otherwise by loading them (incremental) or not
+    at all (transient; a `TypeError` is raised until the IGTs have been
+    iterated). Testing the truth of a corpus reads at most one IGT, and
+    `repr()` shows only a count that is already known.
+
+    Corpus-wide lookups of tiers and items (see `get_qualified()`,
+    `igts_containing()`, and `tiers_of_type()`) use an index that is
+    built on first use from the loaded |Igt| objects. The index is
+    kept up to date as |Igt| objects are appended, removed, or
+    replaced, and the entries of an |Igt| are rebuilt on the next
+    lookup after anything within it changes (e.g., a new tier or a
+    tier's type).
     """
 
     def __init__(self, id=None, type=None, attributes=None, metadata=None,
                  igts=None, mode=FULL, namespace=None, nsmap=None):
+        self._corpus_index = None
         XigtContainerMixin.__init__(self, contained_type=Igt)
         XigtAttributeMixin.__init__(
             self, id=id, type=type, attributes=attributes,
@@ -75,16 +237,50 @@ class XigtCorpus(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
         )
         XigtMetadataMixin.__init__(self, metadata)
         self.mode = mode
+        self._count = None
         if mode == FULL:
-            self.extend(igts or [])
+            self.extend((igts() if callable(igts) else igts) or [])
+        elif callable(igts) or igts is None or iter(igts) is not igts:
+            # a function or collection, so the IGTs can be read again
+            self._source = () if igts is None else igts
+            self._generator = None
         else:
+            self._source = None
             self._generator = igts
 
     def __repr__(self):
+        # only give a count that is known without reading the IGTs
+        if self.mode == FULL:
+            count = str(list.__len__(self))
+        elif self._count is not None:
+            count = str(self._count)
+        elif self.mode == INCREMENTAL:
+            count = '{} loaded'.format(list.__len__(self))
+        else:
+            count = 'unloaded'
         return '<XigtCorpus object (id: {}) with {} Igts at {}>'.format(
-            str(self.id or '--'), len(self), str(id(self))
+            str(self.id or '--'), count, str(id(self))
         )
 
+    def __bool__(self):
+        # read at most one IGT instead of counting them
+        if self.mode == FULL:
+            return list.__len__(self) > 0
+        if self._count is not None:
+            return self._count > 0
+        if self.mode == INCREMENTAL:
+            return list.__len__(self) > 0 or self._load_next()
+        igts = self._open()
+        try:
+            first = next(igts)
+        except StopIteration:
+            self._count = 0
+            return False
+        if self._source is None:
+            # put it back for the iteration that can still be made
+            self._generator = chain([first], igts)
+        return True
+
     def __eq__(self, other):
         return (
             XigtMetadataMixin.__eq__(self, other)
@@ -92,28 +288,212 @@ class XigtCorpus(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
             and XigtAttributeMixin.__eq__(self, other)
         )
 
+    def _hash_contents(self, update):
+        # like __eq__, this loads any unloaded Igts
+        update(b'xigt-corpus')
+        self._hash_attributes(update)
+        _hash_children(update, self.metadata)
+        _hash_children(update, self.igts)
+
+    def __reduce__(self):
+        # unloaded Igts are loaded, so a transient corpus read from an
+        # iterator is consumed
+        return (_restore_corpus, (_corpus_state(self),))
+
     def __iter__(self):
         if self.mode == FULL:
             for igt in XigtContainerMixin.__iter__(self):
                 yield igt
+        elif self.mode == INCREMENTAL:
+            # by position, as other iterators may load more IGTs
+            i = 0
+            while i < list.__len__(self) or self._load_next():
+                yield list.__getitem__(self, i)
+                i += 1
         else:
-            for igt in self._generator:
-                if self.mode == INCREMENTAL:
-                    self.add(igt)
-                else:
-                    # don't add, but set the parent
-                    igt._parent = self
+            n = 0
+            for igt in self._open():
+                # don't add, but set the parent
+                igt._parent = self
+                _invalidate_nsmaps(igt)
+                n += 1
                 yield igt
+            self._count = n
+
+    def __len__(self):
+        if self.mode == FULL:
+            return list.__len__(self)
+        if self._count is None:
+            self._count = self._count_igts()
+        return self._count
+
+    def _open(self):
+        # a new iterator of the unloaded IGTs
+        source = self._source
+        if source is not None:
+            return iter(source() if callable(source) else source)
+        igts = self._generator
+        if igts is None:
+            raise XigtError(
+                'The IGTs of the transient corpus were read from an '
+                'iterator and cannot be read again.'
+            )
+        self._generator = None
+        return iter(igts)
+
+    def _load_next(self):
+        # load the next IGT of an incremental corpus, if any
+        if self.mode != INCREMENTAL:
+            return False
+        if self._generator is None:
+            # skip those loaded from an earlier iterator
+            igts = self._open()
+            for _ in range(list.__len__(self)):
+                next(igts, None)
+            self._generator = igts
+        igt = next(self._generator, None)
+        if igt is None:
             self.mode = FULL
+            self._source = self._generator = None
+            return False
+        self.append(igt)
+        return True
+
+    def _count_igts(self):
+        source = self._source
+        if source is not None:
+            try:
+                return len(source)
+            except TypeError:
+                return sum(1 for _ in self._open())
+        if self.mode == INCREMENTAL:
+            while self._load_next():
+                pass
+            return list.__len__(self)
+        raise TypeError(
+            'The number of IGTs of a transient corpus read from an '
+            'iterator is not known.'
+        )
 
     @property
     def igts(self):
-        return list(self)
+        # not list(self), which would get the length first
+        return [igt for igt in self]
     @igts.setter
     def igts(self, value):
         self.clear()
         self.extend(value or [])
 
+    # corpus index maintenance
+
+    def __setitem__(self, idx, obj):
+        if isinstance(idx, slice):
+            XigtContainerMixin.__setitem__(self, idx, obj)
+            self._corpus_index = None
+            return
+        index = self._corpus_index
+        try:
+            cur_obj = list.__getitem__(self, int(idx))
+        except (TypeError, ValueError, IndexError):
+            cur_obj = None
+        XigtContainerMixin.__setitem__(self, idx, obj)
+        if index is not None:
+            if cur_obj is not None:
+                index.discard(cur_obj)
+            if list.__getitem__(self, -1) is obj:
+                index.add(obj)
+            else:
+                # tiers must stay in corpus order; rebuild when needed
+                self._corpus_index = None
+
+    def append(self, obj):
+        XigtContainerMixin.append(self, obj)
+        if self._corpus_index is not None:
+            self._corpus_index.add(obj)
+
+    def insert(self, i, obj):
+        XigtContainerMixin.insert(self, i, obj)
+        self._corpus_index = None
+
+    def __delitem__(self, obj_id):
+        XigtContainerMixin.__delitem__(self, obj_id)
+        if isinstance(obj_id, slice):
+            self._corpus_index = None
+
+    def remove(self, obj):
+        XigtContainerMixin.remove(self, obj)
+        if self._corpus_index is not None:
+            self._corpus_index.discard(obj)
+
+    def pop(self, i=-1):
+        obj = XigtContainerMixin.pop(self, i)
+        if self._corpus_index is not None:
+            self._corpus_index.discard(obj)
+        return obj
+
+    def clear(self):
+        XigtContainerMixin.clear(self)
+        self._corpus_index = None
+
+    def sort(self, *args, **kwargs):
+        XigtContainerMixin.sort(self, *args, **kwargs)
+        self._corpus_index = None
+
+    def reverse(self):
+        XigtContainerMixin.reverse(self)
+        self._corpus_index = None
+
+    def refresh_index(self):
+        XigtContainerMixin.refresh_index(self)
+        self._corpus_index = None
+
+    def _igt_changed(self, igt):
+        # anything within the Igt may be indexed; only its entries are
+        # indexed again, on the next lookup
+        if self._corpus_index is not None:
+            self._corpus_index.mark_stale(igt)
+
+    def _get_corpus_index(self):
+        if self._corpus_index is None:
+            # only index what is loaded; don't consume the generator
+            self._corpus_index = _CorpusIndex(list.__iter__(self))
+        else:
+            self._corpus_index.refresh()
+        return self._corpus_index
+
+    # corpus-wide lookups
+
+    def get_qualified(self, igt_id, obj_id, default=None):
+        """
+        Return the tier or item with id *obj_id* in the |Igt| with id
+        *igt_id*, or *default* if there is none.
+        """
+        return self._get_corpus_index().objects.get(
+            (igt_id, obj_id), default
+        )
+
+    def igts_containing(self, obj_id):
+        """
+        Return the list of |Igt| objects with a tier or item whose id
+        is *obj_id*.
+        """
+        return self._get_corpus_index().igts(obj_id)
+
+    def tiers_of_type(self, type):
+        """
+        Return the list of tiers in the corpus whose type is *type*, in
+        corpus order.
+        """
+        return self._get_corpus_index().tiers_of_type(type)
+
+    def memory_usage(self):
+        """
+        Return the bytes used by the corpus and its loaded |Igt| objects
+        by component (see `xigt.memory.memory_usage()`). Unloaded Igts
+        are not loaded.
+        """
+        return _memory_usage(self)
+
 
 class Igt(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
     """
@@ -130,32 +510,121 @@ class Igt(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
 
         self._referent_cache = {}
         self._referrer_cache = {}
+        self._reference_graphs = {}
         self._parent = corpus
         self._itemdict = {}
 
         self.extend(tiers or [])
         self.refresh_indices()
 
+    @classmethod
+    def unchecked(cls, id=None, type=None, attributes=None, metadata=None,
+                  tiers=None, namespace=None, nsmap=None):
+        """
+        Return a new Igt built without validating the arguments.
+
+        This is for trusted data, such as a schema-validated corpus. The
+        id is not checked, tier ids are not checked for duplicates, and
+        the *nsmap* dictionary is used as given instead of being copied.
+        The referent and referrer indices are built when first used.
+        """
+        igt = cls.__new__(cls)
+        XigtContainerMixin.__init__(igt, contained_type=Tier)
+        XigtMetadataMixin.__init__(igt)
+        _setattr(igt, '_id', id)
+        _setattr(igt, '_type', type)
+        _setattr(igt, '_attributes', _attribute_dict(attributes or (), igt))
+        _setattr(igt, '_namespace', namespace)
+        _setattr(igt, '_nsmap', nsmap)
+        _setattr(igt, '_referent_cache', None)
+        _setattr(igt, '_referrer_cache', None)
+        _setattr(igt, '_reference_graphs', {})
+        if metadata:
+            igt._md._extend_unchecked(metadata)
+        if tiers:
+            igt._extend_unchecked(tiers)
+            igt._itemdict = {
+                item._id: item for tier in tiers for item in tier
+            }
+        else:
+            igt._itemdict = {}
+        _watch(igt, metadata=False)
+        return igt
+
+    def _clear_derived(self):
+        # the item, referent, and referrer indices and the reference
+        # graphs are rebuilt when next used
+        self._itemdict = None
+        self._referent_cache = None
+        self._referrer_cache = None
+        self._reference_graphs = {}
+        # and the corpus (or store) is told which Igt changed
+        igt_changed = getattr(self._parent, '_igt_changed', None)
+        if igt_changed is not None:
+            igt_changed(self)
+
     def __repr__(self):
         return '<Igt object (id: {}) with {} Tiers at {}>'.format(
             str(self.id or '--'), len(self), str(id(self))
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         return (
             XigtMetadataMixin.__eq__(self, other)
             and XigtContainerMixin.__eq__(self, other)
             and XigtAttributeMixin.__eq__(self, other)
         )
 
+    def _hash_contents(self, update):
+        update(b'igt')
+        self._hash_attributes(update)
+        _hash_children(update, self.metadata)
+        _hash_children(update, self)
+
+    def __reduce__(self):
+        return (_restore_igt, (_igt_state(self, _detached_nsmap(self)),))
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """
+        Return a copy of the Igt and its tiers, items, and metadata.
+
+        The copy is not in a corpus. If the Igt inherits namespace
+        mappings from its corpus, the copy gets them as its own.
+        """
+        return _restore_igt(_igt_state(self, _detached_nsmap(self)))
+
+    def memory_usage(self):
+        """
+        Return the bytes used by the Igt, its tiers, items, and
+        metadata, and its indices and caches by component (see
+        `xigt.memory.memory_usage()`).
+        """
+        return _memory_usage(self)
+
     def refresh_indices(self, tiers=False, items=True,
                         referents=True, referrers=True):
+        if _profiling.enabled:
+            with _profiling.phase('refresh_indices'):
+                return self._refresh_indices(tiers, items, referents,
+                                             referrers)
+        return self._refresh_indices(tiers, items, referents, referrers)
+
+    def _refresh_indices(self, tiers, items, referents, referrers):
+        _watch(self, metadata=False)
         if tiers:
             self.refresh_index()  # from XigtContainerMxin
 
         xs = [i for t in self.tiers for i in t.items]
         if items:
             idict = self._itemdict
+            if idict is None:
+                idict = self._itemdict = {}
             for item in xs:
                 i_id = item.id
                 if idict.get(i_id, item) != item:
@@ -168,6 +637,7 @@ class Igt(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
         ids = ref.ids
         xs = self.tiers + xs
         if referents or referrers:
+            self._reference_graphs = {}  # rebuilt on demand
             # both use IDS in refattrs, so precompute once
             ids_map = {}
             for obj in xs:
@@ -201,19 +671,47 @@ class Igt(XigtContainerMixin, XigtAttributeMixin, XigtMetadataMixin):
         self.extend(value or [])
 
     def get_item(self, item_id, default=None):
+        if self._itemdict is None:
+            self.refresh_indices(referents=False, referrers=False)
         return self._itemdict.get(item_id, default)
 
     def get_any(self, _id, default=None):
-        return self.get(_id, self._itemdict.get(_id, default))
+        return self.get(_id, self.get_item(_id, default))
+
+    def reference_graph(self, refattr, tiers=False):
+        """
+        Return the graph of references made with *refattr*.
+
+        The graph is a `(referents, referrers)` pair of dictionaries as
+        described for `xigt.ref.reference_graph()`. It covers the items
+        of the Igt or, if *tiers* is `True`, its tiers. Graphs are built
+        on first use and kept until the Igt or anything in it changes.
+        """
+        key = (refattr, tiers)
+        try:
+            return self._reference_graphs[key]
+        except KeyError:
+            if tiers:
+                objs = self.tiers
+            else:
+                objs = [i for t in self.tiers for i in t.items]
+            graph = ref.reference_graph(objs, refattr)
+            self._reference_graphs[key] = graph
+            _watch(self, metadata=False)
+            return graph
 
     def referents(self, id, refattrs=None):
         if refattrs is None:
+            if self._referent_cache is None:
+                self.refresh_indices(items=False)
             return self._referent_cache.get(id, {})
         else:
             return ref.referents(self, id, refattrs=refattrs)
 
     def referrers(self, id, refattrs=None):
         if refattrs is None:
+            if self._referrer_cache is None:
+                self.refresh_indices(items=False)
             return self._referrer_cache.get(id, {})
         else:
             return ref.referrers(self, id, refattrs=refattrs)
@@ -267,21 +765,66 @@ class Tier(XigtContainerMixin, XigtAttributeMixin,
         )
         XigtMetadataMixin.__init__(self, metadata)
 
-        self._parent = igt
+        _setattr(self, '_parent', igt)
         self.extend(items or [])
 
+    @classmethod
+    def unchecked(cls, id=None, type=None, attributes=None, metadata=None,
+                  items=None, namespace=None, nsmap=None):
+        """
+        Return a new Tier built without validating the arguments.
+
+        See `Igt.unchecked()`. Reference attributes, if any, must be in
+        *attributes*.
+        """
+        tier = cls.__new__(cls)
+        XigtContainerMixin.__init__(tier, contained_type=Item)
+        XigtMetadataMixin.__init__(tier)
+        _setattr(tier, '_id', id)
+        _setattr(tier, '_type', type)
+        _setattr(tier, '_attributes', _attribute_dict(attributes or (), tier))
+        _setattr(tier, '_namespace', namespace)
+        _setattr(tier, '_nsmap', nsmap)
+        if metadata:
+            tier._md._extend_unchecked(metadata)
+        if items:
+            tier._extend_unchecked(items)
+        return tier
+
     def __repr__(self):
         return '<Tier object (id: {}; type: {}) with {} Items at {}>'.format(
             str(self.id or '--'), self.type, len(self), str(id(self))
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         return (
             XigtMetadataMixin.__eq__(self, other)
             and XigtContainerMixin.__eq__(self, other)
             and XigtAttributeMixin.__eq__(self, other)
         )
 
+    def _hash_contents(self, update):
+        update(b'tier')
+        self._hash_attributes(update)
+        _hash_children(update, self.metadata)
+        _hash_children(update, self)
+
+    def __reduce__(self):
+        return (_restore_tier, (_tier_state(self, _detached_nsmap(self)),))
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """
+        Return a copy of the Tier and its items and metadata. The copy
+        is not in an |Igt|.
+        """
+        return _restore_tier(_tier_state(self, _detached_nsmap(self)))
+
     @property
     def igt(self):
         return self._parent
@@ -335,8 +878,32 @@ class Item(XigtAttributeMixin, XigtReferenceAttributeMixin):
             segmentation=segmentation
         )
 
-        self._parent = tier  # mainly used for alignment expressions
-        self.text = text
+        # mainly used for alignment expressions; set directly as in
+        # XigtAttributeMixin.__init__()
+        _setattr(self, '_parent', tier)
+        _setattr(self, '_text', text)
+        if _profiling.enabled:
+            _profiling.count('items_constructed')
+
+    @classmethod
+    def unchecked(cls, id=None, type=None, attributes=None, text=None,
+                  namespace=None, nsmap=None):
+        """
+        Return a new Item built without validating the arguments.
+
+        See `Igt.unchecked()`. Reference attributes, if any, must be in
+        *attributes*.
+        """
+        item = cls.__new__(cls)
+        _setattr(item, '_id', id)
+        _setattr(item, '_type', type)
+        _setattr(item, '_attributes', _attribute_dict(attributes or (), item))
+        _setattr(item, '_namespace', namespace)
+        _setattr(item, '_nsmap', nsmap)
+        _setattr(item, '_text', text)
+        if _profiling.enabled:
+            _profiling.count('items_constructed')
+        return item
 
     def __repr__(self):
         return '<Item object (id: {}) with value "{}" at {}>'.format(
@@ -344,6 +911,9 @@ class Item(XigtAttributeMixin, XigtReferenceAttributeMixin):
         )
 
     def __eq__(self, other):
+        eq = _fingerprints_equal(self, other)
+        if eq is not None:
+            return eq
         try:
             return (
                 self.text == other.text
@@ -352,6 +922,23 @@ class Item(XigtAttributeMixin, XigtReferenceAttributeMixin):
         except AttributeError:
             return False
 
+    def _hash_contents(self, update):
+        update(b'item')
+        self._hash_attributes(update)
+        _hash_value(update, self.text)
+
+    def __reduce__(self):
+        return (_restore_item, (_item_state(self, _detached_nsmap(self)),))
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """Return a copy of the Item. The copy is not in a |Tier|."""
+        return _restore_item(_item_state(self, _detached_nsmap(self)))
+
+    text = _invalidating_property('_text')
+
     @property
     def tier(self):
         return self._parent
@@ -426,3 +1013,71 @@ class Item(XigtAttributeMixin, XigtReferenceAttributeMixin):
             DeprecationWarning
         )
         return self.value(refattrs=(CONTENT, SEGMENTATION))
+
+
+# Compact states for pickling and copying. Parents are not included;
+# they are re-linked, and indices rebuilt, as the restored objects are
+# put in containers. The states come from valid objects, so restoring
+# uses the unchecked constructors.
+
+def _corpus_state(xc):
+    return (xc._id, xc.type, dict(xc.attributes), xc.namespace, xc._nsmap,
+            [_metadata_state(md, md._nsmap) for md in xc.metadata],
+            [_igt_state(igt, igt._nsmap) for igt in xc])
+
+
+def _restore_corpus(state):
+    id, type, attributes, namespace, nsmap, metadata, igts = state
+    return XigtCorpus(id=id, type=type, attributes=attributes,
+                      metadata=[_restore_metadata(md) for md in metadata],
+                      igts=[_restore_igt(igt) for igt in igts],
+                      namespace=namespace, nsmap=nsmap)
+
+
+def _igt_state(igt, nsmap):
+    return (igt._id, igt.type, dict(igt.attributes), igt.namespace, nsmap,
+            [_metadata_state(md, md._nsmap) for md in igt.metadata],
+            [_tier_state(tier, tier._nsmap) for tier in igt])
+
+
+def _restore_igt(state):
+    id, type, attributes, namespace, nsmap, metadata, tiers = state
+    return Igt.unchecked(
+        id=id, type=type, attributes=attributes,
+        metadata=[_restore_metadata(md) for md in metadata],
+        tiers=[_restore_tier(tier) for tier in tiers],
+        namespace=namespace, nsmap=_copy_nsmap(nsmap)
+    )
+
+
+def _tier_state(tier, nsmap):
+    return (tier._id, tier.type, dict(tier.attributes), tier.namespace, nsmap,
+            [_metadata_state(md, md._nsmap) for md in tier.metadata],
+            [_item_state(item, item._nsmap) for item in tier])
+
+
+def _restore_tier(state):
+    id, type, attributes, namespace, nsmap, metadata, items = state
+    return Tier.unchecked(
+        id=id, type=type, attributes=attributes,
+        metadata=[_restore_metadata(md) for md in metadata],
+        items=[_restore_item(item) for item in items],
+        namespace=namespace, nsmap=_copy_nsmap(nsmap)
+    )
+
+
+def _item_state(item, nsmap):
+    return (item._id, item.type, dict(item.attributes), item.namespace, nsmap,
+            item.text)
+
+
+def _restore_item(state):
+    id, type, attributes, namespace, nsmap, text = state
+    return Item.unchecked(
+        id=id, type=type, attributes=attributes, text=text,
+        namespace=namespace, nsmap=_copy_nsmap(nsmap)
+    )
+
+
+def _copy_nsmap(nsmap):
+    return None if nsmap is None else dict(nsmap)
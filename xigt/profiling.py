@@ -0,0 +1,320 @@
+
+"""
+Instrumentation hooks for timing and counting the work Xigt does.
+
+The codecs, `Igt.refresh_indices()`, `ref.resolve()`, `xigt.query`,
+and XigtPath mark the phases of their work (e.g., parsing, decoding,
+indexing) and count what they did (e.g., bytes read, IGTs decoded).
+These events go to the attached observers; with none attached (the
+default), the instrumentation does little more than check the
+module's `enabled` flag.
+
+The built-in recorder accumulates the time of each phase and the
+counter totals:
+
+    >>> from xigt import profiling
+    >>> profiling.enable()
+    >>> xc = xigtxml.load('corpus.xml')
+    >>> print(profiling.format_report(profiling.report()))
+    >>> profiling.disable()
+
+The `--profile` option of the `xigt` command does this around any
+subcommand. Applications embedding Xigt can attach their own
+|Observer| to feed their metrics instead, e.g., latency histograms:
+
+    >>> class Metrics(profiling.Observer):
+    ...     def phase_ended(self, name, seconds, self_seconds):
+    ...         histograms[name].observe(seconds)
+    ...     def counted(self, name, n):
+    ...         counters[name].inc(n)
+    >>> profiling.add_observer(Metrics())
+
+Phases may nest, such as the indexing of IGTs while they are decoded.
+A phase's time includes that of the phases within it, and its *self*
+time excludes it, so the self times add up to the total time of the
+outermost phases. Phases are tracked per thread. The lazy operations
+(`xigt.query.ancestors()` and `descendants()`, and XigtPath's
+`iterfind()`) are one call of their phase over the whole iteration,
+timing only the work of getting the results.
+
+The phases are `xigtxml.parse`, `xigtxml.decode`, and `xigtxml.write`
+(and likewise for `xigtjson` and `xigtbin`), `refresh_indices`,
+`ref.resolve`, `query.ancestors`, `query.descendants`,
+`query.tier_descendants`, and `xigtpath`; the counters are
+`bytes_read`, `igts_decoded`, `items_constructed`, `refs_resolved`,
+and `xigtpath_steps`.
+"""
+
+import time
+import threading
+
+enabled = False  # whether any observer is attached
+
+_observers = ()
+_local = threading.local()  # per-thread stack of open phases
+
+
+class Observer(object):
+    """
+    Base class of observers of the instrumented operations.
+
+    Observers are attached with `add_observer()`. The methods do
+    nothing; subclasses override those they need. They are called in
+    the thread doing the work, so observers used by several threads
+    must be thread-safe.
+    """
+
+    def phase_started(self, name):
+        """Called when phase *name* starts."""
+
+    def phase_ended(self, name, seconds, self_seconds):
+        """
+        Called when phase *name* ends, after *seconds* of wall time, of
+        which *self_seconds* were not spent in phases within it.
+        """
+
+    def counted(self, name, n):
+        """Called when *n* is added to the counter *name*."""
+
+
+class Recorder(Observer):
+    """
+    An observer accumulating the calls and time of each phase and the
+    totals of the counters (see `report()`).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Clear the recorded phases and counts."""
+        self.phases = {}  # name: [calls, seconds, self seconds]
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    def phase_ended(self, name, seconds, self_seconds):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += self_seconds
+
+    def counted(self, name, n):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def report(self):
+        """
+        Return the recorded phases and counts as a dictionary.
+
+        The dictionary has the total `seconds` since recording started,
+        `phases` mapping phase names to their `calls`, `seconds`, and
+        `self_seconds`, and `counts` mapping counter names to their
+        values.
+        """
+        return {
+            'seconds': time.perf_counter() - self.started,
+            'phases': dict(
+                (name, {'calls': calls, 'seconds': seconds,
+                        'self_seconds': self_seconds})
+                for name, (calls, seconds, self_seconds)
+                in self.phases.items()
+            ),
+            'counts': dict(self.counts),
+        }
+
+
+def add_observer(observer):
+    """Attach |Observer| *observer* to the instrumented operations."""
+    global _observers, enabled
+    if observer not in _observers:
+        _observers = _observers + (observer,)
+    enabled = True
+
+
+def remove_observer(observer):
+    """Detach |Observer| *observer* if it is attached."""
+    global _observers, enabled
+    _observers = tuple(obs for obs in _observers if obs is not observer)
+    enabled = bool(_observers)
+
+
+_recorder = Recorder()
+
+
+def enable():
+    """Clear the recorded phases and counts and start recording."""
+    _recorder.reset()
+    add_observer(_recorder)
+
+
+def disable():
+    """Stop recording; what was recorded is kept for `report()`."""
+    remove_observer(_recorder)
+
+
+def reset():
+    """Clear the recorded phases and counts."""
+    _recorder.reset()
+
+
+def report():
+    """Return what was recorded (see `Recorder.report()`)."""
+    return _recorder.report()
+
+
+def count(name, n=1):
+    """Add *n* to the counter *name*."""
+    if enabled:
+        for observer in _observers:
+            observer.counted(name, n)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class phase(object):
+    """
+    Context manager for the phase *name* of an operation:
+
+        >>> with profiling.phase('parse'):
+        ...     data = parse(f)
+    """
+
+    __slots__ = ('name', '_entry')
+
+    def __init__(self, name):
+        self.name = name
+        self._entry = None
+
+    def __enter__(self):
+        if enabled:
+            name = self.name
+            for observer in _observers:
+                observer.phase_started(name)
+            # [start, seconds in nested phases]
+            self._entry = entry = [time.perf_counter(), 0.0]
+            _stack().append(entry)
+        return self
+
+    def __exit__(self, *exc_info):
+        entry = self._entry
+        if entry is not None:
+            self._entry = None
+            seconds = time.perf_counter() - entry[0]
+            stack = _stack()
+            if stack and stack[-1] is entry:
+                stack.pop()
+                if stack:
+                    stack[-1][1] += seconds
+            for observer in _observers:
+                observer.phase_ended(self.name, seconds, seconds - entry[1])
+        return False
+
+
+def timed(name, iterable):
+    """
+    Yield the items of *iterable*, recording the time spent getting
+    them as one call of phase *name*.
+
+    The phase starts when the first item is requested and ends when
+    *iterable* is exhausted or the iteration is closed; the time the
+    caller spends between items is not included.
+    """
+    it = iter(iterable)
+    seconds = 0.0
+    # [start of the current step, seconds in nested phases]
+    entry = [0.0, 0.0]
+    for observer in _observers:
+        observer.phase_started(name)
+    try:
+        while True:
+            stack = _stack()
+            entry[0] = start = time.perf_counter()
+            stack.append(entry)
+            try:
+                obj = next(it)
+            except StopIteration:
+                return
+            finally:
+                step = time.perf_counter() - start
+                seconds += step
+                if stack and stack[-1] is entry:
+                    stack.pop()
+                    if stack:
+                        stack[-1][1] += step
+            yield obj
+    finally:
+        for observer in _observers:
+            observer.phase_ended(name, seconds, seconds - entry[1])
+
+
+class CountingReader(object):
+    """
+    A wrapper of file *f* counting the bytes (or characters) read from
+    it as `bytes_read`. If *close* is `True`, *f* is closed when its
+    end is read.
+    """
+
+    def __init__(self, f, close=False):
+        self._f = f
+        self._close = close
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        if data:
+            count('bytes_read', len(data))
+        elif self._close:
+            self._f.close()
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+def reader(f, mode='rb'):
+    """
+    Return a |CountingReader| of *f*, a filename (opened with *mode*
+    and closed at its end) or an open file.
+    """
+    if hasattr(f, 'read'):
+        return CountingReader(f)
+    return CountingReader(open(f, mode), close=True)
+
+
+def decoded(codec, decode, objs):
+    """
+    Yield `decode(obj)` for each *obj* in *objs*, recording the time
+    spent getting the objects as phase *codec*`.parse` and the time
+    spent decoding them as *codec*`.decode`, and counting them as
+    `igts_decoded`.
+    """
+    decode_phase = phase(codec + '.decode')
+    for obj in timed(codec + '.parse', objs):
+        with decode_phase:
+            igt = decode(obj)
+        count('igts_decoded')
+        yield igt
+
+
+def format_report(data):
+    """Return the report *data* (see `report()`) as a table."""
+    lines = ['{:<24} {:>10} {:>10} {:>10}'.format(
+        'phase', 'calls', 'seconds', 'self')]
+    phases = sorted(data['phases'].items(),
+                    key=lambda kv: kv[1]['seconds'], reverse=True)
+    for name, stats in phases:
+        lines.append('{:<24} {:>10} {:>10.3f} {:>10.3f}'.format(
+            name, stats['calls'], stats['seconds'], stats['self_seconds']))
+    if data['counts']:
+        lines.append('')
+        lines.append('{:<24} {:>10}'.format('count', 'value'))
+        for name, value in sorted(data['counts'].items()):
+            lines.append('{:<24} {:>10}'.format(name, value))
+    lines.append('')
+    lines.append('total: {:.3f} seconds'.format(data['seconds']))
+    return '\n'.join(lines)
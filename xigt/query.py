@@ -9,6 +9,7 @@ from xigt.consts import (
 )
 
 from xigt import ref
+from xigt import profiling as _profiling
 
 def ancestors(obj, refattrs=(ALIGNMENT, SEGMENTATION)):
     """
@@ -18,12 +19,19 @@ def ancestors(obj, refattrs=(ALIGNMENT, SEGMENTATION)):
     (<Tier object (id: m type: morphemes) at ...>, 'segmentation', <Tier object (id: w type: words) at ...>, [<Item object (id: w1) at ...>])
     (<Tier object (id: w type: words) at ...>, 'segmentation', <Tier object (id: p type: phrases) at ...>, [<Item object (id: p1) at ...>])
     """
+    if _profiling.enabled:
+        return _profiling.timed('query.ancestors', _ancestors(obj, refattrs))
+    return _ancestors(obj, refattrs)
+
+
+def _ancestors(obj, refattrs):
     if hasattr(obj, 'tier'):
         tier = obj.tier
         items = [obj]
     else:
         tier = obj
         items = tier.items
+    igt = tier.igt
     # a tier may be visited twice (e.g. A > B > A), but then it stops;
     # this is to avoid cycles
     visited = set([tier.id])
@@ -33,15 +41,16 @@ def ancestors(obj, refattrs=(ALIGNMENT, SEGMENTATION)):
         if not refattr:
             break
         reftier = ref.dereference(tier, refattr)
+        referents = igt.reference_graph(refattr)[0]
         ids = set(chain.from_iterable(
-            ref.ids(item.attributes.get(refattr, '')) for item in items
+            _referent_ids(referents, item, refattr) for item in items
         ))
         refitems = [item for item in reftier.items if item.id in ids]
         yield (tier, refattr, reftier, refitems)
         # cycle detection; break if we've now encountered something twice
         if reftier.id in visited:
             break
-        visited.update(reftier.id)
+        visited.add(reftier.id)
         tier = reftier
         items = refitems
 
@@ -55,7 +64,13 @@ def descendants(obj, refattrs=(SEGMENTATION, ALIGNMENT), follow='first'):
     (<Tier object (id: w type: words) at ...>, 'segmentation', <Tier object (id: m type: morphemes) at ...>, [<Item object (id: m1) at ...>])
     (<Tier object (id: m type: morphemes) at ...>, 'alignment', <Tier object (id: g type: glosses) at ...>, [<Item object (id: g1) at ...>])
     """
+    if _profiling.enabled:
+        return _profiling.timed('query.descendants',
+                                _descendants(obj, refattrs, follow))
+    return _descendants(obj, refattrs, follow)
 
+
+def _descendants(obj, refattrs, follow):
     if hasattr(obj, 'tier'):
         tier = obj.tier
         items = [obj]
@@ -63,12 +78,81 @@ def descendants(obj, refattrs=(SEGMENTATION, ALIGNMENT), follow='first'):
         tier = obj
         items = tier.items
     igt = tier.igt
+    entries = [items]  # items for each agenda entry
+    for source, tier, refattr, reftier, hop in _descendant_hops(
+            igt, tier, refattrs, follow):
+        refitems = hop(entries[source])
+        entries.append(refitems)
+        yield (tier, refattr, reftier, refitems)
+
+
+def tier_descendants(tier, refattrs=(SEGMENTATION, ALIGNMENT),
+                     follow='first'):
+    """
+    Return the descendants of every item on *tier* at once.
+
+    The result is a dictionary mapping the id of each item on *tier*
+    to the list that `descendants()` would yield for that item. The
+    tiers are traversed once for all items, so this is much faster
+    than calling `descendants()` for each item.
+    """
+    if _profiling.enabled:
+        with _profiling.phase('query.tier_descendants'):
+            return _tier_descendants(tier, refattrs, follow)
+    return _tier_descendants(tier, refattrs, follow)
+
+
+def _tier_descendants(tier, refattrs, follow):
+    igt = tier.igt
+    roots = [item for item in tier.items if item.id is not None]
+    results = dict((item.id, []) for item in roots)
+    # for each agenda entry, the items and the root ids they descend from
+    entries = [(roots, dict((item.id, set([item.id])) for item in roots))]
+    for source, tier, refattr, reftier, hop in _descendant_hops(
+            igt, tier, refattrs, follow):
+        items, origins = entries[source]
+        referents = igt.reference_graph(refattr)[0]
+        refitems = hop(items)
+        reforigins = {}
+        root_refitems = dict((root_id, []) for root_id in results)
+        for refitem in refitems:
+            reforigins[refitem.id] = refitem_origins = set(
+                chain.from_iterable(
+                    origins.get(_id, ())
+                    for _id in _referent_ids(referents, refitem, refattr)
+                )
+            )
+            for root_id in refitem_origins:
+                root_refitems[root_id].append(refitem)
+        entries.append((refitems, reforigins))
+        for root_id, root_results in results.items():
+            root_results.append(
+                (tier, refattr, reftier, root_refitems[root_id])
+            )
+    return results
+
+
+def _referent_ids(referents, item, refattr):
+    if item.id is None:
+        return ref.ids(item.attributes.get(refattr, ''))
+    return referents.get(item.id, ())
+
+
+def _descendant_hops(igt, tier, refattrs, follow):
+    # The tiers visited by descendants() depend only on the tier-level
+    # references, so this yields each hop as (source, tier, refattr,
+    # reftier, hop) where source is the index of the agenda entry the
+    # hop starts from (0 is the initial tier, and each hop adds an
+    # entry) and hop() maps items on tier to their referrers on reftier
     visited = set()
-    agenda = deque([(tier, items)])
+    agenda = deque([(0, tier)])
+    n = 0
     while agenda:
-        tier, items = agenda.popleft()
-        tier_refs = tier.referrers(refattrs)
-        item_ids = set(item.id for item in items)
+        source, tier = agenda.popleft()
+        tier_refs = dict(
+            (ra, igt.reference_graph(ra, tiers=True)[1].get(tier.id, []))
+            for ra in refattrs
+        )
         # get followable refattrs with something on the referrers list
         ras = [ra for ra in refattrs if tier_refs[ra]]
         if follow == 'first' and ras:
@@ -82,15 +166,22 @@ def descendants(obj, refattrs=(SEGMENTATION, ALIGNMENT), follow='first'):
                 continue
             else:
                 visited.add((tier.id, refattr))
+            referrers = igt.reference_graph(refattr)[1]
             for reftier_id in tier_refs[refattr]:
                 reftier = igt[reftier_id]
-                refitems = [
-                    item for item in reftier.items
-                    if set(ref.ids(item.attributes.get(refattr,'')))
-                       .intersection(item_ids)
-                ]
-                yield (tier, refattr, reftier, refitems)
-                agenda.append((reftier, refitems))
+                yield (source, tier, refattr, reftier,
+                       _make_hop(referrers, reftier))
+                n += 1
+                agenda.append((n, reftier))
+
+
+def _make_hop(referrers, reftier):
+    def hop(items):
+        ids = set(chain.from_iterable(
+            referrers.get(item.id, ()) for item in items
+        ))
+        return [item for item in reftier.items if item.id in ids]
+    return hop
 
 #def ingroup(obj, refattrs)
 #def filter([objs], lambda x:
\ No newline at end of file
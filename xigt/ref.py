@@ -1,7 +1,8 @@
 
 import re
-from collections import namedtuple
+from collections import namedtuple, defaultdict
 
+from xigt import profiling as _profiling
 from xigt.errors import (XigtLookupError, XigtStructureError)
 
 ### Alignment Expressions ####################################################
@@ -178,11 +179,21 @@ def ids(expression):
 
 # operations with interpretation
 
-def resolve(container, expression):
+def resolve(container, expression, value=None):
     """
     Return the string that is the resolution of the alignment expression
-    `expression`, which selects ids from `container`.
+    `expression`, which selects ids from `container`. If `value` is
+    given, it is called with each selected item to get the item's value
+    instead of calling the item's `value()` method.
     """
+    if _profiling.enabled:
+        _profiling.count('refs_resolved')
+        with _profiling.phase('ref.resolve'):
+            return _resolve(container, expression, value)
+    return _resolve(container, expression, value)
+
+
+def _resolve(container, expression, value):
     itemgetter = getattr(container, 'get_item', container.get)
     tokens = []
     expression = expression.strip()
@@ -196,17 +207,17 @@ def resolve(container, expression):
                 .format(_id, expression)
             )
         # treat None values as empty strings for resolution
-        value = item.value() or ''
+        item_value = (item.value() if value is None else value(item)) or ''
         if _range:
             for spn_delim, start, end in span_re.findall(_range):
                 start = int(start) if start else None
                 end = int(end) if end else None
                 tokens.extend([
                     delimiters.get(spn_delim, ''),
-                    value[start:end]
+                    item_value[start:end]
                 ])
         else:
-            tokens.append(value)
+            tokens.append(item_value)
     return ''.join(tokens)
 
 
@@ -231,40 +242,74 @@ def referrers(igt, id, refattrs=None):
     """
     Return a list of ids denoting objects (tiers or items) in `igt` that
     refer to the given `id`. In other words, if 'b1' refers to 'a1',
-    then `referrers(igt, 'a1')` returns `['b1']`.
+    then `referrers(igt, 'a1')` returns `['b1']`. When `refattrs` is
+    given, the result comes from the inverted indices of
+    `Igt.reference_graph()`, which are rebuilt after `igt` changes.
     """
-    if refattrs is None:
-        result = {}
-    else:
-        result = {ra: [] for ra in refattrs}
-
     # if the id is a tier, only look at tiers; otherwise only look at items
     try:
         obj = igt[id]
-        others = igt.tiers
+        tiers = True
     except KeyError:
         obj = igt.get_item(id)
-        others = [i for t in igt.tiers for i in t.items]
+        tiers = False
 
     if obj is None:
         raise XigtLookupError(id)
 
+    if refattrs is not None:
+        return {
+            ra: list(igt.reference_graph(ra, tiers=tiers)[1].get(id, []))
+            for ra in refattrs
+        }
+
+    result = {}
+    if tiers:
+        others = igt.tiers
+    else:
+        others = [i for t in igt.tiers for i in t.items]
+
     for other in others:
         if other.id is None:
             continue  # raise a warning?
 
-        _refattrs = refattrs
-        if _refattrs is None:
-            _refattrs = other.allowed_reference_attributes()
-
         attrget = other.attributes.get  # just loop optimization
-        for ra in _refattrs:
+        for ra in other.allowed_reference_attributes():
             result.setdefault(ra, [])
             if id in ids(attrget(ra, '')):
                 result[ra].append(other.id)
     return result
 
 
+def reference_graph(objs, refattr):
+    """
+    Return the graph of references made by `objs` with `refattr`.
+
+    The graph is a pair of dictionaries `(referents, referrers)`. The
+    first maps the id of each object in `objs` that specifies
+    `refattr` to the list of ids it selects; the second is the inverse,
+    mapping each selected id to the ids (in order, without repetition)
+    of the objects that select it. Objects without ids are skipped.
+    """
+    referents = {}
+    referrers = defaultdict(list)
+    for obj in objs:
+        obj_id = obj.id
+        if obj_id is None:
+            continue
+        expression = obj.attributes.get(refattr)
+        if expression is None:
+            continue
+        ref_ids = ids(expression)
+        referents[obj_id] = ref_ids
+        for ref_id in ref_ids:
+            ids_ = referrers[ref_id]
+            # an expression may select the same id more than once
+            if not ids_ or ids_[-1] != obj_id:
+                ids_.append(obj_id)
+    return referents, dict(referrers)
+
+
 def dereference(obj, refattr):
     if hasattr(obj, 'igt'):
         _id = ids(obj.attributes[refattr])[0]
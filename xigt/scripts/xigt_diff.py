@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import sys
+import argparse
+import logging
+
+from xigt import diff
+from xigt.codecs import xigtxml
+
+
+def run(args):
+    old = xigtxml.load(args.old, mode='transient')
+    new = xigtxml.load(args.new, mode='transient')
+    patch = diff.diff(old, new)
+    logging.info('{} added, {} changed, {} removed'.format(
+        len(patch.added), len(patch.changed), len(patch.removed)))
+    if args.summary:
+        for _, igt in patch.added:
+            print('+ {}'.format(igt.id))
+        for igt_id in patch.changed:
+            print('~ {}'.format(igt_id))
+        for igt_id in patch.removed:
+            print('- {}'.format(igt_id))
+    elif args.output:
+        diff.dump(args.output, patch)
+    else:
+        diff.dump(sys.stdout.buffer, patch)
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Compare two Xigt corpora by IGT id and write a patch '
+                    'of the added, changed, and removed IGTs',
+        epilog='examples:\n'
+            '    xigt diff -o v1-v2.xpatch v1.xml v2.xml\n'
+            '    xigt diff --summary v1.xml v2.xml\n'
+            '    xigt patch -o v2-copy.xml v1.xml v1-v2.xpatch'
+    )
+    parser.add_argument('-v', '--verbose',
+        action='count', dest='verbosity', default=2,
+        help='increase the verbosity (can be repeated: -vvv)'
+    )
+    parser.add_argument('old',
+        help='the original Xigt corpus'
+    )
+    parser.add_argument('new',
+        help='the changed Xigt corpus'
+    )
+    parser.add_argument('-o', '--output',
+        metavar='PATH',
+        help='write the patch to PATH instead of stdout'
+    )
+    parser.add_argument('--summary',
+        action='store_true',
+        help='list the ids of added (+), changed (~), and removed (-) '
+             'IGTs instead of writing a patch'
+    )
+    args = parser.parse_args(arglist)
+    logging.basicConfig(level=50-(args.verbosity*10))
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,7 @@
 
 import argparse
 import logging
+from xigt import compression
 from xigt.codecs import xigtxml
 
 def run(infile, outpath, out_format, config=None):
@@ -13,8 +14,10 @@ def run(infile, outpath, out_format, config=None):
         import xigt.exporters.latex as exporter
     elif out_format == 'itsdb':
         import xigt.exporters.itsdb as exporter
+    elif out_format == 'columns':
+        import xigt.exporters.columns as exporter
     # elif ...
-    with open(infile, 'r') as in_fh:
+    with compression.open(infile, 'rb') as in_fh:
         xc = xigtxml.load(in_fh, mode='transient')
         exporter.xigt_export(xc, outpath, config=cfg)
 
@@ -26,9 +29,10 @@ def main(arglist=None):
     parser.add_argument('-i', '--input', metavar='PATH', required=True,
         help='The input Xigt corpus.')
     parser.add_argument('-o', '--output', metavar='PATH', required=True,
-        help='The output corpus.')
+        help='The output corpus (for columns, - is stdout and a .tsv '
+             'extension selects tab-separated values).')
     parser.add_argument('-f', '--format', metavar='FMT',
-        choices=['latex', 'itsdb'], default='latex',
+        choices=['latex', 'itsdb', 'columns'], default='latex',
         help='The format of the output corpus (default: latex).')
     parser.add_argument('-c', '--config', metavar='PATH', default=None,
         help='A JSON-formatted configuration file.')
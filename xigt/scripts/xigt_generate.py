@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+import sys
+import argparse
+import logging
+
+from xigt import generate
+from xigt.codecs import xigtxml, xigtjson, xigtbin
+
+
+def run(args):
+    xc = generate.generate(
+        igts=args.igts,
+        shape=args.shape,
+        seed=args.seed,
+        words=tuple(args.words),
+        morphemes=tuple(args.morphemes),
+        languages=args.languages,
+        tiers=args.tiers,
+        items=args.items,
+        depth=args.depth,
+        namespaces=args.namespaces
+    )
+    if args.format == 'bin':
+        out = args.output or sys.stdout.buffer
+        xigtbin.dump(out, xc)
+    else:
+        codec = xigtjson if args.format == 'json' else xigtxml
+        codec.dump(args.output or sys.stdout, xc)
+    logging.info('{} {} IGTs written'.format(args.igts, args.shape))
+
+
+def _range(s):
+    # "N" or "MIN-MAX"
+    try:
+        lo, _, hi = s.partition('-')
+        lo = int(lo)
+        hi = int(hi) if hi else lo
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid range: {}'.format(s))
+    if lo < 1 or hi < lo:
+        raise argparse.ArgumentTypeError('invalid range: {}'.format(s))
+    return (lo, hi)
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Generate a deterministic synthetic Xigt corpus shaped '
+                    'like ODIN or Toolbox data',
+        epilog='examples:\n'
+            '    xigt generate --igts 100000 -o odin-100k.xml\n'
+            '    xigt generate --shape toolbox --words 5-20 -f json -o tb.json\n'
+            '    xigt generate --tiers 6 --depth 3 --namespaces 2 -o deep.xml\n'
+            '    xigt generate --igts 10000000 -f bin -o big.xigtb'
+    )
+    parser.add_argument('-v', '--verbose',
+        action='count', dest='verbosity', default=2,
+        help='increase the verbosity (can be repeated: -vvv)'
+    )
+    parser.add_argument('-n', '--igts',
+        metavar='N', type=int, default=1000,
+        help='the number of IGTs (default: 1000)'
+    )
+    parser.add_argument('--shape',
+        choices=generate.SHAPES, default='odin',
+        help='the kind of data to imitate (default: odin)'
+    )
+    parser.add_argument('--words',
+        metavar='MIN-MAX', type=_range, default=(2, 8),
+        help='the number of words per phrase (default: 2-8)'
+    )
+    parser.add_argument('--morphemes',
+        metavar='MIN-MAX', type=_range, default=(1, 3),
+        help='the number of morphemes per word (default: 1-3)'
+    )
+    parser.add_argument('--languages',
+        metavar='N', type=int, default=10,
+        help='the number of languages to spread the IGTs over (default: 10)'
+    )
+    parser.add_argument('--tiers',
+        metavar='N', type=int, default=0,
+        help='the number of extra annotation tiers per IGT (default: 0)'
+    )
+    parser.add_argument('--items',
+        metavar='N', type=int,
+        help='the exact number of words per phrase (instead of --words)'
+    )
+    parser.add_argument('--depth',
+        metavar='N', type=int, default=2,
+        help='the length of reference chains of the extra tiers '
+             '(default: 2)'
+    )
+    parser.add_argument('--namespaces',
+        metavar='N', type=int, default=0,
+        help='the number of extra namespaces (default: 0)'
+    )
+    parser.add_argument('--seed',
+        type=int, default=0,
+        help='the random seed (default: 0)'
+    )
+    parser.add_argument('-f', '--format',
+        choices=('xml', 'json', 'bin'), default='xml',
+        help='the output format (default: xml)'
+    )
+    parser.add_argument('-o', '--output',
+        metavar='PATH',
+        help='write the corpus to PATH instead of stdout'
+    )
+    args = parser.parse_args(arglist)
+    if not 1 <= args.languages <= 520:
+        parser.error('--languages must be between 1 and 520')
+    if args.tiers < 0 or args.namespaces < 0:
+        parser.error('--tiers and --namespaces must not be negative')
+    if args.depth < 1 or (args.items is not None and args.items < 1):
+        parser.error('--depth and --items must be positive')
+    logging.basicConfig(level=50-(args.verbosity*10))
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+import argparse
+import logging
+
+from xigt.index import XigtIndex
+
+
+def run(args):
+    with XigtIndex(args.index) as idx:
+        for fn in args.remove:
+            logging.info('Removing {}'.format(fn))
+            idx.remove(fn)
+        for fn in args.infiles:
+            if args.rebuild:
+                logging.info('Indexing {}'.format(fn))
+                idx.add(fn)
+            elif idx.update(fn):
+                logging.info('Indexed {}'.format(fn))
+            else:
+                logging.info('Index of {} is current'.format(fn))
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Build or update a persistent query index of Xigt '
+                    'corpora',
+        epilog='examples:\n'
+            '    xigt index corpora.idx *.xml\n'
+            '    xigt query --index corpora.idx --find \'igt[@doc-id="397"]\'\n'
+            '    xigt partition --index corpora.idx --key-path=\'@doc-id\' by-doc-id'
+    )
+    parser.add_argument('-v', '--verbose',
+        action='count', dest='verbosity', default=2,
+        help='increase the verbosity (can be repeated: -vvv)'
+    )
+    parser.add_argument('index',
+        help='the index database (created if it does not exist)'
+    )
+    parser.add_argument('infiles',
+        nargs='*',
+        help='the Xigt corpus files to index; files already indexed are '
+             'only reindexed if they changed'
+    )
+    parser.add_argument('--rebuild',
+        action='store_true',
+        help='reindex the files even if they have not changed'
+    )
+    parser.add_argument('--remove',
+        metavar='PATH', action='append', default=[],
+        help='remove PATH from the index (can be repeated)'
+    )
+    args = parser.parse_args(arglist)
+    logging.basicConfig(level=50-(args.verbosity*10))
+    run(args)
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,7 @@ import logging
 
 from xigt.codecs import xigtxml
 from xigt import XigtCorpus, Igt, xigtpath as xp
+from xigt.index import XigtIndex
 
 def run(args):
     logging.debug('Partitioning with path \'{}\''.format(args.key_path))
@@ -15,16 +16,24 @@ def run(args):
     create_outdir(args.outdir)
     idx = defaultdict(lambda: defaultdict(set))  # key : filename : igt-index
     keypath = args.key_path
-    for fn in args.infiles:
+    xidx = XigtIndex(args.index) if args.index else None
+    infiles = args.infiles or (xidx.files() if xidx else [])
+    for fn in infiles:
         logging.info('Indexing {}'.format(fn))
-        index(fn, keypath, idx)
+        if xidx is not None:
+            xidx.update(fn)
+            index_from(xidx, fn, keypath, idx)
+        else:
+            index(fn, keypath, idx)
     for key, fn_idx in idx.items():
         logging.info('Writing {} (grouped from {} files)'
                      .format(key, len(fn_idx)))
         if key is None:
             key = args.default_key
         out_fn = os.path.join(args.outdir, normalize_key(key) + '.xml')
-        write(out_fn, fn_idx)
+        write(out_fn, fn_idx, xidx)
+    if xidx is not None:
+        xidx.close()
 
 def create_outdir(outdir):
     if os.path.isdir(outdir):
@@ -42,13 +51,20 @@ def index(fn, by, idx):
         idx_key = xp.find(igt, by)
         idx[idx_key][fn].add(i)
 
+def index_from(xidx, fn, by, idx):
+    for i, idx_key in enumerate(xidx.key_values(fn, by)):
+        idx[idx_key][fn].add(i)
+
 def normalize_key(key):
     return key.replace(':', '-')
 
-def write(out_fn, fn_idx):
+def write(out_fn, fn_idx, xidx=None):
     xc = XigtCorpus()
     for fn, igt_indices in fn_idx.items():
-        # if possible, try to decode needed igts only and skip the rest
+        if xidx is not None:
+            # decode needed igts only and skip the rest
+            xc.extend(igt for _, igt in xidx.load_igts(fn, igt_indices))
+            continue
         in_xc = xigtxml.load(fn, mode='transient')
         # ignoring corpus-level metadata
         xc.extend(igt for i, igt in enumerate(in_xc) if i in igt_indices)
@@ -62,7 +78,8 @@ def main(arglist=None):
         description="Partition Xigt corpora",
         epilog='examples:\n'
             '    xigt partition --key-path=\'metadata//dc:subject/@olac:code\' by-lang *.xml\n'
-            '    xigt partition --key-path=\'@doc-id\' by-doc-id by-lang/*.xml'
+            '    xigt partition --key-path=\'@doc-id\' by-doc-id by-lang/*.xml\n'
+            '    xigt partition --index corpora.idx --key-path=\'@doc-id\' by-doc-id'
     )
     parser.add_argument('-v', '--verbose',
         action='count', dest='verbosity', default=2,
@@ -80,6 +97,12 @@ def main(arglist=None):
         help='the XigtPath query key (must result in a string, so it '
             'should end with an @attribute, text(), or value())'
     )
+    parser.add_argument('--index',
+        metavar='PATH',
+        help='use (and update) the index at PATH (see `xigt index`) to '
+            'find keys and IGTs; if no files are given, partition all '
+            'indexed files'
+    )
     parser.add_argument('--default-key',
         metavar='KEY', default='---',
         help='if --key-path fails, KEY is used instead (default: ---)'
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+import sys
+import argparse
+import logging
+
+from xigt import diff
+from xigt.codecs import xigtxml
+
+
+def run(args):
+    patch = diff.load(args.patch)
+    logging.info('Applying {} added, {} changed, {} removed'.format(
+        len(patch.added), len(patch.changed), len(patch.removed)))
+    xc = diff.apply(xigtxml.load(args.infile, mode='transient'), patch)
+    xigtxml.dump(args.output or sys.stdout, xc)
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Apply a patch made with `xigt diff` to a Xigt corpus',
+        epilog='examples:\n'
+            '    xigt patch -o v2-copy.xml v1.xml v1-v2.xpatch'
+    )
+    parser.add_argument('-v', '--verbose',
+        action='count', dest='verbosity', default=2,
+        help='increase the verbosity (can be repeated: -vvv)'
+    )
+    parser.add_argument('infile',
+        help='the Xigt corpus to patch'
+    )
+    parser.add_argument('patch',
+        help='the patch to apply'
+    )
+    parser.add_argument('-o', '--output',
+        metavar='PATH',
+        help='write the patched corpus to PATH instead of stdout'
+    )
+    args = parser.parse_args(arglist)
+    logging.basicConfig(level=50-(args.verbosity*10))
+    run(args)
+
+if __name__ == '__main__':
+    main()
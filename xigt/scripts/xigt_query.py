@@ -9,6 +9,7 @@ import logging
 
 from xigt import XigtCorpus, Igt, xigtpath as xp
 from xigt.codecs import xigtxml
+from xigt.index import XigtIndex
 
 
 # see here: http://stackoverflow.com/a/34033230/1441112
@@ -54,13 +55,38 @@ def run(args):
     job = make_job(args)
     agenda = job['agenda']
     global_c = defaultdict
-    for infile in args.infiles:
+    idx = XigtIndex(args.index) if args.index else None
+    infiles = args.infiles or idx.files()
+    for infile in infiles:
         filename = basename(infile) if args.basename else infile
         print(job['file_description'].format(filename=filename))
-        xc = xigtxml.load(infile)
-        results = process_agenda(xc, agenda)
+        if idx is not None:
+            results = process_agenda(
+                infile, agenda, findall=index_findall(idx, infile)
+            )
+        else:
+            xc = xigtxml.load(infile)
+            results = process_agenda(xc, agenda)
         print_results(results)
         print()
+    if idx is not None:
+        idx.close()
+
+
+def index_findall(idx, infile):
+    # the returned findall() takes the filename in place of xc; queries
+    # the index cannot plan share one decoding of the file
+    decoded = []
+
+    def findall(_, path):
+        if idx.can_plan(infile, path):
+            return idx.findall(infile, path)
+        if not decoded:
+            decoded.append(xigtxml.load(infile))
+        return xp.findall(decoded[0], path)
+
+    return findall
+
 
 def make_job(args):
     job = {"agenda": []}  # load from json file?
@@ -94,30 +120,31 @@ def make_job(args):
     return job
 
 
-def process_agenda(xc, agenda):
+def process_agenda(xc, agenda, findall=xp.findall):
+    # findall is used for queries on xc; subqueries use xp.findall
     results = []
     for agendum in agenda:
         agendum['result'] = None
         action = agendum['action']
         if action == 'find':
-            find_pattern(xc, agendum)
+            find_pattern(xc, agendum, findall)
         elif action == 'tally':
-            results.extend(tally_pattern(xc, agendum))
+            results.extend(tally_pattern(xc, agendum, findall))
         elif action == 'unique':
-            results.append(unique_pattern(xc, agendum))
+            results.append(unique_pattern(xc, agendum, findall))
         elif action == 'count':
-            results.append(count_pattern(xc, agendum))
+            results.append(count_pattern(xc, agendum, findall))
     return results
 
 
-def find_pattern(xc, agendum):
-    for match in xp.findall(xc, agendum['query']):
+def find_pattern(xc, agendum, findall=xp.findall):
+    for match in findall(xc, agendum['query']):
         print(' ', agendum['description'].format(match=match))
 
 
-def tally_pattern(xc, agendum):
+def tally_pattern(xc, agendum, findall=xp.findall):
     counts = Counter()
-    for match in xp.findall(xc, agendum['query']):
+    for match in findall(xc, agendum['query']):
         group = CSTuple(xp.findall(match, agendum['subquery']))
         counts[group] += 1
     return [
@@ -126,13 +153,13 @@ def tally_pattern(xc, agendum):
     ]
 
 
-def unique_pattern(xc, agendum):
-    counts = Counter(xp.findall(xc, agendum['query']))
+def unique_pattern(xc, agendum, findall=xp.findall):
+    counts = Counter(findall(xc, agendum['query']))
     return (len(counts), agendum['description'].format(match=''))
 
 
-def count_pattern(xc, agendum):
-    count = len(xp.findall(xc, agendum['query']))
+def count_pattern(xc, agendum, findall=xp.findall):
+    count = len(findall(xc, agendum['query']))
     return (count, agendum['description'].format(match=''))
 
 
@@ -156,13 +183,19 @@ def main(arglist=None):
         epilog='examples:\n'
             '    xigt query --find \'igt/tier[@type="words"]/item/value()\' x.xml\n'
             '    xigt query --tally \'igt\' \'.//item[value()="dog"]\'\n'
-            '               --description "IGTs with \'dog\' tokens" x.xml'
+            '               --description "IGTs with \'dog\' tokens" x.xml\n'
+            '    xigt query --index corpora.idx --count \'igt[@doc-id="397"]\''
     )
     parser.add_argument('-v', '--verbose',
         action='count', dest='verbosity', default=2,
         help='increase the verbosity (can be repeated: -vvv)'
     )
-    parser.add_argument('infiles', nargs='+')
+    parser.add_argument('infiles', nargs='*')
+    parser.add_argument('--index',
+        metavar='PATH',
+        help='use the index at PATH (see `xigt index`) to select IGTs; '
+             'if no files are given, query all indexed files'
+    )
     parser.add_argument('-f', '--find',
         nargs=1, metavar='QUERY', action=AgendaAction,
         help='find matches for XigtPath XP'
@@ -196,6 +229,8 @@ def main(arglist=None):
     agenda = getattr(args, 'agenda', [])
     if agenda and agenda[0][0] == 'description':
         parser.error('--description must follow an action (e.g., --tally)')
+    if not args.infiles and not args.index:
+        parser.error('no input files given')
     logging.basicConfig(level=50-(args.verbosity*10))
     run(args)
 
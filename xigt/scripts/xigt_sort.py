@@ -5,6 +5,7 @@ import re
 import argparse
 import logging
 
+from xigt import compression
 from xigt.codecs import xigtxml
 from xigt import XigtCorpus, Igt, xigtpath as xp
 
@@ -28,7 +29,16 @@ def run(args):
             for tier in igt:
                 tier.sort(key=make_sortkey(args.item_key))
     if args.in_place:
-        xigtxml.dump(args.infile, xc)
+        # keep the file's compression even if its name doesn't show it
+        name = compression.detect(args.infile)
+        if name is None:
+            fh = open(args.infile, 'wb')
+        else:
+            fh = compression.open(args.infile, 'wb', compression=name)
+        with fh:
+            xigtxml.dump(fh, xc)
+    elif args.output:
+        xigtxml.dump(args.output, xc)
     else:
         print(xigtxml.dumps(xc))
 
@@ -51,7 +61,8 @@ def main(arglist=None):
         epilog='examples:\n'
             '    xigt sort --igt-key=\'@doc-id\' --igt-key=\'@id\' in.xml > out.xml\n'
             '    xigt sort --tier-key=\'@type\' in.xml > out.xml\n'
-            '    xigt sort --tier-deps="segmentation,alignment,content" in.xml > out.xml'
+            '    xigt sort --tier-deps="segmentation,alignment,content" in.xml > out.xml\n'
+            '    xigt sort --igt-key=\'@id\' -o out.xml.gz in.xml'
     )
     parser.add_argument('-v', '--verbose',
         action='count', dest='verbosity', default=2,
@@ -60,10 +71,15 @@ def main(arglist=None):
     parser.add_argument('infile',
         help='the Xigt corpus file to sort'
     )
-    parser.add_argument('--in-place',
+    outgroup = parser.add_mutually_exclusive_group()
+    outgroup.add_argument('--in-place',
         action='store_true',
         help='don\'t print to stdout; modify the input file in-place'
     )
+    outgroup.add_argument('-o', '--output',
+        metavar='PATH',
+        help='write the sorted corpus to PATH instead of stdout'
+    )
     parser.add_argument('--igt-key',
         metavar='XIGTPATH', action='append',
         help='the XigtPath query for IGTs (must result in a string, so '
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+import argparse
+import logging
+
+from xigt.codecs import xigtxml
+from xigt.memory import COMPONENTS, memory_usage
+
+
+def run(args):
+    for infile in args.infiles:
+        stats = corpus_stats(infile, memory=args.memory)
+        print('{}:'.format(infile))
+        print_stats(stats)
+
+
+def corpus_stats(infile, memory=False):
+    """
+    Return the counts of IGTs, tiers, items, and metadata in *infile*
+    and, if *memory* is `True`, the totals and maxima of the memory use
+    of its IGTs by component. The file is read one IGT at a time.
+    """
+    stats = {'igts': 0, 'tiers': 0, 'items': 0, 'metadata': 0}
+    if memory:
+        stats['memory'] = dict(
+            (name, [0, 0]) for name in COMPONENTS + ('total',)
+        )  # name: [sum, max]
+    xc = xigtxml.load(infile, mode='transient')
+    stats['metadata'] += len(xc.metadata)
+    for igt in xc:
+        stats['igts'] += 1
+        stats['tiers'] += len(igt)
+        stats['items'] += sum(len(tier) for tier in igt)
+        stats['metadata'] += len(igt.metadata)
+        if memory:
+            for name, size in igt.memory_usage().items():
+                entry = stats['memory'][name]
+                entry[0] += size
+                if size > entry[1]:
+                    entry[1] = size
+    return stats
+
+
+def print_stats(stats):
+    for name in ('igts', 'tiers', 'items', 'metadata'):
+        print('  {:<18} {:>12}'.format(name, stats[name]))
+    if 'memory' in stats:
+        n = stats['igts'] or 1
+        print()
+        print('  {:<18} {:>12} {:>12} {:>12}'.format(
+            'memory (bytes)', 'total', 'per IGT', 'max IGT'))
+        for name in COMPONENTS + ('total',):
+            total, maximum = stats['memory'][name]
+            print('  {:<18} {:>12} {:>12} {:>12}'.format(
+                name, total, total // n, maximum))
+
+
+def main(arglist=None):
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='Report statistics of Xigt corpora',
+        epilog='examples:\n'
+            '    xigt stats corpus.xml\n'
+            '    xigt stats --memory corpus.xml'
+    )
+    parser.add_argument('-v', '--verbose',
+        action='count', dest='verbosity', default=2,
+        help='increase the verbosity (can be repeated: -vvv)'
+    )
+    parser.add_argument('infiles', nargs='+')
+    parser.add_argument('--memory',
+        action='store_true',
+        help='report the memory used by the IGTs when loaded, by '
+             'component (IGTs in a corpus share some strings, so a '
+             'fully loaded corpus may use less)'
+    )
+    args = parser.parse_args(arglist)
+    logging.basicConfig(level=50-(args.verbosity*10))
+    run(args)
+
+if __name__ == '__main__':
+    main()
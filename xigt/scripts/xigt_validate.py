@@ -7,6 +7,7 @@ import logging
 import warnings
 warnings.simplefilter('ignore')
 
+from xigt import compression
 from xigt.codecs import xigtxml
 from xigt.ref import (ids, spans, selection_re, span_re)
 from xigt.errors import XigtAttributeError
@@ -391,7 +392,7 @@ def run(args):
     from xml.etree import ElementTree as ET
     ids = Counter()
     for i, f in enumerate(args.files):
-        with open(f, 'r') as fh:
+        with compression.open(f, 'rb') as fh:
             try:
                 xc = xigtxml.load(fh, mode='transient')
             except ET.ParseError:
@@ -0,0 +1,382 @@
+
+"""
+Persistent, incrementally updated corpora in SQLite databases.
+
+A |XigtStore| keeps each IGT of a corpus in its own database row,
+together with indexed columns for the IGT's id, type, and attributes.
+IGTs are decoded only when they are accessed, and `save()` writes back
+only the IGTs that were added or changed since they were loaded, so a
+tool editing a few IGTs of a large corpus does not need to decode or
+rewrite the rest.
+
+    >>> from xigt.store import XigtStore
+    >>> with XigtStore('master.db') as store:
+    ...     igt = store['igt1']
+    ...     igt.attributes['checked'] = 'yes'
+    ...     store.save()
+
+The database uses write-ahead logging, so any number of readers (e.g.,
+stores opened with `readonly=True`) can read the last saved state
+while one writer makes changes.
+"""
+
+import sqlite3
+import weakref
+from collections import OrderedDict
+from urllib.parse import quote
+
+from xigt.codecs import xigtbin
+from xigt.codecs.xigtbin import (
+    _Encoder,
+    _read_frame_strings,
+    _decode_common,
+    _decode_metadata_list,
+)
+from xigt.errors import XigtError
+from xigt.metadata import XigtMetadataMixin
+from xigt.mixins import XigtAttributeMixin, _invalidate_nsmaps, _watch
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS corpus (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS igts (
+    id INTEGER PRIMARY KEY,
+    position INTEGER NOT NULL,
+    igt_id TEXT,
+    type TEXT,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    igt INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS igts_position ON igts (position);
+CREATE INDEX IF NOT EXISTS igts_igt_id ON igts (igt_id);
+CREATE INDEX IF NOT EXISTS igts_type ON igts (type);
+CREATE INDEX IF NOT EXISTS attributes_name ON attributes (name, value);
+CREATE INDEX IF NOT EXISTS attributes_igt ON attributes (igt);
+'''
+
+# rows are read in batches of this many IGTs
+BATCH_SIZE = 256
+
+
+class XigtStore(XigtAttributeMixin, XigtMetadataMixin):
+    """
+    A corpus stored in a SQLite database.
+
+    The store has the corpus-level attributes and metadata of a
+    |XigtCorpus| and list-like access to its IGTs by position or id.
+    IGTs are decoded on first access, and the same |Igt| object is
+    returned as long as it is in use (or among the *max_igts* most
+    recently used) until the store is closed or `unload()` is called;
+    other unchanged IGTs are decoded again when next accessed. Changes
+    to loaded IGTs, to the corpus-level attributes and metadata, and
+    IGTs added with `append()` or removed with `remove()` are written
+    by `save()`; closing without saving discards them. Changed IGTs
+    are kept until they are saved.
+
+    Args:
+        path: the path of the database; it is created if it does not
+            exist
+        readonly: if `True`, open the database for reading only
+        timeout: seconds to wait for another connection's lock
+        max_igts: the number of recently used, unchanged IGTs to keep
+    """
+
+    def __init__(self, path, readonly=False, timeout=5.0, max_igts=1000):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self._conn = sqlite3.connect(
+                'file:{}?mode=ro'.format(quote(path)), uri=True,
+                timeout=timeout
+            )
+        else:
+            self._conn = sqlite3.connect(path, timeout=timeout)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+        self.max_igts = max_igts
+        # every loaded IGT still in use, the recently used ones, and
+        # the changed ones, by rowid
+        self._loaded = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+        self._changed = {}
+        self._rowids = {}  # id(igt): rowid
+        self._parent = None
+        XigtMetadataMixin.__init__(self)
+        row = self._conn.execute(
+            'SELECT data FROM corpus WHERE id=0'
+        ).fetchone()
+        self._header = row[0] if row is not None else None
+        self._load_header(self._header)
+
+    def __repr__(self):
+        return '<XigtStore of {} at {}>'.format(self.path, str(id(self)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the database, discarding unsaved changes."""
+        self._conn.close()
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM igts').fetchone()[0]
+
+    def __iter__(self):
+        for rowid, data in self._rows():
+            yield self._load(rowid, data)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            if key < 0:
+                key += len(self)
+            row = None
+            if key >= 0:
+                row = self._conn.execute(
+                    'SELECT id, data FROM igts ORDER BY position '
+                    'LIMIT 1 OFFSET ?',
+                    (key,)
+                ).fetchone()
+            if row is None:
+                raise IndexError('IGT index out of range: {}'.format(key))
+        else:
+            row = self._conn.execute(
+                'SELECT id, data FROM igts WHERE igt_id=? '
+                'ORDER BY position LIMIT 1',
+                (key,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(key)
+        return self._load(*row)
+
+    def __delitem__(self, key):
+        self.remove(self[key])
+
+    def get(self, obj_id, default=None):
+        try:
+            return self[obj_id]
+        except (KeyError, IndexError):
+            return default
+
+    def ids(self):
+        """Return the list of saved IGT ids in corpus order."""
+        rows = self._conn.execute(
+            'SELECT igt_id FROM igts ORDER BY position'
+        )
+        return [row[0] for row in rows]
+
+    def select(self, type=None, attributes=None):
+        """
+        Yield the IGTs whose type is *type* (if not `None`) and that
+        have all the attribute values in the *attributes* dictionary
+        (if given), in corpus order. The selection uses the saved
+        values, so changes made since the last `save()` are not
+        considered.
+        """
+        conditions = ['position > ?']
+        params = []
+        if type is not None:
+            conditions.append('igts.type = ?')
+            params.append(type)
+        for name, value in (attributes or {}).items():
+            conditions.append(
+                'EXISTS (SELECT 1 FROM attributes WHERE '
+                'attributes.igt = igts.id AND attributes.name = ? '
+                'AND attributes.value = ?)'
+            )
+            params.extend([name, value])
+        for rowid, data in self._rows(conditions, params):
+            yield self._load(rowid, data)
+
+    def append(self, igt):
+        """Add |Igt| *igt* to the end of the corpus."""
+        self._assert_writable()
+        if igt.id is not None and self._conn.execute(
+                'SELECT 1 FROM igts WHERE igt_id=?', (igt.id,)).fetchone():
+            raise XigtError(
+                'Id "{}" already exists in collection.'.format(igt.id)
+            )
+        igt._parent = self
+        _invalidate_nsmaps(igt)
+        rowid, _ = self._insert(igt)
+        self._track(rowid, igt)
+
+    def extend(self, igts):
+        for igt in igts:
+            self.append(igt)
+
+    def remove(self, igt):
+        """Remove |Igt| *igt*, which must have come from this store."""
+        self._assert_writable()
+        try:
+            rowid = self._rowids.pop(id(igt))
+        except KeyError:
+            raise XigtError('The Igt was not loaded from this store.')
+        self._loaded.pop(rowid, None)
+        self._recent.pop(rowid, None)
+        self._changed.pop(rowid, None)
+        self._conn.execute('DELETE FROM attributes WHERE igt=?', (rowid,))
+        self._conn.execute('DELETE FROM igts WHERE id=?', (rowid,))
+        igt._parent = None
+        _invalidate_nsmaps(igt)
+
+    def save(self):
+        """
+        Write new and changed IGTs and corpus-level information to the
+        database and commit. Return the number of IGTs written.
+        """
+        self._assert_writable()
+        conn = self._conn
+        changed = self._changed
+        self._changed = {}
+        for rowid, igt in changed.items():
+            conn.execute(
+                'UPDATE igts SET igt_id=?, type=?, data=? WHERE id=?',
+                (igt.id, igt.type, xigtbin.encode_igt(igt), rowid)
+            )
+            conn.execute('DELETE FROM attributes WHERE igt=?', (rowid,))
+            self._write_attributes(rowid, igt)
+            _watch(igt)
+            self._use(rowid, igt)
+        header = _encode_header(self)
+        if header != self._header:
+            conn.execute(
+                'INSERT OR REPLACE INTO corpus (id, data) VALUES (0, ?)',
+                (header,)
+            )
+            self._header = header
+        conn.commit()
+        return len(changed)
+
+    def unload(self):
+        """
+        Forget the loaded IGTs so they can be garbage-collected. Unsaved
+        changes to them are not written by later calls to `save()`.
+        """
+        self._loaded.clear()
+        self._recent.clear()
+        self._changed.clear()
+        self._rowids.clear()
+
+    def _assert_writable(self):
+        if self.readonly:
+            raise XigtError('The store is read-only.')
+
+    def _rows(self, conditions=(), params=()):
+        # yield the (rowid, data) of the IGTs meeting the conditions in
+        # corpus order; rows are read in batches after the last
+        # position, so the store can be changed during the iteration
+        sql = (
+            'SELECT id, position, data FROM igts WHERE {} '
+            'ORDER BY position LIMIT {}'.format(
+                ' AND '.join(conditions or ['position > ?']), BATCH_SIZE
+            )
+        )
+        last = -1
+        while True:
+            rows = self._conn.execute(sql, [last] + list(params)).fetchall()
+            for rowid, last, data in rows:
+                yield rowid, data
+            if len(rows) < BATCH_SIZE:
+                break
+
+    def _load(self, rowid, data):
+        igt = self._loaded.get(rowid)
+        if igt is None:
+            igt = xigtbin.decode_igt(data)
+            igt._parent = self
+            self._track(rowid, igt)
+        else:
+            self._use(rowid, igt)
+        return igt
+
+    def _track(self, rowid, igt):
+        # start tracking a loaded or appended IGT
+        self._loaded[rowid] = igt
+        self._rowids[id(igt)] = rowid
+        weakref.finalize(igt, self._rowids.pop, id(igt), None)
+        _watch(igt)
+        self._use(rowid, igt)
+
+    def _use(self, rowid, igt):
+        # keep the most recently used unchanged IGTs
+        if rowid in self._changed:
+            return
+        recent = self._recent
+        recent[rowid] = igt
+        recent.move_to_end(rowid)
+        while len(recent) > self.max_igts:
+            recent.popitem(last=False)
+
+    def _igt_changed(self, igt):
+        # keep a changed IGT until it is saved
+        rowid = self._rowids.get(id(igt))
+        if rowid is not None and rowid not in self._changed:
+            self._changed[rowid] = igt
+            self._recent.pop(rowid, None)
+
+    def _insert(self, igt):
+        position = self._conn.execute(
+            'SELECT COALESCE(MAX(position) + 1, 0) FROM igts'
+        ).fetchone()[0]
+        data = xigtbin.encode_igt(igt)
+        cur = self._conn.execute(
+            'INSERT INTO igts (position, igt_id, type, data) '
+            'VALUES (?, ?, ?, ?)',
+            (position, igt.id, igt.type, data)
+        )
+        self._write_attributes(cur.lastrowid, igt)
+        return cur.lastrowid, data
+
+    def _write_attributes(self, rowid, igt):
+        self._conn.executemany(
+            'INSERT INTO attributes (igt, name, value) VALUES (?, ?, ?)',
+            [(rowid, name, value) for name, value in igt.attributes.items()]
+        )
+
+    def _load_header(self, data):
+        if data is None:
+            XigtAttributeMixin.__init__(self)
+            return
+        strings = [None]
+        pos = _read_frame_strings(data, strings)
+        id, type, namespace, nsmap, attributes, pos = _decode_common(
+            data, pos, strings
+        )
+        XigtAttributeMixin.__init__(
+            self, id=id, type=type, attributes=attributes,
+            namespace=namespace, nsmap=nsmap
+        )
+        metadata, _ = _decode_metadata_list(data, pos, strings)
+        self.metadata = metadata
+
+
+def create(path, xc):
+    """
+    Create a store at *path* from |XigtCorpus| *xc* and return it.
+
+    The IGTs of *xc* are encoded and written one by one without being
+    kept, so *xc* may be a transient corpus, and *xc* is not modified.
+    """
+    store = XigtStore(path)
+    if store._header is not None or len(store):
+        store.close()
+        raise XigtError('The store already exists: {}'.format(path))
+    store._load_header(_encode_header(xc))
+    for igt in xc:
+        store._insert(igt)
+    store.save()
+    return store
+
+
+def _encode_header(xc):
+    encoder = _Encoder()
+    return bytes(encoder._frame(encoder._encode_corpus, xc))
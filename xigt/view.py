@@ -0,0 +1,362 @@
+
+"""
+Lazy, read-only views of corpora in the xigtbin format.
+
+A |CorpusView| memory-maps a file written by `xigt.codecs.xigtbin` and
+uses the file's IGT offset table to decode IGTs only when they are
+used. Decoding copies an IGT's strings out of the buffer, so views are
+lazy rather than zero-copy. The views offer the reading side of the
+|XigtCorpus|, |Igt|, |Tier|, and |Item| API (iteration, `get()`,
+`get_item()`, `attributes`, `get_attribute()`, `value()`, etc.), but
+they are lighter than the model objects because nothing is validated
+or indexed ahead of time. Views cannot be modified: setting their ids,
+types, namespaces, namespace maps, attributes, metadata, or text
+raises an |XigtError|, their attribute dictionaries are read-only
+mappings, and their metadata are tuples. The metadata themselves are
+model objects, so changes to them are possible but are never written
+to the file.
+
+Since the file is mapped read-only, the buffer is shared by processes
+forked after the view is opened, so workers can read the same corpus
+without each holding a copy of it. Views pickle by filename, so they
+can also be passed to spawned processes, which map the file again.
+
+    >>> from xigt.view import CorpusView
+    >>> with CorpusView('corpus.xigtb') as xc:
+    ...     for igt in xc:
+    ...         words = igt.get('w')
+"""
+
+import mmap
+from operator import attrgetter
+from types import MappingProxyType
+
+from xigt import compression
+from xigt.codecs.xigtbin import (
+    MAGIC,
+    TRAILER,
+    read_trailer,
+    read_footer,
+    _read_varint,
+    _read_text,
+    _skip_strings,
+    _decode_common,
+    _decode_metadata_list,
+)
+from xigt.errors import XigtError
+from xigt.mixins import XigtAttributeMixin, XigtReferenceAttributeMixin
+from xigt.model import Item
+
+
+def _read_only(fget):
+    # a property of views that cannot be set
+    def fset(self, value):
+        raise XigtError('Views are read-only.')
+    return property(fget, fset)
+
+
+def _attributes(obj):
+    return MappingProxyType(obj._attributes)
+
+
+class _AttributeView(object):
+    # the read-only attributes of views, before XigtAttributeMixin's
+
+    id = _read_only(attrgetter('_id'))
+    type = _read_only(attrgetter('_type'))
+    namespace = _read_only(attrgetter('_namespace'))
+    nsmap = _read_only(XigtAttributeMixin.nsmap.fget)
+    attributes = _read_only(_attributes)
+    metadata = _read_only(attrgetter('_metadata'))
+
+
+class _ReferenceView(object):
+    # the read-only reference attributes of tier and item views
+
+    alignment = _read_only(XigtReferenceAttributeMixin.alignment.fget)
+    content = _read_only(XigtReferenceAttributeMixin.content.fget)
+    segmentation = _read_only(XigtReferenceAttributeMixin.segmentation.fget)
+
+
+class _ContainerView(object):
+    # read-only list-and-dict access over self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, slice)):
+            return self._members[key]
+        if self._dict is None:
+            self._dict = {}
+            for obj in self._members:
+                if obj.id is not None:
+                    self._dict.setdefault(obj.id, obj)
+        try:
+            return self._dict[key]
+        except KeyError:
+            pass
+        try:
+            return self._members[int(key)]
+        except ValueError:
+            raise KeyError(key)
+
+    def get(self, obj_id, default=None):
+        try:
+            return self[obj_id]
+        except (KeyError, IndexError):
+            return default
+
+
+class CorpusView(_AttributeView, XigtAttributeMixin):
+    """
+    A read-only, memory-mapped view of a xigtbin corpus file.
+
+    Indexing with an integer or an IGT id, and iteration, return
+    |IgtView| objects. IGTs are not cached by the corpus view, so keep
+    a reference to an IGT view to avoid decoding it again.
+
+    Args:
+        path: the path of an uncompressed xigtbin file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, 'rb')
+        if compression.detect(self._fh) is not None:
+            self._fh.close()
+            raise XigtError(
+                'Cannot memory-map a compressed file: {}'.format(path)
+            )
+        try:
+            self._buf = mmap.mmap(
+                self._fh.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:  # empty file
+            self._fh.close()
+            raise XigtError('Not a xigtbin file: {}'.format(path))
+        buf = self._buf
+        if buf[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise XigtError('Not a xigtbin file: {}'.format(path))
+        end = len(buf) - TRAILER.size
+        footer_pos = read_trailer(buf[end:])
+        self._strings, self._offsets, self._ids = read_footer(
+            buf[footer_pos:end]
+        )
+        self._positions = None
+        # the corpus frame's strings are repeated in the footer's table
+        _, pos = _read_varint(buf, len(MAGIC))
+        pos = _skip_strings(buf, pos)
+        (self._id, self._type, self._namespace, self._nsmap,
+         self._attributes, pos) = _decode_common(buf, pos, self._strings)
+        metadata, _ = _decode_metadata_list(buf, pos, self._strings)
+        self._metadata = _adopt(metadata, self)
+        self._parent = None
+
+    def __repr__(self):
+        return '<CorpusView of {} with {} Igts at {}>'.format(
+            self.path, len(self), str(id(self))
+        )
+
+    def __reduce__(self):
+        return (CorpusView, (self.path,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._buf.close()
+        self._fh.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for i in range(len(self._offsets)):
+            yield IgtView(self, i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [IgtView(self, i)
+                    for i in range(*key.indices(len(self._offsets)))]
+        if isinstance(key, int):
+            n = len(self._offsets)
+            if key < 0:
+                key += n
+            if not 0 <= key < n:
+                raise IndexError('IGT index out of range: {}'.format(key))
+            return IgtView(self, key)
+        if self._positions is None:
+            self._positions = {}
+            for i, igt_id in enumerate(self._ids):
+                self._positions.setdefault(igt_id, i)
+        try:
+            return IgtView(self, self._positions[key])
+        except KeyError:
+            raise KeyError(key)
+
+    def get(self, obj_id, default=None):
+        try:
+            return self[obj_id]
+        except (KeyError, IndexError):
+            return default
+
+    @property
+    def igts(self):
+        return list(self)
+
+    def _decode_igt(self, igt, position):
+        buf = self._buf
+        strings = self._strings
+        _, pos = _read_varint(buf, self._offsets[position])
+        pos = _skip_strings(buf, pos)
+        _, igt._type, igt._namespace, igt._nsmap, igt._attributes, pos = (
+            _decode_common(buf, pos, strings)
+        )
+        metadata, pos = _decode_metadata_list(buf, pos, strings)
+        igt._metadata = _adopt(metadata, igt)
+        tiers = []
+        n, pos = _read_varint(buf, pos)
+        for _ in range(n):
+            tier = TierView(igt)
+            (tier._id, tier._type, tier._namespace, tier._nsmap,
+             tier._attributes, pos) = _decode_common(buf, pos, strings)
+            metadata, pos = _decode_metadata_list(buf, pos, strings)
+            tier._metadata = _adopt(metadata, tier)
+            items = tier._members
+            m, pos = _read_varint(buf, pos)
+            for _ in range(m):
+                item = ItemView(tier)
+                (item._id, item._type, item._namespace, item._nsmap,
+                 item._attributes, pos) = _decode_common(buf, pos, strings)
+                item._text, pos = _read_text(buf, pos)
+                items.append(item)
+            tiers.append(tier)
+        igt._members = tiers
+
+
+class IgtView(_ContainerView, _AttributeView, XigtAttributeMixin):
+    """
+    A read-only view of an IGT in a |CorpusView|.
+
+    The IGT's id is available immediately; everything else is decoded
+    from the corpus buffer the first time it is used.
+    """
+
+    def __init__(self, corpus, position):
+        self._parent = corpus
+        self._position = position
+        self._id = corpus._ids[position]
+        self._dict = None
+        self._itemdict = None
+
+    def __repr__(self):
+        return '<IgtView (id: {}) at {}>'.format(
+            str(self.id or '--'), str(id(self))
+        )
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set yet, which are
+        # those set by decoding
+        if (name in _decoded_igt_attributes
+                and '_members' not in self.__dict__):
+            self._parent._decode_igt(self, self._position)
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    @property
+    def corpus(self):
+        return self._parent
+
+    @property
+    def tiers(self):
+        return list(self._members)
+
+    def get_item(self, item_id, default=None):
+        if self._itemdict is None:
+            self._itemdict = {}
+            for tier in self._members:
+                for item in tier._members:
+                    if item.id is not None:
+                        self._itemdict.setdefault(item.id, item)
+        return self._itemdict.get(item_id, default)
+
+    def get_any(self, _id, default=None):
+        return self.get(_id, self.get_item(_id, default))
+
+
+_decoded_igt_attributes = frozenset([
+    '_type', '_namespace', '_nsmap', '_attributes', '_metadata', '_members'
+])
+
+
+class TierView(_ContainerView, _AttributeView, _ReferenceView,
+               XigtAttributeMixin, XigtReferenceAttributeMixin):
+    """A read-only view of a tier in an |IgtView|."""
+
+    def __init__(self, igt):
+        self._parent = igt
+        self._members = []
+        self._dict = None
+
+    def __repr__(self):
+        return '<TierView (id: {}; type: {}) with {} Items at {}>'.format(
+            str(self.id or '--'), self.type, len(self), str(id(self))
+        )
+
+    @property
+    def igt(self):
+        return self._parent
+
+    @property
+    def corpus(self):
+        return self._parent._parent
+
+    @property
+    def items(self):
+        return list(self._members)
+
+
+class ItemView(_AttributeView, _ReferenceView, XigtAttributeMixin,
+               XigtReferenceAttributeMixin):
+    """A read-only view of an item in a |TierView|."""
+
+    text = _read_only(attrgetter('_text'))
+
+    def __init__(self, tier):
+        self._parent = tier
+
+    def __repr__(self):
+        return '<ItemView (id: {}) at {}>'.format(
+            str(self.id or '--'), str(id(self))
+        )
+
+    @property
+    def tier(self):
+        return self._parent
+
+    @property
+    def igt(self):
+        return self._parent._parent
+
+    @property
+    def corpus(self):
+        return self._parent._parent._parent
+
+    # values are resolved exactly as for model items
+    value = Item.value
+    resolve_ref = Item.resolve_ref
+    span = Item.span
+
+
+def _adopt(metadata, parent):
+    for md in metadata:
+        md._parent = parent
+    return tuple(metadata)
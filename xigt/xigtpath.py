@@ -4,6 +4,8 @@ from collections import namedtuple, deque
 from itertools import chain
 
 from xigt import (XigtCorpus, Meta, MetaChild, ref)
+from xigt import profiling as _profiling
+from xigt.consts import FULL
 from xigt.errors import XigtError
 
 # XigtPath Grammar
@@ -60,6 +62,8 @@ def iterfind(obj, path):
     if not steps:
         return
     results = _expr([obj], steps)
+    if _profiling.enabled:
+        results = _profiling.timed('xigtpath', results)
     if steps:
         pass  # why is this not working?
         # raise XigtPathError(
@@ -109,13 +113,17 @@ def _step(objs, steps):
             yield obj
     else:
         step = steps.popleft()
+        if _profiling.enabled:
+            _profiling.count('xigtpath_steps')
         # axis and nodetests
         if step == '(':
             results = _disjunction(objs, steps)
         elif step == '//':
             name = steps.popleft()
-            results = (d for obj in objs
-                         for d in _find_descendant_or_self(obj, name))
+            results = _find_indexed_tiers(objs, name, steps)
+            if results is None:
+                results = (d for obj in objs
+                             for d in _find_descendant_or_self(obj, name))
         elif step == '@':
             attr = steps.popleft()
             results = (res for obj in objs for res in _find_attr(obj, attr))
@@ -227,6 +235,22 @@ def _find_descendant_or_self(obj, name):
         for desc in _find_descendant_or_self(child, name):
             yield desc
 
+def _find_indexed_tiers(objs, name, steps):
+    # //tier[@type="..."] on fully loaded corpora can use the corpus
+    # index instead of visiting every descendant; the predicate is
+    # consumed here. Returns None if the index cannot be used.
+    if (name != 'tier'
+            or len(steps) < 6
+            or [steps[i] for i in (0, 1, 2, 3, 5)] != ['[', '@', 'type',
+                                                       '=', ']']
+            or not all(isinstance(obj, XigtCorpus) and obj.mode == FULL
+                       for obj in objs)):
+        return None
+    val = steps[4].strip('"')
+    for _ in range(6):
+        steps.popleft()
+    return [tier for obj in objs for tier in obj.tiers_of_type(val)]
+
 def _find_referent(obj, refattrs):
     refs = []
     igt = obj.igt if hasattr(obj, 'igt') else obj
@@ -253,7 +277,9 @@ def _make_predicate_test(steps):
         subpath.append(steps.popleft())
     subpath = ''.join(subpath)  # ugly hack so findall() works
     if steps[0] == ']':
-        predtest = lambda obj: any(bool(findall(obj, subpath)))
+        # missing attributes are found as None
+        predtest = lambda obj: any(v is not None
+                                   for v in findall(obj, subpath))
     elif steps[0] in ('=', '!='):
         cmp = steps.popleft()
         val = steps.popleft().strip('"')
@@ -265,6 +291,7 @@ def _make_predicate_test(steps):
     return predtest
 
 def _get_corpus(obj):
-    while not isinstance(obj, XigtCorpus):
+    # the root, which may also be, e.g., a CachedCorpus
+    while obj._parent is not None:
         obj = obj._parent
     return obj